@@ -0,0 +1,159 @@
+# Load test of the spiral service: batching concurrent requests compared with solving every request on its own
+import argparse
+import asyncio
+import json
+import re
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from class_logarithmic_spiral import LogarithmicSpiral
+from class_logarithmic_spiral_batch import LogarithmicSpiralBatch
+from func_logging import set_quiet
+
+# load test parameters
+num_requests = 5000     # number of spiral requests sent in total
+num_clients = 64        # number of concurrent keep-alive connections
+num_points = 100        # number of points of the returned PolyLines
+window_ms = 0.0         # batch window of the services started by the load test
+
+
+# ----- Requests ----------------------------------------------------------------------------------------------------- #
+
+def generate_requests(count:int) -> list[dict]:
+    """
+    Returns random feasible spiral requests in a quarter circle (as in benchmark_suite.py). Infeasible geometries
+    are drawn again, so the load test measures solved spirals rather than rejected requests.
+    """
+    rng = np.random.default_rng(0)
+    requests = list()
+    while len(requests) < count:
+        widths = rng.uniform(0.5, 1.5, count)
+        heights = widths * rng.uniform(1.0, 4.0, count)
+        bc_degs = rng.uniform(110.0, 170.0, count)
+        a_xy = np.column_stack((widths, np.zeros(count)))
+        b_xy = np.column_stack((np.zeros(count), heights))
+        feasible, _ = LogarithmicSpiralBatch.classify_feasibility(a_xy, b_xy, 90.0, bc_degs)
+        requests += [{'a_xy': [float(width), 0.0], 'b_xy': [0.0, float(height)], 'ac_deg': 90.0,
+                      'bc_deg': float(bc_deg), 'num_points': num_points}
+                     for width, height, bc_deg in zip(widths[feasible], heights[feasible], bc_degs[feasible])]
+    return requests[:count]
+
+
+async def send_requests(host:str, port:int, requests:list[dict], latencies:list[float]) -> int:
+    """Sends requests one after the other over a single connection. Returns the number of failed requests"""
+    reader, writer = await asyncio.open_connection(host, port)
+    num_failed = 0
+    for request in requests:
+        body = json.dumps(request).encode()
+        start = time.perf_counter()
+        writer.write(f"POST /spiral HTTP/1.1\r\nHost: {host}\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        headers = dict()
+        while (line := await reader.readline()).strip():
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        await reader.readexactly(int(headers['content-length']))
+        latencies.append(time.perf_counter() - start)
+        num_failed += status != 200
+    writer.close()
+    return num_failed
+
+
+async def run_load_test(host:str, port:int, requests:list[dict], clients:int) -> dict:
+    """Spreads the requests over concurrent clients and returns the throughput and latency percentiles"""
+    latencies = list()
+    start = time.perf_counter()
+    failures = await asyncio.gather(*[send_requests(host, port, requests[index::clients], latencies)
+                                      for index in range(clients)])
+    wall_time = time.perf_counter() - start
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'failed': sum(failures),
+        'throughput': len(latencies) / wall_time,
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p95_ms': float(np.percentile(latencies_ms, 95)),
+        'p99_ms': float(np.percentile(latencies_ms, 99))}
+
+
+# ----- Baseline ----------------------------------------------------------------------------------------------------- #
+
+def run_in_process(requests:list[dict]) -> dict:
+    """Solves every request on its own with LogarithmicSpiral (in process, without any HTTP overhead)"""
+    latencies, num_failed = list(), 0
+    start = time.perf_counter()
+    for request in requests:
+        request_start = time.perf_counter()
+        try:
+            spiral = LogarithmicSpiral(tuple(request['a_xy']), tuple(request['b_xy']), request['ac_deg'],
+                                       request['bc_deg'], cache=None)
+            spiral.generate_spiral_coordinates(request['num_points'])
+        except (ValueError, RuntimeError):
+            num_failed += 1
+        latencies.append(time.perf_counter() - request_start)
+    wall_time = time.perf_counter() - start
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'requests': len(requests),
+        'failed': num_failed,
+        'throughput': len(requests) / wall_time,
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p95_ms': float(np.percentile(latencies_ms, 95)),
+        'p99_ms': float(np.percentile(latencies_ms, 99))}
+
+
+def start_service(window_s:float, batched=True) -> tuple[subprocess.Popen, int]:
+    """Starts the service on a free port in a separate process and returns the process and its port"""
+    command = [sys.executable, 'run_service.py', '--port', '0', '--window', str(window_s * 1000)]
+    process = subprocess.Popen(command + ([] if batched else ['--unbatched']), stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    match = re.search(r':(\d+) ', line)
+    if match is None:
+        process.kill()
+        raise RuntimeError(f"The service did not start: {line!r}")
+    return process, int(match.group(1))
+
+
+def run_service_load_test(requests:list[dict], clients:int, window_s:float, batched=True) -> dict:
+    """Starts a local service, runs a load test against it and stops it"""
+    process, port = start_service(window_s, batched)
+    try:
+        return asyncio.run(run_load_test('127.0.0.1', port, requests, clients))
+    finally:
+        process.terminate()
+        process.wait()
+
+
+# Run a load test against local services, e.g. `python benchmark_service.py --clients 64 --requests 5000`.
+# The same server answers the requests in micro-batches and one by one, so the difference is the gain of batching.
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load tests the spiral service with and without micro-batching')
+    parser.add_argument('--address', help='host:port of a running service to test instead of the local ones')
+    parser.add_argument('--requests', type=int, default=num_requests, help='number of requests sent in total')
+    parser.add_argument('--clients', type=int, default=num_clients, help='number of concurrent connections')
+    parser.add_argument('--window', type=float, default=window_ms, help='batch window in ms of the started service')
+    args = parser.parse_args()
+
+    set_quiet(True)
+    spiral_requests = generate_requests(args.requests)
+    results = {'in process, no HTTP': run_in_process(spiral_requests)}
+    if args.address:
+        service_host, _, service_port = args.address.rpartition(':')
+        results[f'service at {args.address}'] = asyncio.run(
+            run_load_test(service_host, int(service_port), spiral_requests, args.clients))
+    else:
+        results['service, unbatched'] = run_service_load_test(spiral_requests, args.clients, args.window / 1000,
+                                                              batched=False)
+        results['service, batched'] = run_service_load_test(spiral_requests, args.clients, args.window / 1000)
+
+    print(f"Spiral requests from {args.clients} concurrent clients")
+    print(f"{'case':<28} | {'requests':>8} | {'failed':>6} | {'req/s':>8} | {'p50 ms':>7} | {'p95 ms':>7} | "
+          f"{'p99 ms':>7}")
+    print("-" * 91)
+    for case, result in results.items():
+        print(f"{case:<28} | {result['requests']:>8} | {result['failed']:>6} | {result['throughput']:>8.0f} | "
+              f"{result['p50_ms']:>7.2f} | {result['p95_ms']:>7.2f} | {result['p99_ms']:>7.2f}")
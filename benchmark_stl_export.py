@@ -0,0 +1,48 @@
+# Compares the ASCII and binary STL export of a vane cascade
+import os
+import tempfile
+import time
+
+from class_logarithmic_vane import LogarithmicVane
+from func_logging import set_quiet
+
+# vane parameters (see generate_vane_cascade.py)
+horizontal_pitch = 25.0
+vertical_pitch = horizontal_pitch * 1.55
+chord = 200
+stretch = 3.26
+thickness = 2
+ac_deg = 90
+bc_deg = 122
+
+# benchmark parameters
+num_vanes_list = [2, 10, 50]   # cascade sizes to export
+repeats = 3                    # number of repeats per measurement (the fastest is reported)
+
+
+def time_cascade_export(vane:LogarithmicVane, num_vanes:int, stl_binary:bool) -> tuple[float, int]:
+    """Returns the fastest export time and the size of the written vane STL file"""
+    best = float('inf')
+    with tempfile.TemporaryDirectory() as file_directory:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            vane.generate_cascade(
+                inlet_angle_offset_deg=0, outlet_angle_offset_deg=-2,
+                upstream_channel_len=500, downstream_channel_len=1000,
+                num_vanes=num_vanes, file_directory=file_directory,
+                stl_height=100, stl_scale=1 / 1000, stl_binary=stl_binary)
+            best = min(best, time.perf_counter() - start)
+        file_size = os.path.getsize(f"{file_directory}/vanes.stl")
+    return best, file_size
+
+
+# silence the messages of the geometry pipeline so that only the results are printed
+set_quiet(True)
+base_vane = LogarithmicVane(horizontal_pitch, vertical_pitch, thickness, chord, stretch, ac_deg, bc_deg)
+
+print(f"{'vanes':>6} | {'ascii (s)':>10} | {'binary (s)':>10} | {'speed-up':>8} | {'ascii (kB)':>10} | {'binary (kB)':>11}")
+for num_vanes in num_vanes_list:
+    ascii_time, ascii_size = time_cascade_export(base_vane, num_vanes, stl_binary=False)
+    binary_time, binary_size = time_cascade_export(base_vane, num_vanes, stl_binary=True)
+    print(f"{num_vanes:>6} | {ascii_time:>10.4f} | {binary_time:>10.4f} | {ascii_time / binary_time:>8.1f} | "
+          f"{ascii_size / 1024:>10.1f} | {binary_size / 1024:>11.1f}")
@@ -0,0 +1,286 @@
+# Benchmarks the solver, vane construction, cascade generation and STL export, and compares them with a baseline
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+from matplotlib.figure import Figure
+
+from class_logarithmic_spiral import LogarithmicSpiral
+from class_logarithmic_spiral_batch import LogarithmicSpiralBatch
+from class_logarithmic_vane import LogarithmicVane
+from class_poly_line import PolyLine
+from func_logging import set_quiet
+
+# vane parameters (see generate_vane_cascade.py)
+horizontal_pitch = 25.0
+vertical_pitch = horizontal_pitch * 1.55
+chord = 200
+stretch = 3.26
+thickness = 2
+ac_deg = 90
+bc_deg = 122
+
+# benchmark parameters
+batch_sizes = [1000, 10000]             # number of spirals solved at once
+vane_num_points = [45, 90, 180, 360]    # number of points along the vane spirals
+cascade_num_vanes = [2, 10, 100]        # number of vanes in a cascade
+stl_num_points = [1000, 10000, 100000]  # number of points of the exported PolyLines
+repeats = 5                             # number of timed repeats per case (the fastest is reported)
+tolerance = 0.25                        # relative slow-down reported as a regression
+import_time_budget = 0.5                # maximum time in seconds for 'import func_core' in a fresh interpreter
+baseline_file = './benchmark_baseline.json'
+output_directory = './benchmark_results'
+
+
+# ----- Benchmark Cases ---------------------------------------------------------------------------------------------- #
+
+def setup_spiral_solve(solver:str):
+    """Returns a function solving a single spiral with the given solver"""
+    def run():
+        LogarithmicSpiral((1.0, 0.0), (0.0, 3.0), ac_deg, bc_deg, solver=solver, cache=None)
+    return run
+
+
+def setup_spiral_batch(num_spirals:int):
+    """Returns a function solving a batch of random spirals in a quarter circle"""
+    rng = np.random.default_rng(0)
+    widths = rng.uniform(0.5, 1.5, num_spirals)
+    a_xy = np.column_stack((widths, np.zeros(num_spirals)))
+    b_xy = np.column_stack((np.zeros(num_spirals), widths * rng.uniform(1.0, 4.0, num_spirals)))
+    bc_degs = rng.uniform(110.0, 170.0, num_spirals)
+    def run():
+        LogarithmicSpiralBatch(a_xy, b_xy, ac_deg, bc_degs)
+    return run
+
+
+def setup_vane_build(num_points:int):
+    """Returns a function constructing a single vane"""
+    def run():
+        LogarithmicVane(horizontal_pitch, vertical_pitch, thickness, chord, stretch, ac_deg, bc_deg,
+                        num_points=num_points)
+    return run
+
+
+def setup_cascade(num_vanes:int, file_directory:str):
+    """Returns a function generating a cascade and writing its ASCII STL files"""
+    vane = LogarithmicVane(horizontal_pitch, vertical_pitch, thickness, chord, stretch, ac_deg, bc_deg)
+    def run():
+        vane.generate_cascade(
+            inlet_angle_offset_deg=0, outlet_angle_offset_deg=-2,
+            upstream_channel_len=500, downstream_channel_len=1000,
+            num_vanes=num_vanes, file_directory=file_directory,
+            stl_height=100, stl_scale=1 / 1000)
+    return run
+
+
+def setup_stl_export(num_points:int, file_directory:str, binary:bool):
+    """Returns a function writing a closed PolyLine of `num_points` points to an STL file"""
+    t_values = np.linspace(0, 2 * np.pi, num_points)
+    poly_line = PolyLine(list(np.cos(t_values)), list(np.sin(t_values)), label='benchmark')
+    def run():
+        PolyLine.create_stl_file_from_xy_poly_line(poly_line, height=1, file_directory=file_directory,
+                                                   create_end_cap=True, binary=binary)
+    return run
+
+
+def define_cases(file_directory:str) -> list[tuple]:
+    """Returns the (case, parameter, setup function) of every benchmark"""
+    cases = [('spiral_solve', solver, lambda solver=solver: setup_spiral_solve(solver))
+             for solver in ['bisection', 'newton']]
+    cases += [('spiral_batch', num_spirals, lambda n=num_spirals: setup_spiral_batch(n))
+              for num_spirals in batch_sizes]
+    cases += [('vane_build', num_points, lambda n=num_points: setup_vane_build(n))
+              for num_points in vane_num_points]
+    cases += [('cascade', num_vanes, lambda n=num_vanes: setup_cascade(n, file_directory))
+              for num_vanes in cascade_num_vanes]
+    for binary in [False, True]:
+        case = 'stl_export_binary' if binary else 'stl_export_ascii'
+        cases += [(case, num_points, lambda n=num_points, b=binary: setup_stl_export(n, file_directory, b))
+                  for num_points in stl_num_points]
+    return cases
+
+
+# ----- Measurement -------------------------------------------------------------------------------------------------- #
+
+# Imports a module in a fresh interpreter and prints the import time, the traced peak memory (if enabled) and
+# which of the optional plotting and data libraries were loaded with it
+IMPORT_SCRIPT = '''
+import json, sys, time, tracemalloc
+if %r: tracemalloc.start()
+start = time.perf_counter()
+import %s
+elapsed = time.perf_counter() - start
+peak_memory = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0
+print(json.dumps({'time_s': elapsed, 'peak_memory_bytes': peak_memory,
+                  'loaded_modules': [name for name in ('matplotlib', 'pandas') if name in sys.modules]}))
+'''
+
+
+def measure_import_time(module_name:str, num_repeats:int) -> dict:
+    """Returns the fastest time and the peak traced memory of importing a module in a fresh interpreter"""
+    def run_import(trace:bool) -> dict:
+        completed = subprocess.run([sys.executable, '-c', IMPORT_SCRIPT % (trace, module_name)],
+                                   cwd=os.path.dirname(os.path.abspath(__file__)),
+                                   capture_output=True, text=True, check=True)
+        return json.loads(completed.stdout.splitlines()[-1])
+
+    times = [run_import(trace=False)['time_s'] for _ in range(num_repeats)]
+    traced = run_import(trace=True)
+    return {'time_s': min(times), 'median_time_s': float(np.median(times)),
+            'peak_memory_bytes': traced['peak_memory_bytes'], 'loaded_modules': traced['loaded_modules']}
+
+
+def measure(run, num_repeats:int) -> dict:
+    """Returns the fastest wall time of a function and its peak traced memory (measured in a separate call)"""
+    run()  # warm-up
+    times = list()
+    for _ in range(num_repeats):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    run()
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'time_s': min(times), 'median_time_s': float(np.median(times)), 'peak_memory_bytes': peak_memory}
+
+
+def run_benchmarks(num_repeats:int, selected:list[str] = None) -> list[dict]:
+    """Runs all benchmark cases (or those whose name is selected) and returns one result per case and parameter"""
+    results = list()
+    if not selected or 'import_func_core' in selected:
+        result = dict(case='import_func_core', parameter='cold', **measure_import_time('func_core', num_repeats))
+        print(f"{result['case']:>18} | {result['parameter']:>9} | {result['time_s']:>10.5f} s | "
+              f"{result['peak_memory_bytes'] / 1024:>10.1f} kB")
+        results.append(result)
+
+    with tempfile.TemporaryDirectory() as file_directory:
+        for case, parameter, setup in define_cases(file_directory):
+            if selected and case not in selected:
+                continue
+            result = dict(case=case, parameter=parameter, **measure(setup(), num_repeats))
+            print(f"{case:>18} | {str(parameter):>9} | {result['time_s']:>10.5f} s | "
+                  f"{result['peak_memory_bytes'] / 1024:>10.1f} kB")
+            results.append(result)
+    return results
+
+
+# ----- Reporting ---------------------------------------------------------------------------------------------------- #
+
+def describe_environment() -> dict:
+    """Returns the platform and library versions the benchmarks were run with"""
+    return {
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count()}
+
+
+def save_results(results:list[dict], file_name:str) -> None:
+    """Saves the benchmark results and the environment to a JSON file"""
+    with open(file_name, 'w', encoding='utf-8') as file:
+        json.dump({'environment': describe_environment(), 'results': results}, file, indent=2)
+
+
+def load_results(file_name:str) -> list[dict]:
+    """Loads benchmark results previously written by `save_results`"""
+    with open(file_name, encoding='utf-8') as file:
+        return json.load(file)['results']
+
+
+def compare_with_baseline(results:list[dict], baseline:list[dict], max_slow_down:float) -> list[dict]:
+    """Prints the time and memory ratios relative to the baseline and returns the cases that got slower"""
+    baseline_results = {(result['case'], str(result['parameter'])): result for result in baseline}
+    regressions = list()
+    print(f"\n{'case':>18} | {'parameter':>9} | {'time ratio':>10} | {'memory ratio':>12}")
+    for result in results:
+        reference = baseline_results.get((result['case'], str(result['parameter'])))
+        if reference is None:
+            continue
+        time_ratio = result['time_s'] / reference['time_s']
+        memory_ratio = result['peak_memory_bytes'] / max(reference['peak_memory_bytes'], 1)
+        regressed = time_ratio > 1 + max_slow_down
+        print(f"{result['case']:>18} | {str(result['parameter']):>9} | {time_ratio:>10.2f} | {memory_ratio:>12.2f}"
+              f"{'  REGRESSION' if regressed else ''}")
+        if regressed:
+            regressions.append(result)
+    return regressions
+
+
+def check_import_budget(results:list[dict], budget:float) -> bool:
+    """Prints whether importing func_core stays within the time budget and without plotting libraries"""
+    for result in results:
+        if result['case'] == 'import_func_core':
+            within_budget = result['time_s'] <= budget and not result['loaded_modules']
+            print(f"\nimport func_core took {result['time_s']:.3f} s (budget {budget:.3f} s)"
+                  f"{', loading ' + ', '.join(result['loaded_modules']) if result['loaded_modules'] else ''}"
+                  f"{'' if within_budget else '  OVER BUDGET'}")
+            return within_budget
+    return True
+
+
+def plot_scaling(results:list[dict], file_directory:str) -> None:
+    """Saves a log-log plot of time and peak memory against the parameter of every case with numeric parameters"""
+    cases = dict()
+    for result in results:
+        if isinstance(result['parameter'], (int, float)):
+            cases.setdefault(result['case'], []).append(result)
+
+    for case, case_results in cases.items():
+        if len(case_results) < 2:
+            continue
+        parameters = [result['parameter'] for result in case_results]
+        fig = Figure(figsize=(6, 4))
+        ax_time = fig.add_subplot()
+        ax_time.loglog(parameters, [result['time_s'] for result in case_results], 'o-', label='time')
+        ax_time.set_xlabel('parameter')
+        ax_time.set_ylabel('time (s)')
+        ax_memory = ax_time.twinx()
+        ax_memory.loglog(parameters, [result['peak_memory_bytes'] / 1024 for result in case_results],
+                         's--', color='tab:orange', label='peak memory')
+        ax_memory.set_ylabel('peak memory (kB)')
+        ax_time.set_title(case)
+        fig.legend(loc='upper left')
+        fig.savefig(f"{file_directory}/{case}.png", bbox_inches='tight', dpi=150)
+
+
+# ----- Execute the benchmarks --------------------------------------------------------------------------------------- #
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks the logarithmic spiral pipeline')
+    parser.add_argument('--cases', nargs='*', help='names of the cases to run (default: all)')
+    parser.add_argument('--repeats', type=int, default=repeats, help='number of timed repeats per case')
+    parser.add_argument('--output', default=output_directory, help='directory of the results and plots')
+    parser.add_argument('--baseline', default=baseline_file, help='results file to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='store the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=tolerance, help='relative slow-down to report')
+    parser.add_argument('--import-budget', type=float, default=import_time_budget,
+                        help='maximum time in seconds for importing func_core')
+    args = parser.parse_args()
+
+    # silence the messages of the geometry pipeline so that only the results are printed
+    set_quiet(True)
+    os.makedirs(args.output, exist_ok=True)
+    benchmark_results = run_benchmarks(args.repeats, args.cases)
+    save_results(benchmark_results, f"{args.output}/results.json")
+    plot_scaling(benchmark_results, args.output)
+
+    exit_code = 0 if check_import_budget(benchmark_results, args.import_budget) else 1
+    if args.save_baseline:
+        save_results(benchmark_results, args.baseline)
+        print(f"\nSaved the baseline to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        if compare_with_baseline(benchmark_results, load_results(args.baseline), args.tolerance):
+            exit_code = 1
+    sys.exit(exit_code)
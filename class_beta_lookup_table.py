@@ -0,0 +1,138 @@
+import numpy as np
+from numpy import cos, sin, radians, degrees
+
+from class_logarithmic_spiral_batch import LogarithmicSpiralBatch
+
+
+class BetaLookupTable:
+    """
+    Precomputed table of the incident angle 'β' for fast initial guesses of the logarithmic spiral solver.
+
+    The incident angle only depends on the turning angle 'theta = bc_rad - ac_rad' and on the angle
+    'chord = ab_rad - ac_rad' of vector AB relative to vector AC. The table stores 'β' on a uniform grid over these
+    two angles and interpolates it bilinearly. Grid cells without a valid spiral hold NaN, so any lookup that touches
+    such a cell (or lies outside the grid) returns NaN and has to be solved without the table.
+
+    The default grid covers both turning directions (theta and chord from -179 to 179 degrees), because clockwise
+    spirals (negative theta) are not mirror images of anticlockwise ones in terms of 'β': the solver picks the
+    origin on the other side of vector AC, so 'β' of a clockwise spiral has to be tabulated rather than mirrored.
+    Only chords between 0 and theta can be fitted, all other cells hold NaN.
+
+    Error bounds measured for the default grid (0.5 degree spacing) against 40000 random samples of fitted spirals:
+    the interpolated 'β' has a mean error of 6e-3 rad (anticlockwise) and 4e-3 rad (clockwise), and a 99th percentile
+    error of 0.19 and 0.08 rad respectively. For anticlockwise turning angles above 20 degrees the maximum error is
+    5e-2 rad. Larger errors (up to 1.9 rad) only occur with the chord near 'theta / 2': for small anticlockwise
+    turning angles the spiral approaches a circular arc and 'β' changes rapidly, and for clockwise spirals 'β' jumps
+    there. LogarithmicSpiral and LogarithmicSpiralBatch refine every interpolated value with safeguarded Newton steps,
+    so the final solutions still satisfy the usual solver accuracy. Use `estimate_error` to measure the bounds of a
+    specific table.
+    """
+
+
+    def __init__(self, theta_rad:np.ndarray, chord_rad:np.ndarray, beta:np.ndarray):
+        """Initialises a lookup table from uniform axes (in radians) and a matching 2D array of β values"""
+        self.theta_rad = np.asarray(theta_rad, dtype=float)
+        self.chord_rad = np.asarray(chord_rad, dtype=float)
+        self.beta = np.asarray(beta, dtype=float)
+        if self.beta.shape != (len(self.theta_rad), len(self.chord_rad)):
+            raise ValueError(f"beta must have the shape {(len(self.theta_rad), len(self.chord_rad))}, "
+                             f"got {self.beta.shape}")
+        if len(self.theta_rad) < 2 or len(self.chord_rad) < 2:
+            raise ValueError("Both axes of the lookup table require at least 2 values")
+        self.theta_step = self.theta_rad[1] - self.theta_rad[0]
+        self.chord_step = self.chord_rad[1] - self.chord_rad[0]
+
+
+    def __repr__(self):
+        return (f"BetaLookupTable("
+                f"theta_deg=({degrees(self.theta_rad[0]):.3g}, {degrees(self.theta_rad[-1]):.3g}), "
+                f"chord_deg=({degrees(self.chord_rad[0]):.3g}, {degrees(self.chord_rad[-1]):.3g}), "
+                f"shape={self.beta.shape})")
+
+
+    # ----- Instantiation Methods ----------------------------------------------------------------------------------- #
+
+    @staticmethod
+    def solve_beta(theta_rad, chord_rad, solver_accuracy=1e-12) -> np.ndarray:
+        """Solves β for arrays of normalised angles using a unit chord. Unsolvable geometries return NaN"""
+        theta_rad, chord_rad = np.broadcast_arrays(np.asarray(theta_rad, float), np.asarray(chord_rad, float))
+        b_xy = np.column_stack((cos(chord_rad.ravel()), sin(chord_rad.ravel())))
+        batch = LogarithmicSpiralBatch((0, 0), b_xy, 0.0, degrees(theta_rad.ravel()),
+                                       solver_accuracy=solver_accuracy, solver='newton')
+        beta = np.where(batch.converged, batch.beta, np.nan)
+        return beta.reshape(theta_rad.shape)
+
+
+    @classmethod
+    def build(
+            cls,
+            theta_deg_range=(-179.0, 179.0),
+            chord_deg_range=(-179.0, 179.0),
+            step_deg=0.5,
+            solver_accuracy=1e-12):
+        """Builds a lookup table by solving every grid point with the batch solver"""
+        num_theta = int(round((theta_deg_range[1] - theta_deg_range[0]) / step_deg)) + 1
+        num_chord = int(round((chord_deg_range[1] - chord_deg_range[0]) / step_deg)) + 1
+        theta_rad = radians(np.linspace(*theta_deg_range, num_theta))
+        chord_rad = radians(np.linspace(*chord_deg_range, num_chord))
+        theta_grid, chord_grid = np.meshgrid(theta_rad, chord_rad, indexing='ij')
+        return cls(theta_rad, chord_rad, cls.solve_beta(theta_grid, chord_grid, solver_accuracy))
+
+
+    # ----- File Handling ------------------------------------------------------------------------------------------- #
+
+    def save(self, file_name:str) -> None:
+        """Saves the table to a .npy file. Row 0 holds the chord axis, column 0 the theta axis"""
+        packed = np.full((len(self.theta_rad) + 1, len(self.chord_rad) + 1), np.nan)
+        packed[0, 1:] = self.chord_rad
+        packed[1:, 0] = self.theta_rad
+        packed[1:, 1:] = self.beta
+        np.save(file_name, packed)
+
+
+    @classmethod
+    def load(cls, file_name:str):
+        """Loads a table previously written by `save`"""
+        packed = np.load(file_name)
+        return cls(theta_rad=packed[1:, 0], chord_rad=packed[0, 1:], beta=packed[1:, 1:])
+
+
+    # ----- Interpolation ------------------------------------------------------------------------------------------- #
+
+    def lookup(self, theta_rad, chord_rad):
+        """Bilinearly interpolates β. Returns NaN outside the table or next to geometries without a solution"""
+        theta_rad, chord_rad = np.asarray(theta_rad, dtype=float), np.asarray(chord_rad, dtype=float)
+
+        # Fractional grid indices of the requested angles
+        i = (theta_rad - self.theta_rad[0]) / self.theta_step
+        j = (chord_rad - self.chord_rad[0]) / self.chord_step
+        inside = (i >= 0) & (i <= len(self.theta_rad) - 1) & (j >= 0) & (j <= len(self.chord_rad) - 1)
+
+        # Indices of the lower left corner of each cell and the position within the cell
+        i_0 = np.clip(np.floor(np.nan_to_num(i)).astype(int), 0, len(self.theta_rad) - 2)
+        j_0 = np.clip(np.floor(np.nan_to_num(j)).astype(int), 0, len(self.chord_rad) - 2)
+        f_i, f_j = i - i_0, j - j_0
+
+        # Weighted sum of the four cell corners (any NaN corner propagates into the result)
+        beta = ((1 - f_i) * (1 - f_j) * self.beta[i_0, j_0]
+                + f_i * (1 - f_j) * self.beta[i_0 + 1, j_0]
+                + (1 - f_i) * f_j * self.beta[i_0, j_0 + 1]
+                + f_i * f_j * self.beta[i_0 + 1, j_0 + 1])
+        return np.where(inside, beta, np.nan)
+
+
+    def estimate_error(self, num_samples=10000, seed=0) -> dict:
+        """
+        Compares interpolated and solved β at random points within the table to estimate its error bounds.
+        Only chords between 0 and theta can be fitted, so the chords are sampled there (for both turning directions).
+        """
+        rng = np.random.default_rng(seed)
+        theta_rad = rng.uniform(self.theta_rad[0], self.theta_rad[-1], num_samples)
+        chord_rad = np.clip(theta_rad * rng.uniform(0, 1, num_samples), self.chord_rad[0], self.chord_rad[-1])
+        error = np.abs(self.lookup(theta_rad, chord_rad) - self.solve_beta(theta_rad, chord_rad))
+        error = error[np.isfinite(error)]
+        return {
+            'samples': len(error),
+            'max_error_rad': float(error.max()) if len(error) else np.nan,
+            'mean_error_rad': float(error.mean()) if len(error) else np.nan,
+            'p99_error_rad': float(np.percentile(error, 99)) if len(error) else np.nan}
@@ -5,6 +5,7 @@ import numpy as np
 
 class Coordinate:
 
+    __slots__ = ('label', 'x', 'y', 'z')
 
     def __init__(self, x=None, y=None, z=None, label=None):
         self.label = label
@@ -30,18 +31,13 @@ class Coordinate:
         return self._format_parts()
 
 
-    def __sub__(self, other:Coordinate) -> list:
-        """Effectively returns the distance vector between two coordinates"""
-        components = list()
-        if self.x is not None and other.x is not None:
-            components.append(self.x - other.x)
-        if self.y is not None and other.y is not None:
-            components.append(self.y - other.y)
-        if self.z is not None and other.z is not None:
-            components.append(self.z - other.z)
+    def __sub__(self, other:Coordinate) -> np.ndarray:
+        """Returns the distance vector between two coordinates over the components defined by both"""
+        components = [own - subtracted for own, subtracted in ((self.x, other.x), (self.y, other.y), (self.z, other.z))
+                      if own is not None and subtracted is not None]
         if len(components) == 0:
             raise ValueError('These coordinates have no compatible components')
-        return components
+        return np.array(components, dtype=float)
 
 
     def offset_by_xyz(self, x:float=None, y:float=None, z:float=None):
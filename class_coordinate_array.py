@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import numpy as np
+
+from class_coordinate import Coordinate
+
+
+class CoordinateArray:
+    """
+    Collection of coordinates stored in a single contiguous (n x 3) float64 array, e.g. the same point of many vanes.
+    Missing components are stored as NaN and reported as None by `xx`, `yy` and `zz` (as in PolyLine).
+    """
+
+    __slots__ = ('xyz', 'axes', 'label')
+
+
+    def __init__(self, xx=None, yy=None, zz=None, label=None):
+        """Initialises a CoordinateArray from arrays (or scalars) of components, which are broadcast to one length"""
+        components = [None if values is None else np.atleast_1d(np.asarray(values, dtype=float))
+                      for values in (xx, yy, zz)]
+        defined = [values for values in components if values is not None]
+        length = np.broadcast_shapes(*[values.shape for values in defined])[0] if defined else 0
+        self.label = label
+        self.xyz = np.full((length, 3), np.nan)  # coordinates (n x 3)
+        self.axes = [values is not None for values in components]  # whether the x, y, and z components are defined
+        for axis, values in enumerate(components):
+            if values is not None:
+                self.xyz[:, axis] = values
+
+
+    def __len__(self):
+        """Returns the number of coordinates"""
+        return len(self.xyz)
+
+
+    def __repr__(self):
+        axes = ''.join(name for name, defined in zip('xyz', self.axes) if defined)
+        return f"CoordinateArray(label={self.label!r}, size={len(self)}, axes={axes!r})"
+
+
+    def __getitem__(self, key):
+        """Returns a Coordinate for an integer key, otherwise a CoordinateArray (e.g. for slices and masks)"""
+        xyz = self.xyz[key]
+        if xyz.ndim == 1:
+            x, y, z = [float(value) if defined else None for value, defined in zip(xyz, self.axes)]
+            return Coordinate(x=x, y=y, z=z, label=self.label)
+        return type(self).from_array(xyz, axes=self.axes, label=self.label)
+
+
+    def __sub__(self, other:CoordinateArray) -> np.ndarray:
+        """Returns the distance vectors between two collections (n x m) over the components defined by both"""
+        axes = [own and subtracted for own, subtracted in zip(self.axes, other.axes)]
+        if not any(axes):
+            raise ValueError('These coordinates have no compatible components')
+        return self.xyz[:, axes] - other.xyz[:, axes]
+
+
+    # ----- Component Access ---------------------------------------------------------------------------------------- #
+
+    xx = property(lambda self: self.xyz[:, 0] if self.axes[0] else None)
+    yy = property(lambda self: self.xyz[:, 1] if self.axes[1] else None)
+    zz = property(lambda self: self.xyz[:, 2] if self.axes[2] else None)
+
+
+    # ----- Instantiation Methods ----------------------------------------------------------------------------------- #
+
+    @classmethod
+    def from_array(cls, xyz:np.ndarray, axes=(True, True, False), label=None) -> CoordinateArray:
+        """Creates a CoordinateArray that uses an existing (n x 3) array without copying it"""
+        coordinates = cls(label=label)
+        coordinates.xyz = xyz
+        coordinates.axes = list(axes)
+        return coordinates
+
+
+    @classmethod
+    def from_coordinates(cls, coordinates:list[Coordinate], label=None) -> CoordinateArray:
+        """Creates a CoordinateArray from a list of Coordinates. Components missing from any coordinate are dropped"""
+        axes = [all(getattr(c, name) is not None for c in coordinates) for name in 'xyz']
+        xyz = np.array([[getattr(c, name) if defined else np.nan for name, defined in zip('xyz', axes)]
+                        for c in coordinates], dtype=float).reshape(-1, 3)
+        return cls.from_array(xyz, axes=axes, label=label)
+
+
+    def to_coordinates(self) -> list[Coordinate]:
+        """Returns the coordinates as a list of Coordinates"""
+        return [self[index] for index in range(len(self))]
+
+
+    def copy(self) -> CoordinateArray:
+        """Returns an independent copy of the collection"""
+        return type(self).from_array(self.xyz.copy(), axes=self.axes, label=self.label)
+
+
+    # ----- Transformations ----------------------------------------------------------------------------------------- #
+
+    def offset_by_xyz(self, x=None, y=None, z=None) -> CoordinateArray:
+        """Offsets the coordinates by scalars or arrays of components. Modifies in place and returns self"""
+        for axis, offset in enumerate((x, y, z)):
+            if self.axes[axis] and offset is not None:
+                self.xyz[:, axis] += offset
+        return self
+
+
+    def offset_by_dist_and_angle(self, distance, polar_angle) -> CoordinateArray:
+        """Offsets the coordinates in the xy plane by scalars or arrays of distances and angles (in place)"""
+        if not (self.axes[0] and self.axes[1]):
+            raise ValueError("Coordinates must have x and y")
+        self.xyz[:, 0] += distance * np.cos(polar_angle)
+        self.xyz[:, 1] += distance * np.sin(polar_angle)
+        return self
@@ -1,15 +1,24 @@
-import matplotlib.pyplot as plt                 # import graphing library
 import numpy as np                              # importing commonly used mathematical functions
 from numpy import pi, exp, sqrt, abs            # import various functions from numpy library
 from numpy import cos, sin, tan                 # import various trigonometric functions
 from numpy import degrees, radians              # import conversion functions
 from numpy import arctan, arctan2               # importing the inverse and the 4 quadrant inverse tangent
+from class_spiral_cache import SpiralCache      # import the cache for solved spirals
+from class_beta_lookup_table import BetaLookupTable  # import the precomputed table of incident angles
+from class_logarithmic_spiral_batch import LogarithmicSpiralBatch  # import the batch solver for the sensitivities
+from func_logging import get_logger             # import the logger factory of the package
+from func_profiling import profiled, add_count  # import the optional profiling instrumentation
+
+logger = get_logger(__name__)
 
 
 class LogarithmicSpiral:
     """Contains all relevant characteristics used to define and determine the shape of a logarithmic spiral."""
 
+    shared_cache:SpiralCache | None = None  # cache used by all spirals that are not given their own cache
+
 
+    @profiled
     def __init__(
             self,
             a_xy,
@@ -20,15 +29,31 @@ class LogarithmicSpiral:
             style='-',
             solver_accuracy=0.000000001,
             iter_limit=100,
+            solver='bisection',
+            cache:SpiralCache | None = None,
+            lookup_table:BetaLookupTable | None = None,
+            lookup_fallback=True,
+            seed_beta:float | None = None,
+            seed_width=0.01,
             verbose=False
     ):
 
         """Initialises an instance of LogarithmicSpiral"""
-        print(f"\nInitialising a logarithmic spiral called '{name}'")
+        logger.info("Initialising a logarithmic spiral called '%s'", name)
 
         # Solver settings
         self.solver_accuracy = solver_accuracy
         self.iter_limit = iter_limit
+        self.solver = solver            # root finding method ('bisection' or 'newton')
+        self.iterations = None          # number of iterations used by the solver
+        self.cache = cache if cache is not None else LogarithmicSpiral.shared_cache
+        self.cache_key = None           # quantised normalised angles of the spiral in the cache
+        self.cached = False             # whether the incident angle was taken from the cache without solving
+        self.lookup_table = lookup_table        # table of incident angles used as initial guess
+        self.lookup_fallback = lookup_fallback  # solve without the table outside of its domain
+        self.seed_beta = seed_beta      # incident angle 'β' of a similar spiral (e.g. the previous design of a sweep)
+        self.seed_width = seed_width    # half width of the bracket searched around the seed in radians
+        self.seeded = False             # whether the solver started from a seed bracket holding the solution
         self.verbose = verbose
 
         # Input characteristics and geometry
@@ -77,7 +102,9 @@ class LogarithmicSpiral:
         self.calculate_tangent_geometry()
         self.validate_tangent_geometry()
         self.calculate_triangle_geometry()
-        self.validate_triangle_geometry()
+        # A cached solution or a seed bracket holding the solution proves the geometry is valid
+        if not (self.lookup_cache() or self.bracket_seed()):
+            self.validate_triangle_geometry()
         self.calculate_origin_location()
 
 
@@ -95,13 +122,13 @@ class LogarithmicSpiral:
 
     def calculate_tangent_geometry(self):
         # Calculate connecting vector AB from start and end coordinates
-        print('Calculating tangent line geometry')
+        logger.debug('Calculating tangent line geometry')
 
         # Extract coordinates from spiral class
         ab_x = self.b_xy[0] - self.a_xy[0]  # x component of vector AB (connecting points A and B)
         ab_y = self.b_xy[1] - self.a_xy[1]  # y component of vector AB (connecting points A and B)
         self.ab_len = sqrt(ab_x ** 2 + ab_y ** 2)  # length of vector AB (between points A and B)
-        print(f"performing calculations for {self.name} (height = {ab_y} and width = {ab_x})")
+        logger.debug("performing calculations for %s (height = %s and width = %s)", self.name, ab_y, ab_x)
 
         # Calculate the 4-quadrant angle of vector AB in radians
         self.ab_rad = arctan2(ab_y, ab_x)
@@ -109,12 +136,12 @@ class LogarithmicSpiral:
 
         # Calculate and display angle AB in degrees
         ab_deg = degrees(self.ab_rad)  # 4 quadrant angle of vector AB in degrees
-        print(f"Angle AC = {self.ac_deg:.3g}, angle BC = {self.bc_deg:.3g}, and angle AB = {ab_deg:.3g}")
+        logger.debug("Angle AC = %.3g, angle BC = %.3g, and angle AB = %.3g", self.ac_deg, self.bc_deg, ab_deg)
 
 
     def validate_tangent_geometry(self):
         """Checks if spiral can be computed based on the input and putput angles"""
-        print('Validating tangent line geometry')
+        logger.debug('Validating tangent line geometry')
 
         if self.ac_rad == self.bc_rad:
             raise ValueError("Invalid geometry: angle at point 'A' is the same as angle at point 'B'")
@@ -127,12 +154,12 @@ class LogarithmicSpiral:
         elif self.ab_rad - self.ac_rad < 0 and self.ab_rad - self.bc_rad < 0:
             raise ValueError("Either angle 'A' is too large or angle 'B' is too small for the given points")
         else:
-            print("Basic geometric requirements have been met")
+            logger.debug("Basic geometric requirements have been met")
 
 
     def calculate_triangle_geometry(self):
         """Calculates the geometry of the triangle used to construct a logarithmic spiral"""
-        print('Calculating triangle geometry')
+        logger.debug('Calculating triangle geometry')
 
         # Calculate the angles of the triangle at points a, b, and c
         self.a_rad = abs(self.ab_rad - self.ac_rad)  # calculate absolute value of angle A
@@ -193,7 +220,7 @@ class LogarithmicSpiral:
 
     def validate_triangle_geometry(self):
         """Checks if spiral can be computed based on the minimum and maximum angles of incidence (β_max & β_min)"""
-        print('Validating geometry of construction triangels')
+        logger.debug('Validating geometry of construction triangels')
         # Calculate the segment lengths at the minimum and maximum angles of incidence (beta)
         bd_len_min, seg_min = self.calculate_bd_vector_and_segment_length(self.beta_max - 0.01)
         bd_len_max, seg_max = self.calculate_bd_vector_and_segment_length(self.beta_min + 0.01)
@@ -208,9 +235,99 @@ class LogarithmicSpiral:
             raise RuntimeError(f'{self.name} cannot be fitted to these points. The turning angle is too large')
 
 
+    def lookup_cache(self) -> bool:
+        """
+        Takes the incident angle 'β' of a similar spiral from the cache. Returns True if the cache holds the
+        quantised normalised angles of this spiral, in which case the spiral is not solved again.
+        """
+        if self.cache is None:
+            return False
+        self.cache_key = self.cache.make_key(self.theta, self.ab_rad - self.ac_rad)
+        cached_beta = self.cache.get(self.cache_key)
+        if cached_beta is None:
+            return False
+        self.beta = cached_beta
+        self.cached = True
+        return True
+
+
+    def bracket_seed(self) -> bool:
+        """
+        Starts the solver from the seed and narrows the bracket of 'β' to the seed plus or minus the seed width if the
+        residual changes sign across it. Returns True only if the seed bracket holds the solution, in which case the
+        seed is refined with Newton steps. Otherwise the selected solver starts from the seed in the full bracket.
+        Seeds outside the full bracket are ignored.
+        """
+        if self.seed_beta is None or not self.beta_min + 0.01 < self.seed_beta < self.beta_max - 0.01:
+            return False
+        self.beta = self.seed_beta
+
+        # Keep the seed bracket inside the range checked by validate_triangle_geometry
+        beta_low = max(self.seed_beta - self.seed_width, self.beta_min + 0.01)
+        beta_high = min(self.seed_beta + self.seed_width, self.beta_max - 0.01)
+        bd_len_low, segment_low = self.calculate_bd_vector_and_segment_length(beta_low)
+        bd_len_high, segment_high = self.calculate_bd_vector_and_segment_length(beta_high)
+        if not bd_len_low - segment_low < 0 < bd_len_high - segment_high:
+            logger.debug('Seed bracket of %s does not hold the solution. Using the seed as initial guess', self.name)
+            return False
+        self.beta_min, self.beta_max = beta_low, beta_high
+        self.seeded = True
+        return True
+
+
+    def calculate_residual_and_derivative(self, beta):
+        """Returns the residual 'bd_len - segment' and its analytic derivative with respect to beta"""
+        bd_len, segment = self.calculate_bd_vector_and_segment_length(beta)
+        slope = LogarithmicSpiralBatch.calculate_residual_slope(beta, segment, self.ac_rad, self.bc_rad, self.ab_rad,
+                                                                self.ab_len, self.growth, self.theta)
+        return bd_len - segment, slope
+
+
+    @profiled
     def calculate_origin_location(self):
+        """Finds the origin of the spiral using the selected root finding method"""
+        logger.debug('Calculating origin of logarithmic spiral')
+
+        # Reuse the incident angle of a similar spiral as is (its error is bounded by the resolution of the cache)
+        if self.cached:
+            self.calculate_bd_vector_and_segment_length(self.beta)
+            self.iterations = 0
+            logger.info("Reused cached solution without solving")
+            return
+
+        # Refine the seed with Newton steps inside its (narrowed) bracket
+        if self.seeded:
+            self.calculate_origin_location_by_newton()
+            logger.info("Refined the seed solution after %d iterations", self.iterations)
+        else:
+            self.calculate_origin_location_from_scratch()
+            logger.info("Achieved accurate solution after %d iterations", self.iterations)
+        if self.cache is not None:
+            self.cache.put(self.cache_key, self.beta)
+
+
+    def calculate_origin_location_from_scratch(self):
+        """Finds the origin with the lookup table (if it covers the spiral) or with the selected root finding method"""
+        # Interpolate the incident angle from the lookup table and refine it with Newton steps
+        table_beta = np.nan
+        if self.lookup_table is not None:
+            table_beta = float(self.lookup_table.lookup(self.theta, self.ab_rad - self.ac_rad))
+            if np.isnan(table_beta) and not self.lookup_fallback:
+                raise ValueError(f"{self.name} lies outside the domain of the lookup table")
+
+        if not np.isnan(table_beta):
+            self.beta = table_beta
+            self.calculate_origin_location_by_newton()
+        elif self.solver == 'bisection':
+            self.calculate_origin_location_by_bisection()
+        elif self.solver == 'newton':
+            self.calculate_origin_location_by_newton()
+        else:
+            raise ValueError(f"Invalid solver: {self.solver}")
+
+
+    def calculate_origin_location_by_bisection(self):
         """Binary-search-style algorithm for finding the origin of a spiral"""
-        print('Calculating origin of logarithmic spiral')
         count = 1
         while True:
             # Take a guess at a possible origin given the current angle beta
@@ -218,51 +335,193 @@ class LogarithmicSpiral:
 
             # Check the accuracy of the guess and repeat calculation if necessary and possible
             if self.verbose:
-                print(f"iteration = {count}, "
-                      f"alpha = {self.alpha}, "
-                      f"beta = {self.beta}, "
-                      f"segment = {segment}, "
-                      f"vectorBD = {bd_len}")
+                logger.info("iteration = %d, alpha = %s, beta = %s, segment = %s, vectorBD = %s",
+                            count, self.alpha, self.beta, segment, bd_len)
             if segment + self.solver_accuracy > bd_len > segment - self.solver_accuracy:
-                print(f"Achieved accurate solution after {count} iterations")
                 break
             elif count == self.iter_limit:
                 raise RuntimeError("Reached iteration limit. Geometry likely invalid")
             elif bd_len < segment:
                 self.beta_min = self.beta
                 self.beta = (self.beta_min + self.beta_max) / 2
-                if self.verbose: print(f"increasing beta to be between {self.beta_min} and {self.beta_max}")
+                if self.verbose: logger.info("increasing beta to be between %s and %s", self.beta_min, self.beta_max)
             elif bd_len > segment:
                 self.beta_max = self.beta
                 self.beta = (self.beta_min + self.beta_max) / 2
-                if self.verbose: print(f"decreasing beta to be between {self.beta_min} and {self.beta_max}")
+                if self.verbose: logger.info("decreasing beta to be between %s and %s", self.beta_min, self.beta_max)
+            else:
+                raise RuntimeError("Computation error on iterative solution")
+            count += 1
+        self.iterations = count
+        add_count('solver_iterations', count)
+
+
+    def calculate_origin_location_by_newton(self):
+        """
+        Safeguarded Newton iteration for finding the origin of a spiral. Bisection steps are taken whenever a Newton
+        step leaves the bracket or is not at most half as long as the step before it (as in rtsafe)
+        """
+        count = 1
+        previous_step = self.beta_max - self.beta_min
+        while True:
+            # Evaluate the residual and its slope at the current angle beta
+            residual, slope = self.calculate_residual_and_derivative(self.beta)
+            if self.verbose:
+                logger.info("iteration = %d, beta = %s, residual = %s, slope = %s",
+                            count, self.beta, residual, slope)
+            if abs(residual) < self.solver_accuracy:
+                break
+            elif count == self.iter_limit:
+                raise RuntimeError("Reached iteration limit. Geometry likely invalid")
+            elif residual < 0:  # bd_len < segment, so the root lies above beta
+                self.beta_min = self.beta
+            elif residual > 0:  # bd_len > segment, so the root lies below beta
+                self.beta_max = self.beta
             else:
                 raise RuntimeError("Computation error on iterative solution")
+
+            # Take the Newton step if it stays inside the bracket and converges quickly, otherwise halve the bracket
+            beta_newton = self.beta - residual / slope if slope != 0 else np.nan
+            if self.beta_min < beta_newton < self.beta_max and abs(beta_newton - self.beta) <= previous_step / 2:
+                previous_step = abs(beta_newton - self.beta)
+                self.beta = beta_newton
+            else:
+                previous_step = self.beta_max - self.beta_min
+                self.beta = (self.beta_min + self.beta_max) / 2
             count += 1
+        self.iterations = count
+        add_count('solver_iterations', count)
 
 
     def calculate_origin_offsets(self, inlet_width:float, outlet_width:float, thickness=0):
         """Calculates the offset of the spiral origin based on inlet and outlet dimensions"""
-        print('Calculating origin of logarithmic spiral')
+        logger.debug('Calculating origin of logarithmic spiral')
         bc_dev = self.bc_rad - pi  # Angular deviation between vector BC and the x-axis
         self.x_offset = self.origin_xy[0] + inlet_width + thickness
         self.y_offset = self.origin_xy[1] + (outlet_width + thickness / cos(bc_dev) + inlet_width * tan(bc_dev))
 
 
-    def generate_spiral_coordinates(self, num_points=400):
-        """Generates a set of X and Y coordinates from the equations of a given logarithmic spiral"""
-        print('Generating spiral coordinates')
-        t_values = np.linspace(self.t_a_rad, self.t_b_rad, num_points)  # evenly spaced values (beginning, end, steps)
+    def generate_spiral_coordinates(self, num_points=400, max_sagitta=None):
+        """
+        Generates a set of X and Y coordinates from the equations of a given logarithmic spiral.
+        If `max_sagitta` is given, the number of points and their spacing are chosen instead, so that no chord
+        deviates from the spiral by more than `max_sagitta`.
+        """
+        logger.debug('Generating spiral coordinates')
+        if max_sagitta is None:
+            t_values = np.linspace(self.t_a_rad, self.t_b_rad, num_points)  # evenly spaced values
+        else:
+            t_values = self.generate_sagitta_t_values(self.calculate_num_points_for_sagitta(max_sagitta))
+        return self.calculate_spiral_coordinates(t_values)
+
+
+    def calculate_spiral_coordinates(self, t_values):
+        """Returns the X and Y coordinates of the spiral at the polar angles `t_values`"""
         xx = self.scale_factor_a * exp(self.polar_slope_b * t_values) * cos(t_values) + self.origin_xy[0]
         yy = self.scale_factor_a * exp(self.polar_slope_b * t_values) * sin(t_values) + self.origin_xy[1]
         return xx, yy
 
 
+    # ----- Adaptive Sampling --------------------------------------------------------------------------------------- #
+
+    def calculate_radius_of_curvature(self, t_values):
+        """Returns the radius of curvature of the spiral at the polar angles `t_values`"""
+        return abs(self.scale_factor_a) * sqrt(1 + self.polar_slope_b ** 2) * exp(self.polar_slope_b * t_values)
+
+
+    def calculate_num_points_for_sagitta(self, max_sagitta:float) -> int:
+        """Returns the number of points needed to keep the chord-height error (sagitta) of every segment in limits"""
+        if max_sagitta <= 0:
+            raise ValueError(f"max_sagitta must be positive, got {max_sagitta}")
+
+        # The tangent of a logarithmic spiral turns by exactly dt, so a chord spanning dt has a sagitta of about
+        # rho * dt^2 / 8. The number of segments is the integral of 1 / dt = sqrt(rho / (8 * max_sagitta)) over t
+        b, t_span = self.polar_slope_b, self.t_b_rad - self.t_a_rad
+        rho_a = self.calculate_radius_of_curvature(self.t_a_rad)
+        if abs(b * t_span) < 1e-9:  # circular arc
+            integral = abs(t_span)
+        else:
+            integral = abs(2 / b * np.expm1(b * t_span / 2))
+        num_segments = int(np.ceil(sqrt(rho_a / (8 * max_sagitta)) * integral))
+        return max(num_segments, 1) + 1
+
+
+    def generate_sagitta_t_values(self, num_points:int):
+        """Returns polar angles from t_a to t_b spaced so that the segments have equal chord-height errors"""
+        # Equal steps in exp(b * t / 2) split the integral of sqrt(rho) dt (and thus the sagitta) evenly
+        b, t_span = self.polar_slope_b, self.t_b_rad - self.t_a_rad
+        if abs(b * t_span) < 1e-9:  # circular arc
+            return np.linspace(self.t_a_rad, self.t_b_rad, num_points)
+        fractions = np.linspace(0, 1, num_points)
+        return self.t_a_rad + 2 / b * np.log1p(fractions * np.expm1(b * t_span / 2))
+
+
+    # ----- Arc Length ---------------------------------------------------------------------------------------------- #
+
+    @property
+    def arc_length(self) -> float:
+        """Total arc length of the spiral between points A and B"""
+        return float(self.calculate_arc_length(self.t_b_rad))
+
+
+    def calculate_arc_length(self, t_values):
+        """Returns the arc length along the spiral from point A to the polar angles `t_values`"""
+        # ds = |a| * sqrt(1 + b^2) * exp(b * t) * dt integrates to the scale below times expm1(b * (t - t_a)) / b
+        b = self.polar_slope_b
+        t_delta = np.asarray(t_values, dtype=float) - self.t_a_rad
+        scale = abs(self.scale_factor_a) * sqrt(1 + b ** 2) * exp(b * self.t_a_rad)
+        if b == 0:  # circular arc
+            return scale * abs(t_delta)
+        return scale * abs(np.expm1(b * t_delta) / b)
+
+
+    def calculate_t_from_arc_length(self, arc_lengths):
+        """Returns the polar angles at the given arc lengths from point A (the inverse of `calculate_arc_length`)"""
+        b = self.polar_slope_b
+        direction = np.sign(self.t_b_rad - self.t_a_rad)  # polar angles increase or decrease from A to B
+        scale = abs(self.scale_factor_a) * sqrt(1 + b ** 2) * exp(b * self.t_a_rad)
+        arc_lengths = np.asarray(arc_lengths, dtype=float)
+        if b == 0:  # circular arc
+            return self.t_a_rad + direction * arc_lengths / scale
+        return self.t_a_rad + np.log1p(direction * b * arc_lengths / scale) / b
+
+
+    def generate_arc_length_t_values(self, num_points=400, spacing=None):
+        """
+        Returns the polar angles of `num_points` points at equal arc-length spacing from point A to point B.
+        If `spacing` is given, the fewest equally spaced points whose spacing does not exceed it are used instead.
+        """
+        arc_length = self.arc_length
+        if spacing is not None:
+            if spacing <= 0:
+                raise ValueError(f"spacing must be positive, got {spacing}")
+            num_points = int(np.ceil(arc_length / spacing)) + 1
+        t_values = self.calculate_t_from_arc_length(np.linspace(0, arc_length, num_points))
+        t_values[[0, -1]] = self.t_a_rad, self.t_b_rad  # end exactly at points A and B
+        return t_values
+
+
+    def generate_equally_spaced_coordinates(self, num_points=400, spacing=None):
+        """Generates X and Y coordinates at equal arc-length spacing along the spiral"""
+        return self.calculate_spiral_coordinates(self.generate_arc_length_t_values(num_points, spacing))
+
+
+    # ----- Sensitivities ------------------------------------------------------------------------------------------- #
+
+    def calculate_jacobian(self) -> dict[str, np.ndarray]:
+        """
+        Returns the analytic derivatives of the spiral parameters with respect to a_xy, b_xy, ac_deg and bc_deg
+        (see LogarithmicSpiralBatch.calculate_jacobian). The origin is (2 x 6), every other parameter has 6 columns.
+        """
+        batch = LogarithmicSpiralBatch(self.a_xy, self.b_xy, self.ac_deg, self.bc_deg, solve=False)
+        return {name: gradient[0] for name, gradient in batch.calculate_jacobian(beta=self.beta).items()}
+
+
     @staticmethod
-    def tabulate_spirals(spirals):
-        """Print the spiral characteristics to the console in table format"""
+    def tabulate_spirals(spirals) -> str:
+        """Logs the spiral characteristics in table format and returns the table"""
         if not spirals:
-            return
+            return ''
 
         def fmt(x):
             return f"{x:.3g}" if isinstance(x, (int, float)) else str(x)
@@ -284,19 +543,19 @@ class LogarithmicSpiral:
         col_widths = [21, 6] + [13] * (col_count - 2)
         row_format = " | ".join(f"{{:<{w}}}" if i < 2 else f"{{:>{w}}}" for i, w in enumerate(col_widths))
 
-        print()
-        print(row_format.format(*header))
-        print("-" * (sum(col_widths) + 3 * (col_count - 1)))
-
+        lines = [row_format.format(*header), "-" * (sum(col_widths) + 3 * (col_count - 1))]
         for label, symbol, getter in labels:
             row = [label, symbol] + [fmt(getter(s)) for s in spirals]
-            print(row_format.format(*row))
+            lines.append(row_format.format(*row))
+        table = "\n".join(lines)
+        logger.info("Spiral characteristics\n%s", table)
+        return table
 
 
     @staticmethod
     def save_spiral_equations(spirals, file_name):
         """Saves the various spiral equations to a csv file"""
-        print(f'Saving spiral euqations to {file_name.split("/")[-1]}')
+        logger.info('Saving spiral euqations to %s', file_name.split("/")[-1])
         with open(file_name, 'w', encoding='utf-8-sig') as file:
             file.write("name,x,y,lower_limit,upper_limit" + "\n")
             for s in spirals:
@@ -307,4 +566,4 @@ class LogarithmicSpiral:
                 name = f'{s.name},'
                 row = name + y + x + lim_l + lim_u + "\n"
                 file.write(row)
-        print(f"Successfully exported equations")
\ No newline at end of file
+        logger.info("Successfully exported equations")
\ No newline at end of file
@@ -0,0 +1,487 @@
+import numpy as np                              # importing commonly used mathematical functions
+from numpy import pi, exp, sqrt, abs            # import various functions from numpy library
+from numpy import cos, sin, tan                 # import various trigonometric functions
+from numpy import radians                       # import conversion functions
+from numpy import arctan, arctan2               # importing the inverse and the 4 quadrant inverse tangent
+
+
+class LogarithmicSpiralBatch:
+    """Solves many logarithmic spirals at once. Mirrors LogarithmicSpiral, but every attribute is a NumPy array."""
+
+    # Reason codes of the rows that cannot be solved (in the order the checks are made)
+    FEASIBLE = 0
+    NON_FINITE_INPUT = 1
+    SAME_ANGLES = 2
+    A_COINCIDENT = 3
+    B_COINCIDENT = 4
+    A_TOO_SMALL = 5
+    A_TOO_LARGE = 6
+    TURNING_TOO_SMALL = 7
+    TURNING_TOO_LARGE = 8
+    OUTSIDE_LOOKUP_TABLE = 9
+    REASONS = {
+        FEASIBLE: "Feasible",
+        NON_FINITE_INPUT: "Invalid input: points or angles are not finite",
+        SAME_ANGLES: "Invalid geometry: angle at point 'A' is the same as angle at point 'B'",
+        A_COINCIDENT: "Invalid geometry: angle at point 'A' is coincident with vector connecting the points",
+        B_COINCIDENT: "Invalid geometry: angle at point 'B' is coincident with vector connecting the points",
+        A_TOO_SMALL: "Either angle 'A' is too small or angle 'B' is too large for the given points",
+        A_TOO_LARGE: "Either angle 'A' is too large or angle 'B' is too small for the given points",
+        TURNING_TOO_SMALL: "Spiral cannot be fitted to these points. The turning angle is too small",
+        TURNING_TOO_LARGE: "Spiral cannot be fitted to these points. The turning angle is too large",
+        OUTSIDE_LOOKUP_TABLE: "Spiral lies outside the domain of the lookup table"}
+    RUNTIME_ERRORS = (TURNING_TOO_SMALL, TURNING_TOO_LARGE)  # reasons raised as RuntimeError by LogarithmicSpiral
+
+    # Inputs differentiated by calculate_jacobian (in the order of its columns)
+    JACOBIAN_INPUTS = ('a_x', 'a_y', 'b_x', 'b_y', 'ac_deg', 'bc_deg')
+
+
+    def __init__(
+            self,
+            a_xy,
+            b_xy,
+            ac_deg,
+            bc_deg,
+            solver_accuracy=0.000000001,
+            iter_limit=100,
+            solver='bisection',
+            lookup_table=None,
+            lookup_fallback=True,
+            seed_beta=None,
+            seed_width=0.01,
+            solve=True
+    ):
+
+        """
+        Initialises an instance of LogarithmicSpiralBatch from arrays of points and angles.
+        If `solve` is False, only the feasibility of every row is checked (see `valid` and `reason`).
+        """
+
+        # Solver settings
+        self.solver_accuracy = solver_accuracy
+        self.iter_limit = iter_limit
+        self.solver = solver            # root finding method ('bisection' or 'newton')
+        self.lookup_table = lookup_table        # BetaLookupTable used as initial guess (implies Newton's method)
+        self.lookup_fallback = lookup_fallback  # solve rows outside of the table domain without the table
+        self.seed_beta = seed_beta      # incident angles 'β' of similar spirals (NaN rows are not seeded)
+        self.seed_width = seed_width    # half width of the brackets searched around the seeds
+
+        # Input characteristics and geometry (one row per spiral)
+        self.a_xy = np.atleast_2d(np.asarray(a_xy, dtype=float))        # X and Y coordinates at point A (n x 2)
+        self.b_xy = np.atleast_2d(np.asarray(b_xy, dtype=float))        # X and Y coordinates at point B (n x 2)
+        num_rows = np.broadcast_shapes((len(self.a_xy),), (len(self.b_xy),), np.shape(ac_deg), np.shape(bc_deg))[0]
+        self.a_xy = np.broadcast_to(self.a_xy, (num_rows, 2))
+        self.b_xy = np.broadcast_to(self.b_xy, (num_rows, 2))
+        self.ac_deg = np.broadcast_to(np.asarray(ac_deg, dtype=float), (num_rows,))  # angle of vector AC in degrees
+        self.bc_deg = np.broadcast_to(np.asarray(bc_deg, dtype=float), (num_rows,))  # angle of vector BC in degrees
+        self.ac_rad = radians(self.ac_deg)                              # angle of vector AC in radians
+        self.bc_rad = radians(self.bc_deg)                              # angle of vector BC in radians
+
+        # Geometric characteristics of the logarithmic spirals
+        self.origin_xy = np.full((num_rows, 2), np.nan)  # X and Y coordinates of the origins (n x 2)
+        self.growth = None          # Growth factor of spirals
+
+        # Tangent geometry
+        self.ab_len = None          # Length from point A to point B
+        self.ab_rad = None          # 4-quadrant angle of vector AB in radians
+
+        # Triangle geometry
+        self.a_rad = None           # Angle at point A in radians
+        self.b_rad = None           # Angle at point B in radians
+        self.c_rad = None           # Angle at point C in radians
+        self.c_xy = None            # X and Y Coordinates of point C (n x 2)
+        self.theta = None           # angle change between coordinates in radians
+        self.beta_min = None        # minimum incident angle 'β'
+        self.beta_max = None        # maximum incident angle 'β'
+        self.beta = None            # actual incident angle 'β'
+
+        # Origin geometry
+        self.alpha = np.full(num_rows, np.nan)           # polar tangential angle
+        self.scale_factor_a = np.full(num_rows, np.nan)  # spiral scaling factor 'a'
+        self.polar_slope_b = np.full(num_rows, np.nan)   # polar slope 'b'
+        self.t_a_rad = np.full(num_rows, np.nan)         # polar angle t_a
+        self.t_b_rad = np.full(num_rows, np.nan)         # polar angle t_b
+
+        # Solver state
+        self.valid = np.ones(num_rows, dtype=bool)          # rows that passed the geometry validation
+        self.reason = np.zeros(num_rows, dtype=np.int8)     # reason code of every row that did not (see REASONS)
+        self.converged = np.zeros(num_rows, dtype=bool)     # rows for which the solver reached the accuracy
+        self.seeded = np.zeros(num_rows, dtype=bool)        # rows started from a seed bracket holding the solution
+        self.iterations = np.zeros(num_rows, dtype=int)     # number of solver iterations used per row
+
+        # Execute the various base calculations
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            self.calculate_tangent_geometry()
+            self.validate_tangent_geometry()
+            self.calculate_triangle_geometry()
+            self.validate_triangle_geometry()
+            if solve:
+                self.calculate_origin_location()
+
+
+    def __len__(self):
+        """Returns the number of spirals in the batch"""
+        return len(self.a_xy)
+
+
+    def __repr__(self):
+        return f"LogarithmicSpiralBatch(size={len(self)}, converged={int(self.converged.sum())})"
+
+
+    @classmethod
+    def classify_feasibility(cls, a_xy, b_xy, ac_deg, bc_deg) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Checks which spirals can be solved without solving any of them and without raising.
+        Returns a boolean mask of the feasible rows and the reason code of every row (see REASONS).
+        """
+        batch = cls(a_xy, b_xy, ac_deg, bc_deg, solve=False)
+        return batch.valid, batch.reason
+
+
+    @classmethod
+    def create_error(cls, reason:int, name='spiral') -> Exception:
+        """Returns the exception LogarithmicSpiral raises for a reason code (messages name the spiral)"""
+        message = cls.REASONS[reason].replace('Spiral', name, 1)
+        return RuntimeError(message) if reason in cls.RUNTIME_ERRORS else ValueError(message)
+
+
+    def flag_rows(self, rows, reason:int) -> None:
+        """Marks rows as invalid. Rows keep the reason code of the first check they failed"""
+        self.reason[rows & self.valid] = reason
+        self.valid &= ~rows
+
+
+    def calculate_tangent_geometry(self):
+        """Calculates the connecting vectors AB from the start and end coordinates"""
+        ab_x = self.b_xy[:, 0] - self.a_xy[:, 0]   # x components of vectors AB
+        ab_y = self.b_xy[:, 1] - self.a_xy[:, 1]   # y components of vectors AB
+        self.ab_len = sqrt(ab_x ** 2 + ab_y ** 2)   # lengths of vectors AB
+        self.ab_rad = arctan2(ab_y, ab_x)           # 4-quadrant angles of vectors AB in radians
+
+
+    def validate_tangent_geometry(self):
+        """Flags rows whose input and output angles cannot produce a spiral (see LogarithmicSpiral)"""
+        inputs = (self.a_xy[:, 0], self.a_xy[:, 1], self.b_xy[:, 0], self.b_xy[:, 1], self.ac_rad, self.bc_rad)
+        self.flag_rows(~np.logical_and.reduce([np.isfinite(values) for values in inputs]), self.NON_FINITE_INPUT)
+        self.flag_rows(self.ac_rad == self.bc_rad, self.SAME_ANGLES)
+        self.flag_rows(self.ac_rad == self.ab_rad, self.A_COINCIDENT)
+        self.flag_rows(self.bc_rad == self.ab_rad, self.B_COINCIDENT)
+        self.flag_rows((self.ab_rad - self.ac_rad > 0) & (self.ab_rad - self.bc_rad > 0), self.A_TOO_SMALL)
+        self.flag_rows((self.ab_rad - self.ac_rad < 0) & (self.ab_rad - self.bc_rad < 0), self.A_TOO_LARGE)
+
+
+    def calculate_triangle_geometry(self):
+        """Calculates the geometry of the triangles used to construct the logarithmic spirals"""
+
+        # Calculate the angles of the triangles at points a, b, and c
+        self.a_rad = abs(self.ab_rad - self.ac_rad)
+        self.b_rad = abs(self.ab_rad - self.bc_rad)
+        self.c_rad = pi - abs(self.bc_rad - self.ac_rad)
+
+        # Calculate the length of vectors AC and BC to determine the direction of the spirals
+        ac_len = self.ab_len * sin(self.b_rad) / sin(self.c_rad)
+        bc_len = self.ab_len * sin(self.a_rad) / sin(self.c_rad)
+        self.growth = np.where(ac_len < bc_len, 1, -1)
+
+        # Calculate the X and Y coordinates of points C
+        c_x = self.a_xy[:, 0] + cos(self.ac_rad) * ac_len
+        c_y = self.a_xy[:, 1] + sin(self.ac_rad) * ac_len
+        self.c_xy = np.column_stack((c_x, c_y))
+
+        # Calculate the minimum and maximum incident angles 'β'
+        self.theta = self.bc_rad - self.ac_rad
+        self.beta_min = self.ab_rad - self.ac_rad
+        self.beta_max = self.ab_rad + pi - self.bc_rad
+        self.beta = (self.beta_min + self.beta_max) / 2
+
+
+    def calculate_bd_vector_and_segment_length(self, beta, rows=slice(None)):
+        """Evaluates the guessed origins of the selected rows and returns their BD and segment lengths"""
+        ac_rad, bc_rad, ab_rad, ab_len = self.ac_rad[rows], self.bc_rad[rows], self.ab_rad[rows], self.ab_len[rows]
+
+        # Calculate the length of the vectors connecting points A and B to the guessed origins D
+        ad_rad = ac_rad + beta
+        bd_rad = bc_rad + beta
+        abs_aa_rad = abs(ad_rad - ab_rad)
+        abs_bb_rad = abs(ab_rad + pi - bd_rad)
+        abs_d_rad = pi - abs_aa_rad - abs_bb_rad
+        ad_len = ab_len * sin(abs_bb_rad) / sin(abs_d_rad)
+        bd_len = ab_len * sin(abs_aa_rad) / sin(abs_d_rad)
+
+        # Given the length of vectors AD and BD, calculate the position of the guessed origins D
+        a_x, a_y = self.a_xy[rows, 0], self.a_xy[rows, 1]
+        d_x = a_x + cos(ad_rad) * ad_len
+        d_y = a_y + sin(ad_rad) * ad_len
+
+        # Calculate the polar slopes and the polar angles to points A and B
+        alpha = beta - pi / 2
+        polar_slope_b = self.growth[rows] * abs(tan(alpha))
+        t_a_rad = arctan((a_y - d_y) / (a_x - d_x))
+        t_b_rad = t_a_rad + self.theta[rows]
+        scale_factor_a = (a_x - d_x) / (exp(polar_slope_b * t_a_rad) * cos(t_a_rad))
+
+        # Store the origin geometry of the evaluated rows
+        self.origin_xy[rows, 0], self.origin_xy[rows, 1] = d_x, d_y
+        self.alpha[rows], self.polar_slope_b[rows], self.scale_factor_a[rows] = alpha, polar_slope_b, scale_factor_a
+        self.t_a_rad[rows], self.t_b_rad[rows] = t_a_rad, t_b_rad
+
+        # Calculate the X and y components of the spiral segments
+        segment_x = scale_factor_a * exp(polar_slope_b * t_b_rad) * cos(t_b_rad)
+        segment_y = scale_factor_a * exp(polar_slope_b * t_b_rad) * sin(t_b_rad)
+        segment = sqrt(segment_x ** 2 + segment_y ** 2)
+        return bd_len, segment
+
+
+    def validate_triangle_geometry(self):
+        """Flags rows for which no solution exists between the minimum and maximum angles of incidence"""
+        bd_len_min, seg_min = self.calculate_bd_vector_and_segment_length(self.beta_max - 0.01)
+        bd_len_max, seg_max = self.calculate_bd_vector_and_segment_length(self.beta_min + 0.01)
+        self.flag_rows(bd_len_min < seg_min, self.TURNING_TOO_SMALL)
+        self.flag_rows(bd_len_max > seg_max, self.TURNING_TOO_LARGE)
+
+
+    def bracket_seeds(self):
+        """
+        Starts the rows from their seeds (see LogarithmicSpiral.bracket_seed) and narrows the brackets of the rows
+        whose residual changes sign across their seed plus or minus the seed width (only these rows are `seeded`)
+        """
+        seed_beta = np.broadcast_to(np.asarray(self.seed_beta, dtype=float), self.beta.shape)
+        in_range = self.valid & (self.beta_min + 0.01 < seed_beta) & (seed_beta < self.beta_max - 0.01)
+        beta_low = np.maximum(seed_beta - self.seed_width, self.beta_min + 0.01)
+        beta_high = np.minimum(seed_beta + self.seed_width, self.beta_max - 0.01)
+        bd_len_low, segment_low = self.calculate_bd_vector_and_segment_length(beta_low)
+        bd_len_high, segment_high = self.calculate_bd_vector_and_segment_length(beta_high)
+        self.seeded = in_range & (bd_len_low - segment_low < 0) & (bd_len_high - segment_high > 0)
+        self.beta_min = np.where(self.seeded, beta_low, self.beta_min)
+        self.beta_max = np.where(self.seeded, beta_high, self.beta_max)
+        self.beta = np.where(in_range, seed_beta, self.beta)
+
+
+    @staticmethod
+    def calculate_residual_slope(beta, segment, ac_rad, bc_rad, ab_rad, ab_len, growth, theta):
+        """
+        Returns the analytic derivative of the residual 'bd_len - segment' with respect to beta.
+        Shared by LogarithmicSpiral (scalars) and LogarithmicSpiralBatch (arrays).
+        """
+        # Signed angles AA and BB of the origin triangles ABD, and the rate of change of angle D
+        aa_rad = ac_rad + beta - ab_rad
+        bb_rad = ab_rad + pi - bc_rad - beta
+        abs_aa_rad, abs_bb_rad = abs(aa_rad), abs(bb_rad)
+        abs_d_rad = pi - abs_aa_rad - abs_bb_rad
+        d_abs_d_rad = np.sign(bb_rad) - np.sign(aa_rad)
+
+        # Derivatives of the sine rule lengths of vectors AD and BD
+        sin_d_sq = sin(abs_d_rad) ** 2
+        ad_len = ab_len * sin(abs_bb_rad) / sin(abs_d_rad)
+        d_ad_len = ab_len * (-np.sign(bb_rad) * cos(abs_bb_rad) * sin(abs_d_rad)
+                             - sin(abs_bb_rad) * cos(abs_d_rad) * d_abs_d_rad) / sin_d_sq
+        d_bd_len = ab_len * (np.sign(aa_rad) * cos(abs_aa_rad) * sin(abs_d_rad)
+                             - sin(abs_aa_rad) * cos(abs_d_rad) * d_abs_d_rad) / sin_d_sq
+
+        # The segments equal |AD| * exp(b * theta) with b = growth * |tan(alpha)| and alpha = beta - pi / 2
+        tan_alpha = tan(beta - pi / 2)
+        d_polar_slope_b = growth * np.sign(tan_alpha) * (1 + tan_alpha ** 2)
+        d_segment = segment * (np.sign(ad_len) * d_ad_len / abs(ad_len) + d_polar_slope_b * theta)
+        return d_bd_len - d_segment
+
+
+    def calculate_residual_and_derivative(self, beta, rows=slice(None)):
+        """Returns the residuals 'bd_len - segment' of the selected rows and their analytic derivatives"""
+        bd_len, segment = self.calculate_bd_vector_and_segment_length(beta, rows)
+        slope = self.calculate_residual_slope(beta, segment, self.ac_rad[rows], self.bc_rad[rows], self.ab_rad[rows],
+                                              self.ab_len[rows], self.growth[rows], self.theta[rows])
+        return bd_len - segment, slope
+
+
+    def calculate_origin_location(self):
+        """Runs the selected root finding method of LogarithmicSpiral on all valid rows simultaneously"""
+        if self.solver not in ('bisection', 'newton'):
+            raise ValueError(f"Invalid solver: {self.solver}")
+
+        # Rows starting from a seed bracket holding the solution or from the lookup table use Newton's method,
+        # all other rows the selected solver (as in LogarithmicSpiral)
+        newton = np.full(len(self), self.solver == 'newton')
+        if self.seed_beta is not None:
+            self.bracket_seeds()
+            newton |= self.seeded
+        if self.lookup_table is not None:
+            table_beta = self.lookup_table.lookup(self.theta, self.ab_rad - self.ac_rad)
+            in_table = ~np.isnan(table_beta) & ~self.seeded
+            self.beta = np.where(in_table, table_beta, self.beta)
+            if not self.lookup_fallback:
+                self.flag_rows(~in_table & ~self.seeded, self.OUTSIDE_LOOKUP_TABLE)
+            newton |= in_table
+
+        # Only the rows that are still being solved are evaluated in each iteration
+        active = np.flatnonzero(self.valid)
+        previous_step = self.beta_max - self.beta_min  # length of the last step of every row (see LogarithmicSpiral)
+        for count in range(1, self.iter_limit + 1):
+            if len(active) == 0:
+                break
+
+            # Evaluate the residuals (and their slopes for Newton's method) at the current angles beta
+            beta = self.beta[active]
+            use_newton = newton[active]
+            if use_newton.any():
+                residual, slope = self.calculate_residual_and_derivative(beta, active)
+            else:
+                bd_len, segment = self.calculate_bd_vector_and_segment_length(beta, active)
+                residual = bd_len - segment
+
+            # Freeze the rows that have reached the desired accuracy
+            accurate = abs(residual) < self.solver_accuracy
+            self.iterations[active] = count
+            self.converged[active[accurate]] = True
+
+            # Shrink the brackets of the remaining rows (rows producing NaNs drop out of the search)
+            increase = ~accurate & (residual < 0)
+            decrease = ~accurate & (residual > 0)
+            beta_min = np.where(increase, beta, self.beta_min[active])
+            beta_max = np.where(decrease, beta, self.beta_max[active])
+            beta_next = (beta_min + beta_max) / 2
+
+            # Take the Newton steps that stay inside their brackets and converge quickly, otherwise halve the brackets
+            if use_newton.any():
+                beta_newton = beta - residual / slope
+                newton_step = abs(beta_newton - beta)
+                inside = use_newton & (beta_min < beta_newton) & (beta_newton < beta_max) & \
+                    (newton_step <= previous_step[active] / 2)
+                beta_next = np.where(inside, beta_newton, beta_next)
+                previous_step[active] = np.where(inside, newton_step, beta_max - beta_min)
+            self.beta_min[active], self.beta_max[active] = beta_min, beta_max
+            self.beta[active] = np.where(increase | decrease, beta_next, beta)
+            active = active[increase | decrease]
+
+        # Re-evaluate the final angles so that all outputs belong to the same beta and blank unsolved rows
+        self.calculate_bd_vector_and_segment_length(self.beta)
+        for attribute in ('alpha', 'polar_slope_b', 't_a_rad', 't_b_rad', 'scale_factor_a'):
+            setattr(self, attribute, np.where(self.converged, getattr(self, attribute), np.nan))
+        self.origin_xy = np.where(self.converged[:, np.newaxis], self.origin_xy, np.nan)
+
+
+    def generate_spiral_coordinates(self, num_points=400, rows=slice(None)):
+        """Generates X and Y coordinates for the selected spirals. Returns two arrays of shape (n, num_points)"""
+        steps = np.linspace(0, 1, num_points)
+        t_a_rad, t_b_rad = self.t_a_rad[rows], self.t_b_rad[rows]
+        t_values = t_a_rad[:, np.newaxis] + (t_b_rad - t_a_rad)[:, np.newaxis] * steps
+        return self.calculate_spiral_coordinates(t_values, rows)
+
+
+    def calculate_spiral_coordinates(self, t_values, rows=slice(None)):
+        """Returns the X and Y coordinates of the selected spirals at their polar angles in `t_values` (n x m)"""
+        radii = self.scale_factor_a[rows, np.newaxis] * exp(self.polar_slope_b[rows, np.newaxis] * t_values)
+        xx = radii * cos(t_values) + self.origin_xy[rows, 0:1]
+        yy = radii * sin(t_values) + self.origin_xy[rows, 1:2]
+        return xx, yy
+
+
+    # ----- Arc Length ---------------------------------------------------------------------------------------------- #
+
+    @property
+    def arc_length(self) -> np.ndarray:
+        """Total arc length of every spiral between points A and B (NaN for unsolved rows)"""
+        b, t_delta = self.polar_slope_b, self.t_b_rad - self.t_a_rad
+        scale = abs(self.scale_factor_a) * sqrt(1 + b ** 2) * exp(b * self.t_a_rad)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return scale * np.where(b == 0, abs(t_delta), abs(np.expm1(b * t_delta) / b))
+
+
+    def generate_equally_spaced_coordinates(self, num_points=400):
+        """Generates X and Y coordinates at equal arc-length spacing. Returns two arrays of shape (n, num_points)"""
+        # Invert the arc length from point A analytically (see LogarithmicSpiral.calculate_t_from_arc_length)
+        b, t_delta = self.polar_slope_b[:, np.newaxis], (self.t_b_rad - self.t_a_rad)[:, np.newaxis]
+        steps = np.linspace(0, 1, num_points)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t_offsets = np.where(b == 0, t_delta * steps, np.log1p(steps * np.expm1(b * t_delta)) / b)
+        t_offsets[:, -1] = t_delta[:, 0]  # end exactly at point B
+        return self.calculate_spiral_coordinates(self.t_a_rad[:, np.newaxis] + t_offsets)
+
+
+    # ----- Sensitivities ------------------------------------------------------------------------------------------- #
+
+    def calculate_jacobian(self, beta=None) -> dict[str, np.ndarray]:
+        """
+        Returns the analytic derivatives of the solved spiral parameters with respect to the inputs (the columns are
+        JACOBIAN_INPUTS, i.e. per degree for the angles). The origin is (n x 2 x 6), every other parameter (n x 6).
+        The incident angle follows from the implicit function theorem on the residual 'bd_len - segment', so no
+        spiral is solved again. Unsolved rows are NaN. `beta` overrides the solved incident angles.
+        """
+        beta = np.where(self.converged, self.beta, np.nan) if beta is None else np.asarray(beta, dtype=float)
+        beta = np.broadcast_to(beta, (len(self),))
+        num_rows = len(self)
+
+        # Gradients of the independent variables (a_x, a_y, b_x, b_y, ac_deg, bc_deg, beta), one column each
+        def unit(column, scale=1.0):
+            gradient = np.zeros((num_rows, 7))
+            gradient[:, column] = scale
+            return gradient
+        a_x, a_y = self.a_xy[:, 0], self.a_xy[:, 1]
+        d_a_x, d_a_y, d_b_x, d_b_y = unit(0), unit(1), unit(2), unit(3)
+        d_ac_rad, d_bc_rad, d_beta = unit(4, pi / 180), unit(5, pi / 180), unit(6)
+        col = np.newaxis
+
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            # Tangent geometry (see calculate_tangent_geometry)
+            ab_x, ab_y = self.b_xy[:, 0] - a_x, self.b_xy[:, 1] - a_y
+            d_ab_x, d_ab_y = d_b_x - d_a_x, d_b_y - d_a_y
+            ab_len, ab_rad = self.ab_len, self.ab_rad
+            d_ab_len = (ab_x[:, col] * d_ab_x + ab_y[:, col] * d_ab_y) / ab_len[:, col]
+            d_ab_rad = (ab_x[:, col] * d_ab_y - ab_y[:, col] * d_ab_x) / ab_len[:, col] ** 2
+
+            # Origin triangles ABD (see calculate_bd_vector_and_segment_length)
+            ad_rad = self.ac_rad + beta
+            d_ad_rad = d_ac_rad + d_beta
+            aa_rad = ad_rad - ab_rad
+            bb_rad = ab_rad + pi - self.bc_rad - beta
+            abs_aa_rad, abs_bb_rad = abs(aa_rad), abs(bb_rad)
+            d_abs_aa_rad = np.sign(aa_rad)[:, col] * (d_ad_rad - d_ab_rad)
+            d_abs_bb_rad = np.sign(bb_rad)[:, col] * (d_ab_rad - d_bc_rad - d_beta)
+            abs_d_rad = pi - abs_aa_rad - abs_bb_rad
+            d_abs_d_rad = -d_abs_aa_rad - d_abs_bb_rad
+            sin_d, cot_d = sin(abs_d_rad)[:, col], (cos(abs_d_rad) / sin(abs_d_rad))[:, col]
+            ad_len = ab_len * sin(abs_bb_rad) / sin(abs_d_rad)
+            bd_len = ab_len * sin(abs_aa_rad) / sin(abs_d_rad)
+            d_ad_len = ((d_ab_len * sin(abs_bb_rad)[:, col] + (ab_len * cos(abs_bb_rad))[:, col] * d_abs_bb_rad)
+                        / sin_d - ad_len[:, col] * cot_d * d_abs_d_rad)
+            d_bd_len = ((d_ab_len * sin(abs_aa_rad)[:, col] + (ab_len * cos(abs_aa_rad))[:, col] * d_abs_aa_rad)
+                        / sin_d - bd_len[:, col] * cot_d * d_abs_d_rad)
+
+            # Origins D, measured from point A as (dx, dy) = A - D
+            dx, dy = -cos(ad_rad) * ad_len, -sin(ad_rad) * ad_len
+            d_dx = -cos(ad_rad)[:, col] * d_ad_len - dy[:, col] * d_ad_rad
+            d_dy = -sin(ad_rad)[:, col] * d_ad_len + dx[:, col] * d_ad_rad
+            d_origin_x, d_origin_y = d_a_x - d_dx, d_a_y - d_dy
+
+            # Polar slopes, polar angles and scale factors
+            tan_alpha = tan(beta - pi / 2)
+            polar_slope_b = self.growth * abs(tan_alpha)
+            d_polar_slope_b = (self.growth * np.sign(tan_alpha) * (1 + tan_alpha ** 2))[:, col] * d_beta
+            t_a_rad = arctan(dy / dx)
+            d_t_a_rad = (dx[:, col] * d_dy - dy[:, col] * d_dx) / (dx ** 2 + dy ** 2)[:, col]
+            t_b_rad = t_a_rad + self.theta
+            d_t_b_rad = d_t_a_rad + d_bc_rad - d_ac_rad
+            scale_factor_a = dx / (exp(polar_slope_b * t_a_rad) * cos(t_a_rad))
+            d_scale_factor_a = (d_dx / (exp(polar_slope_b * t_a_rad) * cos(t_a_rad))[:, col]
+                                + scale_factor_a[:, col] * (tan(t_a_rad)[:, col] * d_t_a_rad
+                                                            - t_a_rad[:, col] * d_polar_slope_b
+                                                            - polar_slope_b[:, col] * d_t_a_rad))
+
+            # Residuals 'bd_len - segment' with segment = |a| * exp(b * t_b)
+            segment = abs(scale_factor_a) * exp(polar_slope_b * t_b_rad)
+            d_segment = ((np.sign(scale_factor_a) * exp(polar_slope_b * t_b_rad))[:, col] * d_scale_factor_a
+                         + segment[:, col] * (t_b_rad[:, col] * d_polar_slope_b + polar_slope_b[:, col] * d_t_b_rad))
+            d_residual = d_bd_len - d_segment
+
+            # Implicit function theorem: the residual stays zero, so d(beta) = -(dR/d inputs) / (dR/d beta)
+            d_beta_d_inputs = -d_residual[:, :6] / d_residual[:, 6:]
+
+        def total(gradient):
+            return gradient[:, :6] + gradient[:, 6:] * d_beta_d_inputs
+
+        return {
+            'beta': d_beta_d_inputs,
+            'scale_factor_a': total(d_scale_factor_a),
+            'polar_slope_b': total(d_polar_slope_b),
+            'origin_xy': np.stack((total(d_origin_x), total(d_origin_y)), axis=1),
+            't_a_rad': total(d_t_a_rad),
+            't_b_rad': total(d_t_b_rad)}
@@ -1,19 +1,49 @@
+import os
 import numpy as np
 from copy import deepcopy
-import matplotlib.pyplot as plt
-from matplotlib.collections import LineCollection
-from matplotlib.colors import LinearSegmentedColormap
 from func_helper import plot_graph_elements
 
 from class_logarithmic_spiral import LogarithmicSpiral
+from class_spiral_cache import SpiralCache
 from class_line import Line
 from class_poly_line import PolyLine
 from class_coordinate import Coordinate
-from func_helper import find_intercept
+from class_coordinate_array import CoordinateArray
+from class_vane_cascade import VaneCascade
+from func_helper import find_intercepts
+from func_logging import get_logger
+from func_profiling import profiled, profile_stage
+from func_plotting import get_pyplot
+
+logger = get_logger(__name__)
 
 
 class LogarithmicVane:
 
+    # Parameters that can be changed on an existing vane with set_parameters
+    PARAMETERS = ('horizontal_pitch', 'vertical_pitch', 'thickness', 'chord_lower', 'stretch_lower',
+                  'ac_deg', 'bc_deg', 'z_height', 'gap', 'num_points', 'max_sagitta', 'warm_start')
+
+    # Stages of the vane geometry in calculation order: (method, parameters and stages the stage depends on)
+    STAGES = {
+        'angles': ('calculate_angles', ('ac_deg', 'bc_deg')),
+        'suggestion': ('make_suggestion', ('horizontal_pitch', 'vertical_pitch', 'thickness', 'angles')),
+        'lower_spiral_points': ('calculate_lower_spiral_points', ('chord_lower', 'stretch_lower')),
+        'extension_points': ('calculate_extension_points', ('lower_spiral_points', 'thickness', 'angles')),
+        'upper_spiral_points': ('calculate_upper_spiral_points',
+                                ('extension_points', 'horizontal_pitch', 'vertical_pitch', 'chord_lower')),
+        'upper_spiral': ('calculate_upper_spiral', ('upper_spiral_points', 'angles')),
+        'lower_spiral': ('calculate_lower_spiral', ('lower_spiral_points', 'angles')),
+        'spiral_offsets': ('calculate_spiral_origin_offsets',
+                           ('lower_spiral', 'upper_spiral', 'horizontal_pitch', 'vertical_pitch', 'thickness')),
+        'spiral_poly_lines': ('calculate_poly_lines_for_spirals',
+                              ('lower_spiral', 'upper_spiral', 'num_points', 'max_sagitta')),
+        'extension_poly_lines': ('calculate_poly_lines_for_extensions', ('upper_spiral_points',)),
+        'fillets': ('calculate_fillets_and_end_points', ('extension_points', 'max_sagitta')),
+        'outline': ('calculate_poly_outline', ('spiral_poly_lines', 'extension_poly_lines', 'fillets')),
+        'gap': ('calculate_gap', ('horizontal_pitch', 'vertical_pitch', 'gap'))}
+
+    @profiled
     def __init__(
             self,
             horizontal_pitch: float,
@@ -25,6 +55,10 @@ class LogarithmicVane:
             bc_deg: float,
             z_height: float = None,
             gap: float = None,
+            num_points: int = 90,
+            max_sagitta: float = None,
+            warm_start: bool = False,
+            spiral_cache: SpiralCache = None,
     ):
 
         # Basic Attributes
@@ -37,10 +71,15 @@ class LogarithmicVane:
         self.bc_deg = bc_deg
         self.gap = gap
         self.z_height = z_height
-
-        # Convert angle input to radians
-        self.ac_rad = np.radians(ac_deg)
-        self.bc_rad = np.radians(bc_deg)
+        self.num_points = num_points  # number of points along the upper spiral (the lower spiral uses 2 more)
+        self.max_sagitta = max_sagitta  # maximum chord-height error of spirals and fillets (None uses fixed counts)
+        self.warm_start = warm_start  # seed re-solved spirals with the solution of the spirals they replace
+        self.spiral_cache = spiral_cache  # solved spirals reused by both spirals (None uses the shared cache)
+        self.fixed_gap = gap  # gap given by the user (None calculates the gap from the pitches)
+
+        # Angles in radians
+        self.ac_rad:float | None = None
+        self.bc_rad:float | None = None
         self.inlet_rad:float | None = None
         self.outlet_rad:float | None = None
 
@@ -63,16 +102,14 @@ class LogarithmicVane:
         self.pl_fillet_b:PolyLine | None = None
         self.pl_outline:PolyLine | None = None
 
-        # Generate the vane using the class methods
-        self.make_suggestion()
-        self.calculate_spiral_coordinates()
-        self.check_extension_orientation()
-        self.calculate_poly_lines_for_spirals()
-        self.calculate_poly_lines_for_extensions()
-        self.calculate_fillets_and_end_points()
-        self.calculate_poly_outline()
-        self.calculate_gap()
-        self.calculate_pitch_angle()
+        # Logarithmic Vane Spirals
+        self.ls_upper_spiral:LogarithmicSpiral | None = None
+        self.ls_lower_spiral:LogarithmicSpiral | None = None
+
+        # Generate the vane by calculating every stage
+        self.dirty_stages = set(self.STAGES)  # stages that are out of date with the parameters
+        self.updated_stages = list()          # stages calculated by the last update
+        self.update()
 
     def get_all_poly_lines(self) -> list[PolyLine]:
         return [self.pl_lower_spiral, self.pl_upper_spiral,
@@ -87,55 +124,72 @@ class LogarithmicVane:
                 self.end_point_a, self.end_point_b]
 
 
+    @profiled
     def make_suggestion(self):
         # Recommended settings for 90 degree logarithmic vanes
         if abs(self.bc_deg - self.ac_deg) == 90:
             suggested_g_t_c = 0.230  # This value comes from my PhD research
             suggested_chord = ((self.horizontal_pitch + self.thickness) ** 2 + (
                     self.vertical_pitch + self.thickness) ** 2) ** 0.5 / suggested_g_t_c
-            print(f'suggested chord is {suggested_chord} based on a gap-to-chord ratio of {suggested_g_t_c}')
+            logger.info('suggested chord is %s based on a gap-to-chord ratio of %s', suggested_chord, suggested_g_t_c)
 
 
-    def calculate_spiral_coordinates(self):
-        """Calculates the chord lines of the various components that make up a logarithmic turning vane"""
+    @profiled
+    def calculate_angles(self):
+        """Converts the angles of vectors A and B to radians"""
+        self.ac_rad = np.radians(self.ac_deg)
+        self.bc_rad = np.radians(self.bc_deg)
 
-        # Calculate the chord line for the lower vane surface
+
+    @profiled
+    def calculate_lower_spiral_points(self):
+        """Calculates the start and end points of the chord line of the lower vane surface"""
         lower_width = self.chord_lower / np.sqrt(self.stretch_lower**2 + 1)
         lower_height = self.stretch_lower * lower_width
 
         self.lower_spiral_a = Coordinate(x=lower_width, y=0)
         self.lower_spiral_b = Coordinate(x=0, y=lower_height)
 
-        # Calculate the extension line A termination point
+
+    @profiled
+    def calculate_extension_points(self):
+        """Calculates the termination points of the extension lines A and B"""
         offset_a_x =  self.thickness * np.sin(self.ac_rad)
         offset_a_y = -self.thickness * np.cos(self.ac_rad)
         self.extension_a = deepcopy(self.lower_spiral_a).offset_by_xyz(x=offset_a_x, y=offset_a_y)
 
-        # Calculate the extension line B termination point
         offset_b_x =  self.thickness * np.sin(self.bc_rad)
         offset_b_y = -self.thickness * np.cos(self.bc_rad)
         self.extension_b = deepcopy(self.lower_spiral_b).offset_by_xyz(x=offset_b_x, y=offset_b_y)
 
-        # Calculate the start (point A) of the upper spiral
-        neighbour_a = deepcopy(self.lower_spiral_a).offset_by_xyz(x=self.horizontal_pitch, y=self.vertical_pitch)
-        extension_a_slope = np.tan(self.ac_rad)
-        neighbour_a_slope = np.tan(self.ac_rad - np.pi / 2)
-        self.upper_spiral_a = find_intercept(self.extension_a, extension_a_slope, neighbour_a, neighbour_a_slope)
 
-        # Calculate the end (point B) of the upper spiral
-        neighbour_b = deepcopy(self.lower_spiral_b).offset_by_xyz(x=self.horizontal_pitch, y=self.vertical_pitch)
-        extension_b_slope = np.tan(self.bc_rad)
-        neighbour_b_slope = np.tan(self.bc_rad - np.pi / 2)
-        self.upper_spiral_b = find_intercept(self.extension_b, extension_b_slope, neighbour_b, neighbour_b_slope)
+    @profiled
+    def calculate_upper_spiral_points(self):
+        """
+        Calculates the start (point A) and end (point B) of the upper spiral from the neighbouring vane. Both are
+        intercepts of an extension line with the perpendicular through the neighbour, which are found in one call.
+        """
+        angles = np.array([self.ac_rad, self.bc_rad])
+        extensions = CoordinateArray.from_coordinates([self.extension_a, self.extension_b])
+        neighbours = CoordinateArray.from_coordinates([self.lower_spiral_a, self.lower_spiral_b])
+        neighbours.offset_by_xyz(x=self.horizontal_pitch, y=self.vertical_pitch)
+        intercepts, valid = find_intercepts(extensions.xyz[:, :2], np.tan(angles),
+                                            neighbours.xyz[:, :2], np.tan(angles - np.pi / 2))
+        if not valid.all():
+            raise ValueError('The extensions are parallel to the neighbouring vane. The upper spiral has no end points')
+        upper_spiral_points = CoordinateArray(xx=intercepts[:, 0], yy=intercepts[:, 1])
+        self.upper_spiral_a, self.upper_spiral_b = upper_spiral_points.to_coordinates()
+        self.check_extension_orientation()
 
 
+    @profiled
     def check_extension_orientation(self):
         """Check the orientation of the extensions at adjust if necessary."""
 
         # Check if the extension goes from top right to left right (x=-1, y=-1)
         ext_a_chord_line = Line(start=self.extension_a, end=self.upper_spiral_a)
         if ext_a_chord_line.get_orientation() == (1, -1):
-            print('WARNING: Perpendicularity is clashing with upper spiral geometry. Adjusting termination point A')
+            logger.warning('Perpendicularity is clashing with upper spiral geometry. Adjusting termination point A')
             offset_a_x = self.chord_lower / 100 * np.cos(self.ac_rad)
             offset_a_y = self.chord_lower / 100 * np.sin(self.ac_rad)
             self.upper_spiral_a = deepcopy(self.extension_a).offset_by_xyz(x=offset_a_x, y=offset_a_y)
@@ -143,33 +197,72 @@ class LogarithmicVane:
         # Check if the extension goes from top left to bottom right (x=1, y=-1)
         ext_b_chord_line = Line(start=self.upper_spiral_b, end=self.extension_b)
         if ext_b_chord_line.get_orientation() == (1, -1):
-            print('WARNING: Perpendicularity is clashing with upper spiral geometry. Adjusting termination point B')
+            logger.warning('Perpendicularity is clashing with upper spiral geometry. Adjusting termination point B')
             offset_b_x = -self.chord_lower / 100 * np.cos(self.bc_rad)
             offset_b_y = -self.chord_lower / 100 * np.sin(self.bc_rad)
             self.upper_spiral_b = deepcopy(self.extension_b).offset_by_xyz(x=offset_b_x, y=offset_b_y)
 
 
-    def calculate_poly_lines_for_spirals(self, num_points=90):
-        """Generates a PolyLine representing the logarithmic spirals"""
+    @profiled
+    def calculate_lower_spiral(self):
+        """Fits a logarithmic spiral to the end points of the lower vane surface"""
+        a_xy, b_xy = (self.lower_spiral_a.x, self.lower_spiral_a.y), (self.lower_spiral_b.x, self.lower_spiral_b.y)
+        self.ls_lower_spiral = LogarithmicSpiral(a_xy, b_xy, self.ac_deg, self.bc_deg, name='lower_spiral',
+                                                 cache=self.spiral_cache,
+                                                 seed_beta=self.get_seed_beta(self.ls_lower_spiral))
 
-        upper_str, lower_str = 'upper_spiral', 'lower_spiral'
-        spiral_attributes = [(self.upper_spiral_a, self.upper_spiral_b, upper_str, num_points),
-                             (self.lower_spiral_a, self.lower_spiral_b, lower_str, num_points + 2)]
 
-        for start, end, label, n_points in spiral_attributes:
-            a_xy, b_xy = (start.x, start.y), (end.x, end.y)
-            spiral = LogarithmicSpiral(a_xy, b_xy, self.ac_deg, self.bc_deg, name=label)
+    def get_seed_beta(self, previous_spiral:LogarithmicSpiral | None) -> float | None:
+        """Returns the incident angle of the spiral being replaced if warm starts are enabled, otherwise None"""
+        if not self.warm_start or previous_spiral is None:
+            return None
+        return previous_spiral.beta
+
+
+    @profiled
+    def calculate_upper_spiral(self):
+        """Fits a logarithmic spiral to the end points of the upper vane surface"""
+        a_xy, b_xy = (self.upper_spiral_a.x, self.upper_spiral_a.y), (self.upper_spiral_b.x, self.upper_spiral_b.y)
+        self.ls_upper_spiral = LogarithmicSpiral(a_xy, b_xy, self.ac_deg, self.bc_deg, name='upper_spiral',
+                                                 cache=self.spiral_cache,
+                                                 seed_beta=self.get_seed_beta(self.ls_upper_spiral))
+
+
+    @profiled
+    def calculate_spiral_origin_offsets(self):
+        """Calculates the origin offsets of both spirals from the pitches and the thickness"""
+        for spiral in (self.ls_upper_spiral, self.ls_lower_spiral):
             spiral.calculate_origin_offsets(self.horizontal_pitch, self.vertical_pitch, self.thickness)
-            xx, yy = spiral.generate_spiral_coordinates(num_points=n_points)
-            xx, yy = xx.tolist(), yy.tolist()
-            if label == upper_str:
-                self.pl_upper_spiral = PolyLine.generate_from_lists_of_floats(xx, yy, label=label)
-            else: # Reverse the direction of the coordinates to ensure orientation remains CCW
-                xx.reverse()
-                yy.reverse()
-                self.pl_lower_spiral = PolyLine.generate_from_lists_of_floats(xx, yy, label=label)
 
 
+    @profiled
+    def calculate_poly_lines_for_spirals(self):
+        """
+        Generates a PolyLine representing the logarithmic spirals.
+        If `max_sagitta` is set, the fewest points that keep the chord-height error of both spirals below it are
+        used instead of `num_points`. The lower spiral always has 2 more points, so the end cap facets stay aligned.
+        """
+        upper_str, lower_str = 'upper_spiral', 'lower_spiral'
+        num_points, max_sagitta = self.num_points, self.max_sagitta
+
+        # Sample both spirals evenly or with equal chord-height errors
+        if max_sagitta is None:
+            xx_upper, yy_upper = self.ls_upper_spiral.generate_spiral_coordinates(num_points=num_points)
+            xx_lower, yy_lower = self.ls_lower_spiral.generate_spiral_coordinates(num_points=num_points + 2)
+        else:
+            num_points = max(self.ls_upper_spiral.calculate_num_points_for_sagitta(max_sagitta),
+                             self.ls_lower_spiral.calculate_num_points_for_sagitta(max_sagitta) - 2)
+            t_upper = self.ls_upper_spiral.generate_sagitta_t_values(num_points)
+            t_lower = self.ls_lower_spiral.generate_sagitta_t_values(num_points + 2)
+            xx_upper, yy_upper = self.ls_upper_spiral.calculate_spiral_coordinates(t_upper)
+            xx_lower, yy_lower = self.ls_lower_spiral.calculate_spiral_coordinates(t_lower)
+
+        # Reverse the direction of the lower spiral coordinates to ensure orientation remains CCW
+        self.pl_upper_spiral = PolyLine.generate_from_lists_of_floats(xx_upper, yy_upper, label=upper_str)
+        self.pl_lower_spiral = PolyLine.generate_from_lists_of_floats(xx_lower[::-1], yy_lower[::-1], label=lower_str)
+
+
+    @profiled
     def calculate_poly_lines_for_extensions(self):
         """Generates PolyLines representing the straight extensions to the upper logarithmic spiral"""
         self.pl_extension_a = PolyLine.generate_from_coordinate_list(
@@ -178,6 +271,7 @@ class LogarithmicVane:
             [self.upper_spiral_b, self.extension_b], label='extension_b')
 
 
+    @profiled
     def calculate_fillets_and_end_points(self):
         """Generates PolyLines for fillets and coordinates for end points"""
 
@@ -185,7 +279,7 @@ class LogarithmicVane:
         fillet_attributes = [(self.extension_b, self.lower_spiral_b, str_b),
                              (self.lower_spiral_a, self.extension_a, str_a)]
         for start, end, label in fillet_attributes:
-            xx, yy = PolyLine.generate_semi_circle_from_coordinates(start, end)
+            xx, yy = PolyLine.generate_semi_circle_from_coordinates(start, end, max_sagitta=self.max_sagitta)
             mid_x, mid_y = xx[len(xx) // 2], yy[len(yy) // 2]
             if label == str_a:
                 self.pl_fillet_a = PolyLine.generate_from_lists_of_floats(xx, yy, label=label)
@@ -196,6 +290,7 @@ class LogarithmicVane:
                 self.end_point_b = Coordinate(mid_x, mid_y)
 
 
+    @profiled
     def calculate_poly_outline(self):
         """Creates a PolyLine that describes the outer perimeter of the logarithmic vane"""
         # PolyLines in counter-clockwise order starting from the centre of fillet a
@@ -210,15 +305,17 @@ class LogarithmicVane:
         self.pl_outline += self.pl_fillet_a[0:a_centre + 1]
 
 
+    @profiled
     def calculate_gap(self):
         """Calculates the diagonal gap between the vanes"""
-        if self.gap is None:
+        if self.fixed_gap is None:
             if self.horizontal_pitch is None or self.vertical_pitch is None:
                 raise ValueError('horizontal_pitch and vertical_pitch cannot be None')
             self.gap = (self.horizontal_pitch ** 2 + self.vertical_pitch ** 2) ** 0.5
         return self.gap
 
 
+    @profiled
     def calculate_pitch_angle(self):
         """Calculates the angle of the pitch line to the horizontal axis"""
         if self.horizontal_pitch is None or self.vertical_pitch is None:
@@ -227,27 +324,46 @@ class LogarithmicVane:
 
 
     def offset_by_xyz(self, x:float=None, y:float=None, z:float=None):
-        # Offsets the location of the vane by a specified x, y, and z component
+        # Offsets the location of the vane by a specified x, y, and z component (an update rebuilds it at the origin)
+        self.dirty_stages = set(self.STAGES)
         for poly_line in self.get_all_poly_lines():
             poly_line.offset_by_xyz(x=x, y=y, z=z)
         for coordinate in self.get_all_coordinates():
             coordinate.offset_by_xyz(x=x, y=y, z=z)
 
 
+    def get_plot_title(self) -> str:
+        """Returns the title of the vane plots, listing the main design parameters"""
+        return (f"Angle = {self.bc_deg - self.ac_deg}  Chord = {self.chord_lower}  Stretch = {self.stretch_lower}\n"
+                f"Vertical Pitch = {self.vertical_pitch}  Horizontal Pitch = {self.horizontal_pitch}")
+
+
+    def get_file_name(self) -> str:
+        """Returns a file name (without extension) describing the main design parameters"""
+        file_name = (f"angle_{self.bc_deg - self.ac_deg}_"
+                     f"chord_{self.chord_lower}_"
+                     f"stretch_{self.stretch_lower:.2f}_"
+                     f"v_pitch_{self.vertical_pitch:.2f}_"
+                     f"h_pitch_{self.horizontal_pitch:.2f}")
+        return file_name.replace('.', '-')
+
+
     def plot(self):
         """Plot the vane on a standard cartesian plane"""
         xx, yy = self.pl_outline.xx, self.pl_outline.yy
-        plt.plot(xx, yy, label=self.pl_outline.label)
-        title = (f"Angle = {self.bc_deg - self.ac_deg}  Chord = {self.chord_lower}  Stretch = {self.stretch_lower}\n"
-                 f"Vertical Pitch = {self.vertical_pitch}  Horizontal Pitch = {self.horizontal_pitch}")
+        get_pyplot().plot(xx, yy, label=self.pl_outline.label)
+        title = self.get_plot_title()
         min_lim = -self.thickness * 2
         max_lim = self.chord_lower
         plot_graph_elements(title=title, min_x=min_lim, min_y=min_lim, max_x=max_lim, max_y=max_lim)
 
 
     def plot_with_gradient(self):
-        xx, yy = self.pl_outline.xx, self.pl_outline.yy
-        points = np.array([xx, yy]).T.reshape(-1, 1, 2)
+        # Import the colour gradient tools only when plotting
+        from matplotlib.collections import LineCollection
+        from matplotlib.colors import LinearSegmentedColormap
+        plt = get_pyplot()
+        points = self.pl_outline.xyz[:, :2].reshape(-1, 1, 2)
         segments = np.concatenate([points[:-1], points[1:]], axis=1)
 
         # Gradient from blue to red
@@ -262,14 +378,11 @@ class LogarithmicVane:
         ax.autoscale()
         ax.set_aspect('equal', 'box')
 
-        title = (f"Angle = {self.bc_deg - self.ac_deg}  Chord = {self.chord_lower}  Stretch = {self.stretch_lower}\n"
-                 f"Vertical Pitch = {self.vertical_pitch}  Horizontal Pitch = {self.horizontal_pitch}")
+        title = self.get_plot_title()
         min_lim = -self.thickness * 2
         max_lim = self.chord_lower
         plot_graph_elements(title=title, min_x=min_lim, min_y=min_lim, max_x=max_lim, max_y=max_lim)
 
-        plt.show()
-
 
     def plot_components(self, file_directory:None):
         poly_lines = [
@@ -281,17 +394,10 @@ class LogarithmicVane:
             self.pl_fillet_a]
         for poly_line in poly_lines:
             xx, yy = poly_line.xx, poly_line.yy
-            plt.plot(xx, yy, label=poly_line.label)
-
-        file_name = (f"angle_{self.bc_deg - self.ac_deg}_"
-                     f"chord_{self.chord_lower}_"
-                     f"stretch_{self.stretch_lower:.2f}_"
-                     f"v_pitch_{self.vertical_pitch:.2f}_"
-                     f"h_pitch_{self.horizontal_pitch:.2f}")
-        file_name = file_name.replace('.', '-')
+            get_pyplot().plot(xx, yy, label=poly_line.label)
 
-        title = (f"Angle = {self.bc_deg - self.ac_deg}  Chord = {self.chord_lower}  Stretch = {self.stretch_lower}\n"
-                 f"Vertical Pitch = {self.vertical_pitch}  Horizontal Pitch = {self.horizontal_pitch}")
+        file_name = self.get_file_name()
+        title = self.get_plot_title()
 
 
         min_lim = -self.thickness * 2
@@ -300,6 +406,116 @@ class LogarithmicVane:
                             file_name=file_name, file_directory=file_directory)
 
 
+    def save_geometry(self, file_directory:str):
+        """Saves the equations of both spirals and the coordinates of the vane outline to csv files"""
+        LogarithmicSpiral.save_spiral_equations([self.ls_upper_spiral, self.ls_lower_spiral],
+                                                os.path.join(file_directory, 'equations.csv'))
+        file_name = os.path.join(file_directory, 'outline.csv')
+        logger.info('Saving the vane outline to %s', os.path.basename(file_name))
+        with open(file_name, 'w', encoding='utf-8') as file:
+            file.write("x,y\n")
+            file.writelines(f"{x!r},{y!r}\n" for x, y in zip(self.pl_outline.xx.tolist(), self.pl_outline.yy.tolist()))
+
+
+    # ------ Incremental Recalculation ------------------------------------------------------------------------------- #
+
+    @classmethod
+    def get_dependent_stages(cls, names) -> set[str]:
+        """Returns the stages that depend (directly or indirectly) on any of the given parameters or stages"""
+        dependent = set()
+        for stage, (_, dependencies) in cls.STAGES.items():  # stages are listed after their dependencies
+            if any(name in dependent or name in names for name in dependencies):
+                dependent.add(stage)
+        return dependent
+
+
+    def set_parameters(self, **parameters):
+        """
+        Changes parameters of the vane and recalculates only the stages that depend on them.
+        E.g. changing 'vertical_pitch' re-solves the upper spiral, but keeps the lower spiral.
+        If a stage fails, the failed stage and the stages after it stay out of date until the next update.
+        """
+        unknown = set(parameters) - set(self.PARAMETERS)
+        if unknown:
+            raise ValueError(f"Unknown vane parameters: {sorted(unknown)}. Valid: {list(self.PARAMETERS)}")
+        changed = [name for name, value in parameters.items() if getattr(self, name) != value]
+        for name in changed:
+            setattr(self, name, parameters[name])
+        if 'gap' in parameters:  # pins the gap even if it equals the gap calculated from the pitches
+            self.fixed_gap = parameters['gap']
+        self.dirty_stages |= self.get_dependent_stages(changed)
+        return self.update()
+
+
+    @profiled
+    def update(self):
+        """Recalculates the stages that are out of date, in the order of their dependencies"""
+        self.updated_stages = list()
+        for stage, (method, _) in self.STAGES.items():
+            if stage in self.dirty_stages:
+                getattr(self, method)()
+                self.dirty_stages.discard(stage)
+                self.updated_stages.append(stage)
+        return self
+
+
+    # ------ Batches of Vanes ---------------------------------------------------------------------------------------- #
+
+    @staticmethod
+    def calculate_spiral_points_for_designs(
+            horizontal_pitch,
+            vertical_pitch,
+            thickness,
+            chord_lower,
+            stretch_lower,
+            ac_deg,
+            bc_deg) -> dict[str, CoordinateArray]:
+        """
+        Calculates the spiral end points and extension points of many vanes at once from arrays of parameters.
+        Mirrors the point stages of LogarithmicVane and returns CoordinateArrays named like the vane attributes.
+        """
+        ac_rad, bc_rad = np.radians(ac_deg), np.radians(bc_deg)
+        chord_lower, stretch_lower = np.asarray(chord_lower, dtype=float), np.asarray(stretch_lower, dtype=float)
+
+        # Calculate the chord line for the lower vane surface
+        lower_width = chord_lower / np.sqrt(stretch_lower**2 + 1)
+        lower_height = stretch_lower * lower_width
+        length = np.broadcast_shapes(*[np.shape(values) for values in (horizontal_pitch, vertical_pitch, thickness,
+                                                                      lower_width, ac_rad, bc_rad)], (1,))
+        lower_spiral_a = CoordinateArray(xx=np.broadcast_to(lower_width, length), yy=0, label='lower_spiral_a')
+        lower_spiral_b = CoordinateArray(xx=0, yy=np.broadcast_to(lower_height, length), label='lower_spiral_b')
+
+        # Calculate the extension line termination points
+        extension_a = lower_spiral_a.copy().offset_by_xyz(x=thickness * np.sin(ac_rad), y=-thickness * np.cos(ac_rad))
+        extension_b = lower_spiral_b.copy().offset_by_xyz(x=thickness * np.sin(bc_rad), y=-thickness * np.cos(bc_rad))
+
+        # Calculate the start (point A) and end (point B) of the upper spiral
+        neighbour_a = lower_spiral_a.copy().offset_by_xyz(x=horizontal_pitch, y=vertical_pitch)
+        neighbour_b = lower_spiral_b.copy().offset_by_xyz(x=horizontal_pitch, y=vertical_pitch)
+        upper_a_xy, _ = find_intercepts(extension_a.xyz[:, :2], np.tan(ac_rad),
+                                        neighbour_a.xyz[:, :2], np.tan(ac_rad - np.pi / 2))
+        upper_b_xy, _ = find_intercepts(extension_b.xyz[:, :2], np.tan(bc_rad),
+                                        neighbour_b.xyz[:, :2], np.tan(bc_rad - np.pi / 2))
+
+        # Move the upper spiral points where the extensions clash with the upper spiral geometry
+        clash_a = (upper_a_xy[:, 0] > extension_a.xx) & (upper_a_xy[:, 1] < extension_a.yy)
+        clash_b = (extension_b.xx > upper_b_xy[:, 0]) & (extension_b.yy < upper_b_xy[:, 1])
+        clash_a_xy = extension_a.copy().offset_by_xyz(x=chord_lower / 100 * np.cos(ac_rad),
+                                                       y=chord_lower / 100 * np.sin(ac_rad)).xyz[:, :2]
+        clash_b_xy = extension_b.copy().offset_by_xyz(x=-chord_lower / 100 * np.cos(bc_rad),
+                                                       y=-chord_lower / 100 * np.sin(bc_rad)).xyz[:, :2]
+        upper_a_xy = np.where(clash_a[:, np.newaxis], clash_a_xy, upper_a_xy)
+        upper_b_xy = np.where(clash_b[:, np.newaxis], clash_b_xy, upper_b_xy)
+
+        return {
+            'lower_spiral_a': lower_spiral_a,
+            'lower_spiral_b': lower_spiral_b,
+            'extension_a': extension_a,
+            'extension_b': extension_b,
+            'upper_spiral_a': CoordinateArray(xx=upper_a_xy[:, 0], yy=upper_a_xy[:, 1], label='upper_spiral_a'),
+            'upper_spiral_b': CoordinateArray(xx=upper_b_xy[:, 0], yy=upper_b_xy[:, 1], label='upper_spiral_b')}
+
+
     # ------ Methods to generate Vane Cascades ----------------------------------------------------------------------- #
 
     def save_cascade_characteristics(self, num_vanes:int, scale: float, file_directory:str, measure_a:Line, measure_b:Line):
@@ -335,15 +551,15 @@ class LogarithmicVane:
 
 
     @staticmethod
-    def get_channel_width(inner_endpoint, outer_endpoint, angle):
-        # Calculate the perpendicular distance of the channel at point A
-        slope_inner, slope_outer = np.tan(angle - np.pi / 2), np.tan(angle)
-        intercept = find_intercept(inner_endpoint, slope_inner, outer_endpoint, slope_outer)
-        width_xyz = intercept - inner_endpoint
-        channel_width = sum([i ** 2 for i in width_xyz]) ** 0.5
-        return channel_width
+    def get_channel_width(inner_endpoints:CoordinateArray, outer_endpoints:CoordinateArray, angles) -> np.ndarray:
+        """Calculates the perpendicular widths of channels at the given angles from the end points of their walls"""
+        angles = np.asarray(angles, dtype=float)
+        inner_xy, outer_xy = inner_endpoints.xyz[:, :2], outer_endpoints.xyz[:, :2]
+        intercepts, _ = find_intercepts(inner_xy, np.tan(angles - np.pi / 2), outer_xy, np.tan(angles))
+        return np.linalg.norm(intercepts - inner_xy, axis=1)
 
 
+    @profiled
     def generate_cascade(
             self,
             inlet_angle_offset_deg:float,
@@ -355,120 +571,130 @@ class LogarithmicVane:
             stl_height=1,
             stl_scale=1,
             show_plot=False,
-            show_channel=False):
-
-        """Generates a cascade of expansion vanes from a single logarithmic expansion vane"""
-        print('\nGenerating a expansion vane cascade from a singe logarithmic vane')
+            show_channel=False,
+            stl_binary=False,
+            preview_tolerance:float = None,
+            stl_tolerance:float = None) -> VaneCascade:
+
+        """
+        Generates a cascade of expansion vanes from a single logarithmic expansion vane.
+        The vanes are plotted without the points that deviate by less than `preview_tolerance` from the simplified
+        outline, and exported at `stl_tolerance` (None keeps the full resolution, e.g. for the final STL).
+        """
+        logger.info('Generating a expansion vane cascade from a singe logarithmic vane')
 
         # Check the minimum number of vanes
         if num_vanes < 2:
-            print('Minimum number of vanes must be at least 2. Setting number of vanes to 2')
+            logger.warning('Minimum number of vanes must be at least 2. Setting number of vanes to 2')
             num_vanes = 2
 
-        # Generate the various copies of the base vane
-        vanes:list[LogarithmicVane] = list()
-        refine_a:list[PolyLine] = list()
-        refine_b:list[PolyLine] = list()
-        for i in range(num_vanes):
-            x_offset, y_offset = i * self.horizontal_pitch, i * self.vertical_pitch
-            vane_copy = deepcopy(self)
-            vane_copy.offset_by_xyz(x=x_offset, y=y_offset)
-            vanes.append(vane_copy)
-            refine_a.append(vane_copy.pl_fillet_a)
-            refine_b.append(vane_copy.pl_fillet_b)
-
-        # Retrieve vane end points
-        vane_end_inner_a:Coordinate = vanes[0].end_point_a
-        vane_end_inner_b:Coordinate = vanes[0].end_point_b
-        vane_end_outer_a:Coordinate = vanes[-1].end_point_a
-        vane_end_outer_b:Coordinate = vanes[-1].end_point_b
-
-        # Calculate the inlet and outlet angles of the channels
-        self.inlet_rad =  self.ac_rad + np.radians(inlet_angle_offset_deg)
-        self.outlet_rad = self.bc_rad + np.radians(outlet_angle_offset_deg)
-
-        # Calculate channel end points
-        end_inner_a = deepcopy(vane_end_inner_a).offset_by_dist_and_angle(upstream_channel_len, -self.inlet_rad)
-        end_outer_a = deepcopy(vane_end_outer_a).offset_by_dist_and_angle(upstream_channel_len, -self.inlet_rad)
-        end_inner_b = deepcopy(vane_end_inner_b).offset_by_dist_and_angle(downstream_channel_len, self.outlet_rad)
-        end_outer_b = deepcopy(vane_end_outer_b).offset_by_dist_and_angle(downstream_channel_len, self.outlet_rad)
-
-        # Calculate channel measurement points
-        offset_a = 200
-        measure_inner_a = deepcopy(vane_end_inner_a).offset_by_dist_and_angle(offset_a, -self.inlet_rad)
-        measure_outer_a = deepcopy(vane_end_outer_a).offset_by_dist_and_angle(offset_a, -self.inlet_rad)
-        measure_a = Line(start=measure_inner_a, end=measure_outer_a)
-        offset_b = 200
-        measure_inner_b = deepcopy(vane_end_inner_b).offset_by_dist_and_angle(offset_b, self.outlet_rad)
-        measure_outer_b = deepcopy(vane_end_outer_b).offset_by_dist_and_angle(offset_b, self.outlet_rad)
-        measure_b = Line(start=measure_inner_b, end=measure_outer_b)
-
-
-        # Calculate channel end mid points
-        w_a = self.get_channel_width(vane_end_inner_a, vane_end_outer_a, self.inlet_rad)
-        end_inner_mid_a = deepcopy(end_inner_a).offset_by_dist_and_angle(w_a / 3, self.inlet_rad - np.pi / 2)
-        end_outer_mid_a = deepcopy(end_outer_a).offset_by_dist_and_angle(w_a / 3, self.inlet_rad + np.pi / 2)
-        w_b = self.get_channel_width(vane_end_inner_b, vane_end_outer_b, self.outlet_rad)
-        end_inner_mid_b = deepcopy(end_inner_b).offset_by_dist_and_angle(w_b / 3, self.outlet_rad - np.pi / 2)
-        end_outer_mid_b = deepcopy(end_outer_b).offset_by_dist_and_angle(w_b / 3, self.outlet_rad + np.pi / 2)
-
-        # Define channel side walls (in anti-clockwise order)
-        side_outer_a = PolyLine.generate_from_coordinate_list([end_outer_a, vane_end_outer_a], 'patch_a_outer')
-        side_outer_b = PolyLine.generate_from_coordinate_list([vane_end_outer_b, end_outer_b], 'patch_b_outer')
-        side_inner_b = PolyLine.generate_from_coordinate_list([end_inner_b, vane_end_inner_b], 'patch_b_inner')
-        side_inner_a = PolyLine.generate_from_coordinate_list([vane_end_inner_a, end_inner_a], 'patch_a_inner')
-
-        # Define channel end walls (in anti-clockwise order)
-        coordinates_a = [end_inner_a, end_inner_mid_a, end_outer_mid_a, end_outer_a]
-        end_a = PolyLine.generate_from_coordinate_list(coordinates_a, 'inlet')
-        coordinates_b = [end_outer_b, end_outer_mid_b, end_inner_mid_b, end_inner_b]
-        end_b = PolyLine.generate_from_coordinate_list(coordinates_b, 'outlet')
+        # Describe the cascade as instances of the base vane (geometry is only created when it is needed)
+        cascade = VaneCascade(self, num_vanes)
+
+        # Calculate the geometry of the channel
+        with profile_stage('LogarithmicVane.generate_cascade.channel_geometry'):
+
+            # Retrieve vane end points
+            vane_end_inner_a:Coordinate = cascade.get_coordinate('end_point_a', 0)
+            vane_end_inner_b:Coordinate = cascade.get_coordinate('end_point_b', 0)
+            vane_end_outer_a:Coordinate = cascade.get_coordinate('end_point_a', num_vanes - 1)
+            vane_end_outer_b:Coordinate = cascade.get_coordinate('end_point_b', num_vanes - 1)
+
+            # Calculate the inlet and outlet angles of the channels
+            self.inlet_rad =  self.ac_rad + np.radians(inlet_angle_offset_deg)
+            self.outlet_rad = self.bc_rad + np.radians(outlet_angle_offset_deg)
+
+            # Calculate channel end points
+            end_inner_a = deepcopy(vane_end_inner_a).offset_by_dist_and_angle(upstream_channel_len, -self.inlet_rad)
+            end_outer_a = deepcopy(vane_end_outer_a).offset_by_dist_and_angle(upstream_channel_len, -self.inlet_rad)
+            end_inner_b = deepcopy(vane_end_inner_b).offset_by_dist_and_angle(downstream_channel_len, self.outlet_rad)
+            end_outer_b = deepcopy(vane_end_outer_b).offset_by_dist_and_angle(downstream_channel_len, self.outlet_rad)
+
+            # Calculate channel measurement points
+            offset_a = 200
+            measure_inner_a = deepcopy(vane_end_inner_a).offset_by_dist_and_angle(offset_a, -self.inlet_rad)
+            measure_outer_a = deepcopy(vane_end_outer_a).offset_by_dist_and_angle(offset_a, -self.inlet_rad)
+            measure_a = Line(start=measure_inner_a, end=measure_outer_a)
+            offset_b = 200
+            measure_inner_b = deepcopy(vane_end_inner_b).offset_by_dist_and_angle(offset_b, self.outlet_rad)
+            measure_outer_b = deepcopy(vane_end_outer_b).offset_by_dist_and_angle(offset_b, self.outlet_rad)
+            measure_b = Line(start=measure_inner_b, end=measure_outer_b)
+
+
+            # Calculate channel end mid points (from the widths of the channel at A and B)
+            w_a, w_b = self.get_channel_width(
+                CoordinateArray.from_coordinates([vane_end_inner_a, vane_end_inner_b]),
+                CoordinateArray.from_coordinates([vane_end_outer_a, vane_end_outer_b]),
+                [self.inlet_rad, self.outlet_rad])
+            end_inner_mid_a = deepcopy(end_inner_a).offset_by_dist_and_angle(w_a / 3, self.inlet_rad - np.pi / 2)
+            end_outer_mid_a = deepcopy(end_outer_a).offset_by_dist_and_angle(w_a / 3, self.inlet_rad + np.pi / 2)
+            end_inner_mid_b = deepcopy(end_inner_b).offset_by_dist_and_angle(w_b / 3, self.outlet_rad - np.pi / 2)
+            end_outer_mid_b = deepcopy(end_outer_b).offset_by_dist_and_angle(w_b / 3, self.outlet_rad + np.pi / 2)
+
+            # Define channel side walls (in anti-clockwise order)
+            side_outer_a = PolyLine.generate_from_coordinate_list([end_outer_a, vane_end_outer_a], 'patch_a_outer')
+            side_outer_b = PolyLine.generate_from_coordinate_list([vane_end_outer_b, end_outer_b], 'patch_b_outer')
+            side_inner_b = PolyLine.generate_from_coordinate_list([end_inner_b, vane_end_inner_b], 'patch_b_inner')
+            side_inner_a = PolyLine.generate_from_coordinate_list([vane_end_inner_a, end_inner_a], 'patch_a_inner')
+
+            # Define channel end walls (in anti-clockwise order)
+            coordinates_a = [end_inner_a, end_inner_mid_a, end_outer_mid_a, end_outer_a]
+            end_a = PolyLine.generate_from_coordinate_list(coordinates_a, 'inlet')
+            coordinates_b = [end_outer_b, end_outer_mid_b, end_inner_mid_b, end_inner_b]
+            end_b = PolyLine.generate_from_coordinate_list(coordinates_b, 'outlet')
 
         # Plot the vane cascade and the generated channel
         if show_plot:
-            for vane in vanes:
-                vane.pl_outline.plot()
-            if show_channel:
-                for poly_line in [side_outer_a, side_outer_b, end_b, side_inner_b, side_inner_a, end_a]:
-                    poly_line.plot()
-            title = (
-                f"Angle = {self.bc_deg - self.ac_deg}  Chord = {self.chord_lower}  Stretch = {self.stretch_lower}\n"
-                f"Vertical Pitch = {self.vertical_pitch}  Horizontal Pitch = {self.horizontal_pitch}")
-            plot_graph_elements(title=title)
+            with profile_stage('LogarithmicVane.generate_cascade.plot'):
+                for pl_outline in cascade.generate_poly_lines('pl_outline', preview_tolerance):
+                    pl_outline.plot()
+                if show_channel:
+                    for poly_line in [side_outer_a, side_outer_b, end_b, side_inner_b, side_inner_a, end_a]:
+                        poly_line.plot()
+                plot_graph_elements(title=self.get_plot_title())
 
         # Create STL files for the channel sides and ends
-        print('Creating PolyLines for the chanel walls and channel ends')
-        for poly_line in [side_outer_a, side_outer_b, side_inner_b, side_inner_a, end_a, end_b]:
-            PolyLine.create_stl_file_from_xy_poly_line(
-                poly_lines=poly_line,
-                height=stl_height,
-                file_directory=file_directory,
-                stl_scale=stl_scale)
+        logger.info('Creating PolyLines for the chanel walls and channel ends')
+        with profile_stage('LogarithmicVane.generate_cascade.stl_channel'):
+            for poly_line in [side_outer_a, side_outer_b, side_inner_b, side_inner_a, end_a, end_b]:
+                PolyLine.create_stl_file_from_xy_poly_line(
+                    poly_lines=poly_line,
+                    height=stl_height,
+                    file_directory=file_directory,
+                    stl_scale=stl_scale,
+                    binary=stl_binary)
 
         # Create STL files for the refinement surfaces
-        print('Creating PolyLines for the refinement surfaces')
-        for poly_lines, name in [(refine_a, 'tip_refinements_a'), (refine_b, 'tip_refinements_b')]:
+        logger.info('Creating PolyLines for the refinement surfaces')
+        with profile_stage('LogarithmicVane.generate_cascade.stl_refinements'):
+            for attribute, name in [('pl_fillet_a', 'tip_refinements_a'), ('pl_fillet_b', 'tip_refinements_b')]:
+                PolyLine.create_stl_file_from_xy_poly_line(
+                    poly_lines=cascade.generate_poly_lines(attribute, stl_tolerance),
+                    height=stl_height,
+                    file_directory=file_directory,
+                    stl_scale=stl_scale,
+                    file_name=name,
+                    binary=stl_binary)
+
+        # Create an STL file for the turning vnaes
+        logger.info('Creating PolyLines for the vanes')
+        with profile_stage('LogarithmicVane.generate_cascade.stl_vanes'):
+            # The end caps pair the coordinates of both sides of the outline, so they are simplified together
+            pl_vanes = cascade.generate_poly_lines('pl_outline', stl_tolerance, symmetric=True) \
+                if self.pl_outline else []
             PolyLine.create_stl_file_from_xy_poly_line(
-                poly_lines=poly_lines,
+                poly_lines=pl_vanes,
                 height=stl_height,
+                create_end_cap=True,
                 file_directory=file_directory,
                 stl_scale=stl_scale,
-                file_name=name)
-
-        # Create an STL file for the turning vnaes
-        print('Creating PolyLines for the vanes')
-        pl_vanes = [vane.pl_outline for vane in vanes if vane.pl_outline]
-        PolyLine.create_stl_file_from_xy_poly_line(
-            poly_lines=pl_vanes,
-            height=stl_height,
-            create_end_cap=True,
-            file_directory=file_directory,
-            stl_scale=stl_scale,
-            file_name='vanes')
+                file_name='vanes',
+                binary=stl_binary)
 
         # Save the characteristics of the vane cascade
         self.save_cascade_characteristics(num_vanes=num_vanes, scale=stl_scale, file_directory=file_directory,
                                           measure_a=measure_a, measure_b=measure_b)
+        return cascade
 
 
 
@@ -0,0 +1,102 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class MicroBatcher:
+    """
+    Groups requests and solves them with a single call of `solve_batch`. Batches are solved one after the other on a
+    worker thread: while one is being solved, the next one fills up and is solved as soon as the worker is free.
+    A request arriving at an idle worker waits `window_s` for further requests, so a lone request is not delayed
+    by the default window of zero.
+    """
+
+    def __init__(self, solve_batch, window_s=0.0, max_batch_size=1024, name='batcher'):
+        """Initialises a batcher for a function that takes a list of requests and returns a list of results"""
+        if window_s < 0:
+            raise ValueError(f"window_s cannot be negative, got {window_s}")
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be at least 1, got {max_batch_size}")
+        self.solve_batch = solve_batch
+        self.window_s = window_s                # time a batch waits for further requests if the worker is idle
+        self.max_batch_size = max_batch_size    # batches are solved immediately once they reach this size
+        self.name = name
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self.pending = list()                   # requests and futures of the batch being collected
+        self.flush_handle = None                # timer that solves the batch being collected
+        self.tasks = set()                      # batches being solved
+        self.num_requests = 0
+        self.num_batches = 0
+
+
+    def __repr__(self):
+        return (f"MicroBatcher("
+                f"name={self.name!r}, "
+                f"window_s={self.window_s}, "
+                f"max_batch_size={self.max_batch_size}, "
+                f"num_requests={self.num_requests}, "
+                f"num_batches={self.num_batches})")
+
+
+    async def submit(self, request):
+        """Adds a request to the current batch and returns its result once the batch is solved"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((request, future))
+        if len(self.pending) >= self.max_batch_size:
+            self.flush()
+        elif not self.tasks and self.flush_handle is None:  # otherwise it is flushed once the worker is free
+            self.flush_handle = loop.call_later(self.window_s, self.flush)
+        return await future
+
+
+    def flush(self) -> None:
+        """Starts solving the batch being collected"""
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        batch, self.pending = self.pending, list()
+        if batch:
+            task = asyncio.ensure_future(self.solve(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.finish)
+
+
+    def finish(self, task:asyncio.Future) -> None:
+        """Starts solving the requests that arrived while the worker was busy"""
+        self.tasks.discard(task)
+        if not self.tasks and self.pending:
+            self.flush()
+
+
+    async def solve(self, batch:list) -> None:
+        """Solves a batch on the worker thread and passes every result (or the error of the batch) to its request"""
+        requests = [request for request, _ in batch]
+        self.num_requests += len(requests)
+        self.num_batches += 1
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(self.executor, self.solve_batch, requests)
+        except Exception as error:  # a failing batch fails all of its requests, but not the batcher
+            results = [error] * len(requests)
+        if len(results) != len(requests):  # results cannot be matched to their requests, so fail the whole batch
+            error = RuntimeError(f"solve_batch returned {len(results)} results for {len(requests)} requests")
+            results = [error] * len(requests)
+        for (_, future), result in zip(batch, results):
+            if future.done():  # the request was cancelled, e.g. because its client disconnected
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+    def stats(self) -> dict:
+        """Returns the number of requests and batches solved so far"""
+        return {
+            'requests': self.num_requests,
+            'batches': self.num_batches,
+            'mean_batch_size': self.num_requests / self.num_batches if self.num_batches else 0.0}
+
+
+    def close(self) -> None:
+        """Stops the worker thread once the batches being solved are finished"""
+        self.executor.shutdown(wait=False)
@@ -2,12 +2,23 @@ from copy import deepcopy
 
 from class_line import Line
 from class_coordinate import Coordinate
-import matplotlib.pyplot as plt
 import numpy as np
 import math
 
+from func_logging import get_logger
+from func_profiling import profiled, add_count
+from func_plotting import get_pyplot
+
+STL_CHUNK_SIZE = 10000  # maximum number of facets that are held in memory while writing an STL file
+
+logger = get_logger(__name__)
+
 
 class PolyLine:
+    """
+    Sequence of 2D or 3D coordinates stored in a single contiguous (n x 3) float64 array.
+    Missing components (e.g. z for a 2D PolyLine) are stored as NaN and reported as None by `xx`, `yy` and `zz`.
+    """
 
     def __init__(self, xx=None, yy=None, zz=None, label=None, style='-'):
         """Initialises a PolyLine lass instance"""
@@ -15,22 +26,21 @@ class PolyLine:
         # Assign attributes
         self.label = label
         self.style = style
-        self.xx = xx
-        self.yy = yy
-        self.zz = zz
+        self.xyz = np.empty((0, 3))             # coordinates of the PolyLine (n x 3)
+        self.axes = [False, False, False]       # whether the x, y, and z components are defined
+        self.importance = None                  # cached Douglas-Peucker importance of every coordinate
+        self.levels_of_detail = dict()          # cached simplified PolyLines by tolerance (see `simplify`)
+        self.cached_xyz = None                  # copy of the coordinates the cached levels of detail belong to
 
-        # Run validation checks
-        self.validate_types()
-        self.validate_lengths()
+        # Run validation checks and store the components
+        self.validate_types(xx, yy, zz)
+        self.validate_lengths(xx, yy, zz)
+        self.set_components(xx, yy, zz)
 
 
     def __len__(self):
         """Returns the length of the PolyLine instance components"""
-        self.validate_lengths()
-        len_x = len(self.xx) if self.xx is not None else 0
-        len_y = len(self.yy) if self.yy is not None else 0
-        len_z = len(self.zz) if self.zz is not None else 0
-        return max(len_x, len_y, len_z)
+        return len(self.xyz)
 
 
     def __repr__(self):
@@ -45,49 +55,103 @@ class PolyLine:
     def __add__(self, other):
         """Adds two PolyLines or a PolyLine and a coordinate"""
         if isinstance(other, PolyLine):
-            xx = self.xx + other.xx if self.xx is not None else other.xx
-            yy = self.yy + other.yy if self.yy is not None else other.yy
-            zz = self.zz + other.zz if self.zz is not None else other.zz
+            other_xyz, other_axes = other.xyz, other.axes
         elif isinstance(other, Coordinate):
-            xx = self.xx + [other.x] if self.xx is not None else [other.x]
-            yy = self.yy + [other.y] if self.yy is not None else [other.y]
-            zz = self.zz + [other.z] if self.zz is not None else [other.z]
+            values = (other.x, other.y, other.z)
+            other_xyz = np.array([[np.nan if v is None else v for v in values]], dtype=float)
+            other_axes = [v is not None for v in values]
         else:
             raise ValueError(f"Cannot add {type(other)} to PolyLine")
-        return PolyLine(xx=xx, yy=yy, zz=zz)
+        if len(self) == 0 and not any(self.axes):
+            return type(self).from_array(other_xyz.copy(), axes=other_axes)
+        for axis, label in enumerate('xyz'):
+            if self.axes[axis] and not other_axes[axis]:
+                raise ValueError(f"Cannot add a PolyLine without {label} components to a PolyLine with them")
+        axes = [own and added for own, added in zip(self.axes, other_axes)]
+        return type(self).from_array(np.concatenate((self.xyz, other_xyz)), axes=axes)
 
 
     def __getitem__(self, key):
-        """Allows PolyLines to be slices like a normal list"""
-        xx = self.xx[key] if self.xx is not None else None
-        yy = self.yy[key] if self.yy is not None else None
-        zz = self.zz[key] if self.zz is not None else None
-        return type(self)(xx=xx, yy=yy, zz=zz)
+        """Allows PolyLines to be slices like a normal list. Slices are views that share the coordinate array"""
+        xyz = self.xyz[key]
+        if xyz.ndim == 1:
+            xyz = xyz[np.newaxis]
+        return type(self).from_array(xyz, axes=self.axes)
+
+
+    # ----- Component Access ---------------------------------------------------------------------------------------- #
+
+    def get_component(self, axis:int) -> np.ndarray | None:
+        """Returns a view of the coordinates along one axis, or None if the component is not defined"""
+        return self.xyz[:, axis] if self.axes[axis] else None
+
+
+    def set_component(self, axis:int, values) -> None:
+        """Sets the coordinates along one axis. None removes the component"""
+        self.clear_levels_of_detail()
+        if values is None:
+            self.axes[axis] = False
+            self.xyz[:, axis] = np.nan
+            return
+        values = np.asarray(values, dtype=float)
+        if not any(self.axes) and len(values) != len(self.xyz):
+            self.xyz = np.full((len(values), 3), np.nan)
+        elif len(values) != len(self.xyz):
+            raise ValueError(f"Mismatched lengths: {len(values)} values for a PolyLine of length {len(self.xyz)}")
+        self.xyz[:, axis] = values
+        self.axes[axis] = True
+
+
+    def set_components(self, xx=None, yy=None, zz=None) -> None:
+        """Replaces all coordinate components at once"""
+        self.clear_levels_of_detail()
+        components = [xx, yy, zz]
+        length = max([len(c) for c in components if c is not None], default=0)
+        self.xyz = np.full((length, 3), np.nan)
+        self.axes = [False, False, False]
+        for axis, values in enumerate(components):
+            if values is not None:
+                self.set_component(axis, values)
+
+
+    xx = property(lambda self: self.get_component(0), lambda self, values: self.set_component(0, values))
+    yy = property(lambda self: self.get_component(1), lambda self, values: self.set_component(1, values))
+    zz = property(lambda self: self.get_component(2), lambda self, values: self.set_component(2, values))
 
 
     # ----- Validation Methods -------------------------------------------------------------------------------------- #
 
-    def validate_types(self):
+    @staticmethod
+    def validate_types(xx=None, yy=None, zz=None):
         """Checks that the coordinates are of type list or ndarray"""
-        for var_name, var_value in (('xx', self.xx), ('yy', self.yy), ('zz', self.zz)):
+        for var_name, var_value in (('xx', xx), ('yy', yy), ('zz', zz)):
             if var_value is not None and not isinstance(var_value, list) and not isinstance(var_value, np.ndarray):
                 raise TypeError(f"{var_name} must be a list or None, got {type(var_value).__name__}")
 
 
-    def validate_lengths(self):
+    @staticmethod
+    def validate_lengths(xx=None, yy=None, zz=None):
         """Checks that the coordinate components are all equally long"""
-        lists = [lst for lst in (self.xx, self.yy, self.zz) if lst is not None]
+        lists = [lst for lst in (xx, yy, zz) if lst is not None]
         if len(lists) > 1:
             length = len(lists[0])
             if not all(len(lst) == length for lst in lists):
-                x_str = f'x_len = {len(self.xx)}, ' if self.xx else ''
-                y_str = f'y_len = {len(self.yy)}, ' if self.yy else ''
-                z_str = f'z_len = {len(self.zz)}' if self.zz else ''
+                x_str = f'x_len = {len(xx)}, ' if xx is not None else ''
+                y_str = f'y_len = {len(yy)}, ' if yy is not None else ''
+                z_str = f'z_len = {len(zz)}' if zz is not None else ''
                 raise ValueError(f"Mismatched lengths: {x_str}{y_str}{z_str}")
 
 
     # ----- Instantiation Methods ----------------------------------------------------------------------------------- #
 
+    @classmethod
+    def from_array(cls, xyz:np.ndarray, axes=(True, True, True), label=None, style='-'):
+        """Creates a PolyLine around an existing (n x 3) float64 array without copying it"""
+        poly_line = cls(label=label, style=style)
+        poly_line.xyz = xyz
+        poly_line.axes = list(axes)
+        return poly_line
+
 
     @classmethod
     def generate_from_coordinate_list(cls, coordinates:list[Coordinate], label=None, style='-'):
@@ -124,10 +188,12 @@ class PolyLine:
             start:Coordinate,
             end:Coordinate,
             num_points=21,
-            clockwise=False) -> tuple[list[float], list[float]]:
-        """Generates a set of X and Y coordinates for a semicircular fillet"""
-        # Ensure that number of points is odd to have a centred mid-point
-        num_points = num_points if num_points % 2 != 0 else num_points + 1
+            clockwise=False,
+            max_sagitta=None) -> tuple[list[float], list[float]]:
+        """
+        Generates a set of X and Y coordinates for a semicircular fillet.
+        If `max_sagitta` is given, the fewest points that keep the chord-height error below it are used instead.
+        """
         # Midpoint between start and end
         cx = (start.x + end.x) / 2
         cy = (start.y + end.y) / 2
@@ -135,6 +201,14 @@ class PolyLine:
         dx = end.x - start.x
         dy = end.y - start.y
         radius = math.sqrt(dx ** 2 + dy ** 2) / 2
+        # A chord spanning the angle phi deviates from the circle by radius * (1 - cos(phi / 2))
+        if max_sagitta is not None:
+            if max_sagitta <= 0:
+                raise ValueError(f"max_sagitta must be positive, got {max_sagitta}")
+            max_angle = 2 * math.acos(max(1 - max_sagitta / radius, -1)) if radius > 0 else math.pi
+            num_points = math.ceil(math.pi / max_angle) + 1
+        # Ensure that number of points is odd to have a centred mid-point
+        num_points = num_points if num_points % 2 != 0 else num_points + 1
         # Angle of start→end
         theta = math.atan2(dy, dx)
         # Generate semicircle angles
@@ -152,69 +226,165 @@ class PolyLine:
 
     def offset_by_xyz(self, x: float | None = None, y: float | None = None, z: float | None = None):
         """Offset the polyline coordinates by x, y, and z. Modifies in place but also returns self for chaining."""
-        for axis_label, axis_offset in (('xx', x), ('yy', y), ('zz', z)):
-            coordinates = getattr(self, axis_label)
-            if coordinates is None or axis_offset is None:
-                continue
-            coordinates = np.array(coordinates, dtype=float) + axis_offset
-            setattr(self, axis_label, coordinates.tolist())
+        self.clear_levels_of_detail()
+        for axis, axis_offset in enumerate((x, y, z)):
+            if self.axes[axis] and axis_offset is not None:
+                self.xyz[:, axis] += axis_offset
         return self
 
 
     def scale_all(self, scale_factor):
         """Takes a scale factor and applies it to all coordinates of the PolyLine. Return self for chaining."""
-        self.xx = (np.array(self.xx) * scale_factor).tolist()
-        self.yy = (np.array(self.yy) * scale_factor).tolist()
-        self.zz = (np.array(self.zz) * scale_factor).tolist()
+        self.clear_levels_of_detail()
+        self.xyz *= scale_factor
         return self
 
 
     def set_all_x(self, x_value):
         """Sets all X coordinates to a specified value. Returns self for chaining."""
-        if self.xx is None and self.yy is None and self.zz is None:
+        if not any(self.axes):
             raise ValueError("Cannot set all X values if there are no existing coordinate values")
-        length = max(len(self.yy), len(self.zz))
-        self.xx = [x_value for _ in range(length)]
+        self.clear_levels_of_detail()
+        self.xyz[:, 0] = x_value
+        self.axes[0] = True
         return self
 
 
     def set_all_y(self, y_value):
         """Sets all Y coordinates to a specified value. Returns self for chaining."""
-        if self.xx is None and self.yy is None and self.zz is None:
+        if not any(self.axes):
             raise ValueError("Cannot set all Y values if there are no existing coordinate values")
-        length = max(len(self.xx), len(self.zz))
-        self.yy = [y_value for _ in range(length)]
+        self.clear_levels_of_detail()
+        self.xyz[:, 1] = y_value
+        self.axes[1] = True
         return self
 
 
     def set_all_z(self, z_value):
         """Sets all Z coordinates to a specified value. Returns self for chaining."""
-        if self.xx is None and self.yy is None and self.zz is None:
+        if not any(self.axes):
             raise ValueError("Cannot set all Z values if there are no existing coordinate values")
-        length = max(len(self.xx), len(self.yy))
-        self.zz = [z_value for _ in range(length)]
+        self.clear_levels_of_detail()
+        self.xyz[:, 2] = z_value
+        self.axes[2] = True
         return self
 
 
     def pop(self) -> Coordinate:
         """Pops the last items of all existing coordinate components, and returns the popped coordinate"""
-        if self.xx is None and self.yy is None and self.zz is None:
+        if not any(self.axes) or len(self) == 0:
             raise IndexError("Cannot pop and element. PolyLine has no coordinates")
-        x = y = z = None
-        if self.xx is not None:
-            x = self.xx.pop()
-        if self.yy is not None:
-            y = self.yy.pop()
-        if self.zz is not None:
-            z = self.zz.pop()
+        x, y, z = [float(v) if defined else None for v, defined in zip(self.xyz[-1], self.axes)]
+        self.xyz = self.xyz[:-1]
+        self.clear_levels_of_detail()
         return Coordinate(x=x, y=y, z=z)
 
 
+    # ----- Simplification ------------------------------------------------------------------------------------------ #
+
+    def calculate_importance(self) -> np.ndarray:
+        """
+        Returns the tolerance up to which the Douglas-Peucker algorithm keeps every coordinate (the end points are
+        always kept). All segments of a level of the recursion are split at once, and the result is cached, so
+        every tolerance afterwards is a comparison (see `simplify`).
+        """
+        self.validate_levels_of_detail()
+        if self.importance is not None:
+            return self.importance
+        self.cached_xyz = self.xyz.copy()
+        if len(self) < 3:  # nothing to simplify
+            self.importance = np.full(len(self), np.inf)
+            return self.importance
+        xyz = self.xyz[:, self.axes]
+        importance = np.zeros(len(xyz))
+        importance[[0, -1]] = np.inf
+        starts, ends, limits = np.array([0]), np.array([len(xyz) - 1]), np.array([np.inf])
+
+        while True:
+            # Gather the interior coordinates of all segments that still have any
+            open_segments = ends - starts > 1
+            starts, ends, limits = starts[open_segments], ends[open_segments], limits[open_segments]
+            if not len(starts):
+                break
+            lengths = ends - starts - 1
+            owners = np.repeat(np.arange(len(starts)), lengths)
+            offsets = np.cumsum(lengths) - lengths
+            indices = starts[owners] + 1 + np.arange(len(owners)) - offsets[owners]
+
+            # Distances of the interior coordinates to their segments (chords of equal end points become points)
+            start_xyz, chord = xyz[starts][owners], (xyz[ends] - xyz[starts])[owners]
+            chord_sq = np.einsum('ij,ij->i', chord, chord)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                fraction = np.clip(np.einsum('ij,ij->i', xyz[indices] - start_xyz, chord) / chord_sq, 0, 1)
+            fraction = np.where(chord_sq > 0, fraction, 0)
+            distances = np.linalg.norm(xyz[indices] - start_xyz - fraction[:, np.newaxis] * chord, axis=1)
+
+            # Split every segment at its farthest coordinate, which is kept as long as its parents are kept
+            max_distances = np.maximum.reduceat(distances, offsets)
+            farthest = np.flatnonzero(distances == max_distances[owners])
+            _, first = np.unique(owners[farthest], return_index=True)
+            splits = indices[farthest[first]]
+            importance[splits] = np.minimum(max_distances, limits)
+
+            # Straight segments are dropped as a whole (this avoids splitting long straight lines point by point)
+            curved = max_distances > 0
+            splits, starts, ends = splits[curved], starts[curved], ends[curved]
+            limits = np.tile(importance[splits], 2)
+            starts, ends = np.concatenate((starts, splits)), np.concatenate((splits, ends))
+
+        self.importance = importance
+        return importance
+
+
+    def simplify(self, tolerance:float, symmetric=False):
+        """
+        Returns a PolyLine without the coordinates that deviate by less than `tolerance` from the simplified line
+        (Douglas-Peucker). Simplified PolyLines are cached, so repeated requests for a level of detail are free.
+        If `symmetric` is True, coordinate i is kept with coordinate n-2-i, so that the end caps of a closed outline
+        can still be paired (see `generate_stl_line_pairs`).
+        """
+        if tolerance < 0:
+            raise ValueError(f"tolerance cannot be negative, got {tolerance}")
+        key = (tolerance, symmetric)
+        self.validate_levels_of_detail()
+        if key not in self.levels_of_detail:
+            keep = self.calculate_importance() > tolerance
+            if symmetric and len(keep) > 1:
+                keep[:-1] |= keep[-2::-1]
+            xyz = self.xyz[keep]
+            self.levels_of_detail[key] = type(self).from_array(xyz, axes=self.axes, label=self.label,
+                                                                style=self.style)
+            add_count('simplified_points', int(len(self) - len(xyz)))
+        return self.levels_of_detail[key]
+
+
+    def generate_levels_of_detail(self, tolerances:list[float], symmetric=False) -> list:
+        """Returns a simplified PolyLine for every tolerance (e.g. for previews at increasing zoom levels)"""
+        return [self.simplify(tolerance, symmetric) for tolerance in tolerances]
+
+
+    def validate_levels_of_detail(self) -> None:
+        """
+        Discards the cached levels of detail if the coordinates have changed since they were calculated. This also
+        catches writes through views of the coordinates (e.g. `pl[3:6].offset_by_xyz(y=1)` or `pl.xx[0] = 1`),
+        which the methods of this PolyLine cannot see.
+        """
+        if self.cached_xyz is not None and not np.array_equal(self.cached_xyz, self.xyz, equal_nan=True):
+            self.clear_levels_of_detail()
+
+
+    def clear_levels_of_detail(self) -> None:
+        """Discards the cached importance and simplified PolyLines, e.g. after the coordinates have changed"""
+        self.importance = None
+        self.levels_of_detail = dict()
+        self.cached_xyz = None
+
+
     # ----- Plotting and File Generation----------------------------------------------------------------------------- #
 
     def plot(self):
         """Plots the PolyLine on a matplotlib figure."""
-        plt.plot(self.xx, self.yy, self.style, label=self.label)
+        get_pyplot().plot(self.xx, self.yy, self.style, label=self.label)
 
 
     @staticmethod
@@ -230,7 +400,15 @@ class PolyLine:
         return normal_vector[0], normal_vector[1], normal_vector[2]
 
 
+    @staticmethod
+    def calculate_face_normals(triangles:np.ndarray) -> np.ndarray:
+        """Vectorised equivalent of `calculate_face_normal` for an array of triangles (n x 3 x 3)"""
+        normal_vectors = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 1])
+        return normal_vectors / np.linalg.norm(normal_vectors, axis=1)[:, np.newaxis]
+
+
     @classmethod
+    @profiled
     def create_stl_file_from_xy_poly_line(
             cls,
             poly_lines,
@@ -239,10 +417,14 @@ class PolyLine:
             create_end_cap=False,
             file_name=None,
             stl_scale=1.0,
-            sig_figs=6
+            sig_figs=6,
+            binary=False,
+            chunk_size=STL_CHUNK_SIZE
     ) -> None:
         """
         Converts one or more 2D PolyLines into a properly formatted ASCII STL file.
+        If `binary` is True, the same facets are written to a binary STL file instead.
+        Facets are written in blocks of at most `chunk_size` facets, so memory use does not grow with the file size.
         """
 
         # Wrap single PolyLine in list if necessary
@@ -255,42 +437,83 @@ class PolyLine:
 
         # Write STL file
         file_path = f"{file_directory}/{file_name}.stl"
+        if binary:
+            cls.create_binary_stl_file(poly_lines, height, file_path, file_name, create_end_cap, stl_scale, chunk_size)
+            return
+
         with open(file_path, "w") as f:
             f.write(f"solid {file_name}\n")
+            for line_1, line_2, reverse in cls.generate_stl_line_pairs(poly_lines, height, create_end_cap, stl_scale):
+                for text in cls.generate_stl_vertices_between_lines(line_1, line_2, sig_figs, reverse, chunk_size):
+                    f.write(text)
+            f.write("endsolid\n")
 
-            for poly_line in poly_lines:
-                # Validate polyline length
-                if len(poly_line.xx) < 2 or len(poly_line.yy) < 2:
-                    raise ValueError("PolyLine must have at least 2 points")
-
-                # Create top and bottom layers
-                line_pos = deepcopy(poly_line).set_all_z(height / 2).scale_all(stl_scale)
-                line_neg = deepcopy(poly_line).set_all_z(-height / 2).scale_all(stl_scale)
-
-                # Create vertical connection between line_1 and line_2
-                f.write(cls.create_stl_vertices_between_lines(line_pos, line_neg, sig_figs))
 
-                # End step if end caps should not be generated
-                if not create_end_cap:
-                    continue
+    @classmethod
+    def create_binary_stl_file(
+            cls,
+            poly_lines,
+            height: float,
+            file_path: str,
+            file_name: str,
+            create_end_cap=False,
+            stl_scale=1.0,
+            chunk_size=STL_CHUNK_SIZE
+    ) -> None:
+        """Writes the facets of one or more 2D PolyLines to a binary STL file, one structured array per block"""
+
+        # Binary STL layout: 80 byte header, facet count, and 50 bytes per facet
+        facet_dtype = np.dtype([('normal', '<f4', (3,)), ('vertices', '<f4', (3, 3)), ('attribute', '<u2')])
+        header = f"binary STL {file_name}".encode('ascii', 'replace')[:80].ljust(80, b' ')
+        num_facets = 0
+        with open(file_path, "wb") as f:
+            f.write(header)
+            f.write(np.uint32(0).tobytes())  # placeholder for the facet count
+            for line_1, line_2, reverse in cls.generate_stl_line_pairs(poly_lines, height, create_end_cap, stl_scale):
+                for normals, triangles in cls.generate_facets_between_lines(line_1, line_2, reverse, chunk_size):
+                    facets = np.zeros(len(normals), dtype=facet_dtype)
+                    facets['normal'] = normals
+                    facets['vertices'] = triangles
+                    facets.tofile(f)
+                    num_facets += len(facets)
+                    add_count('stl_facets', len(facets))
+            f.seek(len(header))
+            f.write(np.uint32(num_facets).tobytes())
 
-                # Create end caps for line 1 and line 2
-                print('Creating end caps')
-                for line, reverse in [(line_pos, True), (line_neg, False)]:  # , (line_neg, True)
-                    centre = len(line) // 2
-                    half_1 = line[0:centre]
-                    half_2 = line[centre:-1][::-1]
-                    f.write(cls.create_stl_vertices_between_lines(half_1, half_2, sig_figs, reverse=reverse))
 
-            f.write("endsolid\n")
+    @classmethod
+    def generate_stl_line_pairs(cls, poly_lines, height: float, create_end_cap=False, stl_scale=1.0):
+        """Yields the pairs of 3D PolyLines (and their reverse flag) that are connected by STL facets"""
+        for poly_line in poly_lines:
+            # Validate polyline length
+            if len(poly_line) < 2:
+                raise ValueError("PolyLine must have at least 2 points")
+
+            # Create top and bottom layers
+            line_pos = deepcopy(poly_line).set_all_z(height / 2).scale_all(stl_scale)
+            line_neg = deepcopy(poly_line).set_all_z(-height / 2).scale_all(stl_scale)
+
+            # Create vertical connection between line_1 and line_2
+            yield line_pos, line_neg, False
+
+            # End step if end caps should not be generated
+            if not create_end_cap:
+                continue
 
+            # Create end caps for line 1 and line 2
+            logger.debug('Creating end caps')
+            for line, reverse in [(line_pos, True), (line_neg, False)]:
+                centre = len(line) // 2
+                half_1 = line[0:centre]
+                half_2 = line[centre:-1][::-1]
+                yield half_1, half_2, reverse
 
 
     @classmethod
-    def create_stl_vertices_between_lines(cls, line_1, line_2, sig_figs:float, reverse=False) -> str:
+    def generate_facets_between_lines(cls, line_1, line_2, reverse=False, chunk_size=STL_CHUNK_SIZE):
         """
-        Generates STL facet vertex strings between two PolyLine instances.
-        Floating-point values are formatted in scientific notation with `sig_figs` digits.
+        Yields the unit normals (n x 3) and vertices (n x 3 x 3) of the facets between two PolyLines.
+        Each block holds at most `chunk_size` facets (but at least 2).
         """
 
         # Check validity of input
@@ -299,87 +522,79 @@ class PolyLine:
         elif abs(len(line_1) - len(line_2)) > 1:
             raise ValueError("Lines can differ in their number of coordinates by at most 1.")
 
-        # Determine if end point requires special treatment
-        if len(line_1) > len(line_2):
-            odd_end = line_1.pop()
-        elif len(line_2) > len(line_1):
-            odd_end = line_2.pop()
-        else:  # The lines are of equal length
-            odd_end = None
-
-        # Prepare format string for scientific notation
-        fmt = f"{{:.{sig_figs}e}}"
-
-        # Helper for STL vertex and normal line formatting
-        def fmt_line(label, values):
-            return f"      {label} " + " ".join(fmt.format(v) for v in values) + "\n"
-
-        # Initialise string to contain vertices
-        vertices = ''
+        # Separate the odd end point of the longer line
+        xyz_1, xyz_2 = line_1.xyz, line_2.xyz
+        odd_end = None
+        if len(xyz_1) > len(xyz_2):
+            xyz_1, odd_end = xyz_1[:-1], xyz_1[-1]
+        elif len(xyz_2) > len(xyz_1):
+            xyz_2, odd_end = xyz_2[:-1], xyz_2[-1]
 
         # ----------------------------------------------------------------------------------------- #
-        #   A --- D   Use the i and j indices to create a quadruplet of coordinates as on the left
-        #   | \ / |   There should be two triangles: ABC and CDA
-        #   |  X  |   These two triangles combined fill the rectangle ABCD
-        #   | / \ |   By iterating over all quadruplets of coordinates, a full STL file is created
-        #   B --- C   Each triangle also requires the computation of the facet normal
+        #   A --- D   Each quadruplet of coordinates is split into the two triangles ABC and CDA
+        #   | \ / |   A block of quadruplets shares its first and last coordinates with its neighbours
+        #   |  X  |   The facets are yielded in the same order as they appear in the STL file
+        #   | / \ |
+        #   B --- C
         # ----------------------------------------------------------------------------------------- #
 
-        for i in range(len(line_1.xx) - 1):
-            # Generate the index for the neighbouring coordinate
-            j = i + 1
-
-            # Extract coordinates
-            a_xyz = (line_1.xx[i], line_1.yy[i], line_1.zz[i])
-            b_xyz = (line_2.xx[i], line_2.yy[i], line_2.zz[i])
-            c_xyz = (line_2.xx[j], line_2.yy[j], line_2.zz[j])
-            d_xyz = (line_1.xx[j], line_1.yy[j], line_1.zz[j])
+        quads_per_chunk = max(1, chunk_size // 2)
+        for start in range(0, len(xyz_1) - 1, quads_per_chunk):
+            stop = min(start + quads_per_chunk, len(xyz_1) - 1) + 1
+            a_xyz, b_xyz = xyz_1[start:stop - 1], xyz_2[start:stop - 1]
+            c_xyz, d_xyz = xyz_2[start + 1:stop], xyz_1[start + 1:stop]
 
             # Swap the coordinates to ensure normals point outwards
             if reverse:
                 a_xyz, c_xyz = c_xyz, a_xyz
 
+            triangles = np.stack((np.stack((a_xyz, b_xyz, c_xyz), axis=1),
+                                  np.stack((c_xyz, d_xyz, a_xyz), axis=1)), axis=1).reshape(-1, 3, 3)
+            yield cls.calculate_face_normals(triangles), triangles
 
-            # Compute normals
-            abc_norm = cls.calculate_face_normal(a_xyz, b_xyz, c_xyz)
-            cda_norm = cls.calculate_face_normal(c_xyz, d_xyz, a_xyz)
-
-            # Write two triangles (ABC, CDA)
-            for norm, tri in [(abc_norm, [a_xyz, b_xyz, c_xyz]), (cda_norm, [c_xyz, d_xyz, a_xyz])]:
-                vertices += f"   facet normal {fmt.format(norm[0])} {fmt.format(norm[1])} {fmt.format(norm[2])}\n"
-                vertices += "      outer loop\n"
-                for vertex in tri:
-                    vertices += (fmt_line("vertex", vertex))
-                vertices += "      endloop\n"
-                vertices += "   endfacet\n"
-
-        # ----------------------------------------------------------------------------------------- #
-        #    A      If the lines are of uneven length, the end point needs special treatment
-        #    | \    We simply include it by closing it in the last triangle
-        #    |  C   We access points A and B as the last elements in the line 1 and line 2 list
-        #    | /    Once again the points are connected counter-clockwise (ABC)
-        #    B      Note that this is intended for end caps of closed loop surfaces
-        # ----------------------------------------------------------------------------------------- #
-
+        # Close the end point of the longer line with the triangle ABC
         if odd_end is not None:
-            # Access the coordinates and generate the normal vector
-            a_xyz = (line_1.xx[-1], line_1.yy[-1], line_1.zz[-1])
-            b_xyz = (line_2.xx[-1], line_2.yy[-1], line_2.zz[-1])
-            c_xyz = (odd_end.x, odd_end.y, odd_end.z)
-            tri = [a_xyz, b_xyz, c_xyz]
-            norm = cls.calculate_face_normal(a_xyz, b_xyz, c_xyz)
+            triangles = np.stack((xyz_1[-1], xyz_2[-1], odd_end))[np.newaxis]
+            yield cls.calculate_face_normals(triangles), triangles
+
 
-            # Write the end vertices to the output
-            vertices += f"   facet normal {fmt.format(norm[0])} {fmt.format(norm[1])} {fmt.format(norm[2])}\n"
-            vertices += "      outer loop\n"
-            for vertex in tri:
-                vertices += (fmt_line("vertex", vertex))
-            vertices += "      endloop\n"
-            vertices += "   endfacet\n"
+    @classmethod
+    def calculate_facets_between_lines(cls, line_1, line_2, reverse=False) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the unit normals (n x 3) and the vertices (n x 3 x 3) of all facets between two PolyLines"""
+        blocks = list(cls.generate_facets_between_lines(line_1, line_2, reverse))
+        if not blocks:
+            return np.empty((0, 3)), np.empty((0, 3, 3))
+        return np.concatenate([n for n, _ in blocks]), np.concatenate([t for _, t in blocks])
 
-        return vertices
 
+    @classmethod
+    def generate_stl_vertices_between_lines(cls, line_1, line_2, sig_figs:int, reverse=False,
+                                            chunk_size=STL_CHUNK_SIZE):
+        """
+        Yields STL facet vertex strings between two PolyLine instances in blocks of at most `chunk_size` facets.
+        Floating-point values are formatted in scientific notation with `sig_figs` digits.
+        """
 
+        # Template of a single facet in scientific notation (the normal followed by three vertices)
+        value = f"%.{sig_figs}e"
+        facet_template = (f"   facet normal {value} {value} {value}\n"
+                          f"      outer loop\n"
+                          f"      vertex {value} {value} {value}\n"
+                          f"      vertex {value} {value} {value}\n"
+                          f"      vertex {value} {value} {value}\n"
+                          f"      endloop\n"
+                          f"   endfacet\n")
 
+        for normals, triangles in cls.generate_facets_between_lines(line_1, line_2, reverse, chunk_size):
+            rows = np.concatenate((normals, triangles.reshape(-1, 9)), axis=1).tolist()
+            add_count('stl_facets', len(rows))
+            yield "".join([facet_template % tuple(row) for row in rows])
 
 
+    @classmethod
+    def create_stl_vertices_between_lines(cls, line_1, line_2, sig_figs:float, reverse=False) -> str:
+        """
+        Generates STL facet vertex strings between two PolyLine instances.
+        Floating-point values are formatted in scientific notation with `sig_figs` digits.
+        """
+        return "".join(cls.generate_stl_vertices_between_lines(line_1, line_2, sig_figs, reverse))
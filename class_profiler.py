@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+
+
+class Profiler:
+    """
+    Records the wall time of named stages and the totals of named counters (e.g. solver iterations).
+    Only the profiler stored in `Profiler.active` receives records, so instrumented code does nothing else while
+    profiling is disabled. Use the profiler as a context manager to activate it for a block of code.
+    """
+
+    active: 'Profiler | None' = None    # profiler receiving all records, None while profiling is disabled
+
+
+    def __init__(self):
+        """Initialises an empty profiler. Times are stored in seconds relative to its creation"""
+        self.origin = perf_counter()
+        self.stages = list()            # (name, category, start, duration, thread id) of every finished stage
+        self.counters = dict()          # running total of every counter
+        self.counter_events = list()    # (name, time, running total) of every counter update
+        self.previous = None            # profiler that was active before this one was started
+
+
+    def __repr__(self):
+        return (f"Profiler("
+                f"stages={len(self.stages)}, "
+                f"counters={self.counters})")
+
+
+    def __enter__(self):
+        self.start()
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+    # ----- Recording ----------------------------------------------------------------------------------------------- #
+
+    def start(self) -> None:
+        """Makes this profiler the active profiler"""
+        self.previous = Profiler.active
+        Profiler.active = self
+
+
+    def stop(self) -> None:
+        """Restores the profiler that was active before this profiler was started"""
+        if Profiler.active is self:
+            Profiler.active = self.previous
+        self.previous = None
+
+
+    def record_stage(self, name:str, start:float, end:float, category='stage') -> None:
+        """Records a finished stage from its start and end times (as returned by time.perf_counter)"""
+        self.stages.append((name, category, start - self.origin, end - start, threading.get_ident()))
+
+
+    @contextmanager
+    def stage(self, name:str, category='stage'):
+        """Context manager recording the wall time of a block of code"""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(name, start, perf_counter(), category)
+
+
+    def add_count(self, name:str, value=1) -> None:
+        """Adds a value to the running total of a counter"""
+        total = self.counters.get(name, 0) + value
+        self.counters[name] = total
+        self.counter_events.append((name, perf_counter() - self.origin, total))
+
+
+    # ----- Summaries ----------------------------------------------------------------------------------------------- #
+
+    def summarise_stages(self) -> dict:
+        """Returns the number of calls and the total, mean and maximum wall time of every stage"""
+        summary = dict()
+        for name, category, _, duration, _ in self.stages:
+            entry = summary.setdefault(name, {'category': category, 'calls': 0, 'total_s': 0.0, 'max_s': 0.0})
+            entry['calls'] += 1
+            entry['total_s'] += duration
+            entry['max_s'] = max(entry['max_s'], duration)
+        for entry in summary.values():
+            entry['mean_s'] = entry['total_s'] / entry['calls']
+        return dict(sorted(summary.items(), key=lambda item: item[1]['total_s'], reverse=True))
+
+
+    def to_dict(self) -> dict:
+        """Returns the summary, the counters, and every recorded stage as a JSON serialisable dictionary"""
+        return {
+            'summary': self.summarise_stages(),
+            'counters': dict(self.counters),
+            'stages': [{'name': name, 'category': category, 'start_s': start, 'duration_s': duration}
+                       for name, category, start, duration, _ in self.stages]}
+
+
+    # ----- File Handling ------------------------------------------------------------------------------------------- #
+
+    def save_json(self, file_name:str) -> None:
+        """Saves the recorded stages and counters to a JSON file"""
+        with open(file_name, 'w', encoding='utf-8') as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+
+    def save_chrome_trace(self, file_name:str) -> None:
+        """Saves the recorded stages and counters in the Chrome trace event format (chrome://tracing or Perfetto)"""
+        process_id = os.getpid()
+        events = [{'name': name, 'cat': category, 'ph': 'X', 'ts': start * 1e6, 'dur': duration * 1e6,
+                   'pid': process_id, 'tid': thread_id}
+                  for name, category, start, duration, thread_id in self.stages]
+        events += [{'name': name, 'ph': 'C', 'ts': time * 1e6, 'pid': process_id, 'args': {name: total}}
+                   for name, time, total in self.counter_events]
+        with open(file_name, 'w', encoding='utf-8') as file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
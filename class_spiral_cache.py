@@ -0,0 +1,83 @@
+from collections import OrderedDict
+
+
+class SpiralCache:
+    """
+    Least-recently-used cache of solved logarithmic spirals.
+
+    A spiral fit only depends on the turning angle 'theta = bc_rad - ac_rad' and on the angle 'ab_rad - ac_rad'
+    of the chord relative to vector AC. These normalised angles are unchanged by translating, rotating and scaling
+    the points A and B, so the incident angle 'β' solved for one spiral is reused as is for all similar spirals,
+    without solving them again. Spirals whose angles differ by less than the resolution share an entry, so the
+    resolution bounds the error of a reused 'β' (the default is far below the solver accuracy).
+    """
+
+
+    def __init__(self, max_size=4096, resolution=1e-12):
+        """Initialises an empty cache holding at most `max_size` entries quantised to `resolution` radians"""
+        if max_size < 1:
+            raise ValueError(f"max_size must be at least 1, got {max_size}")
+        if resolution <= 0:
+            raise ValueError(f"resolution must be positive, got {resolution}")
+        self.max_size = max_size
+        self.resolution = resolution
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+    def __len__(self):
+        return len(self.entries)
+
+
+    def __repr__(self):
+        return (f"SpiralCache("
+                f"size={len(self)}, "
+                f"max_size={self.max_size}, "
+                f"hits={self.hits}, "
+                f"misses={self.misses}, "
+                f"evictions={self.evictions})")
+
+
+    def make_key(self, theta:float, chord_rad:float) -> tuple[int, int]:
+        """Quantises the turning angle and the relative chord angle into a hashable key"""
+        return round(theta / self.resolution), round(chord_rad / self.resolution)
+
+
+    def get(self, key:tuple[int, int]) -> float | None:
+        """Returns the cached incident angle 'β' for a key, or None if the key is not cached"""
+        beta = self.entries.get(key)
+        if beta is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return beta
+
+
+    def put(self, key:tuple[int, int], beta:float) -> None:
+        """Stores an incident angle 'β' and evicts the least recently used entry if the cache is full"""
+        self.entries[key] = beta
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+
+    def clear(self) -> None:
+        """Removes all entries and resets the statistics"""
+        self.entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+
+    def stats(self) -> dict:
+        """Returns the hit, miss and eviction statistics of the cache"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0}
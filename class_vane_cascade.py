@@ -0,0 +1,77 @@
+from copy import deepcopy
+
+import numpy as np
+
+from class_coordinate import Coordinate
+from class_poly_line import PolyLine
+from func_profiling import profiled
+
+
+class VaneCascade:
+    """
+    Cascade of identical vanes, stored as a single base vane and one translation per vane instance.
+    The geometry of an instance is only created when it is requested, e.g. by a plot or an STL export.
+    """
+
+    def __init__(self, base_vane, num_vanes:int, horizontal_pitch:float = None, vertical_pitch:float = None):
+        """Initialises a cascade of `num_vanes` instances of a LogarithmicVane spaced by its pitches"""
+        horizontal_pitch = base_vane.horizontal_pitch if horizontal_pitch is None else horizontal_pitch
+        vertical_pitch = base_vane.vertical_pitch if vertical_pitch is None else vertical_pitch
+
+        self.base_vane = base_vane
+        self.num_vanes = num_vanes
+        self.horizontal_pitch = horizontal_pitch
+        self.vertical_pitch = vertical_pitch
+
+        # Translation of each vane instance (num_vanes x 3)
+        indices = np.arange(num_vanes)
+        self.offsets = np.column_stack((indices * horizontal_pitch, indices * vertical_pitch, np.zeros(num_vanes)))
+
+
+    def __len__(self):
+        """Returns the number of vanes in the cascade"""
+        return self.num_vanes
+
+
+    def __repr__(self):
+        return (f"VaneCascade("
+                f"num_vanes={self.num_vanes}, "
+                f"horizontal_pitch={self.horizontal_pitch}, "
+                f"vertical_pitch={self.vertical_pitch})")
+
+
+    @profiled
+    def get_poly_line(self, attribute:str, index:int, tolerance:float = None, symmetric=False) -> PolyLine:
+        """
+        Returns a translated copy of one of the base vane PolyLines (e.g. 'pl_outline') for a vane instance.
+        If `tolerance` is given, the PolyLine is simplified first (see PolyLine.simplify). The simplification is
+        cached on the base vane, so it is shared by all vane instances.
+        """
+        base_poly_line:PolyLine = getattr(self.base_vane, attribute)
+        if tolerance is not None:
+            base_poly_line = base_poly_line.simplify(tolerance, symmetric)
+        xyz = base_poly_line.xyz + np.where(base_poly_line.axes, self.offsets[index], 0)
+        return PolyLine.from_array(xyz, axes=base_poly_line.axes, label=base_poly_line.label,
+                                   style=base_poly_line.style)
+
+
+    def generate_poly_lines(self, attribute:str, tolerance:float = None, symmetric=False):
+        """Yields the translated (and optionally simplified) PolyLines of all vane instances one at a time"""
+        for index in range(self.num_vanes):
+            yield self.get_poly_line(attribute, index, tolerance, symmetric)
+
+
+    @profiled
+    def get_coordinate(self, attribute:str, index:int) -> Coordinate:
+        """Returns a translated copy of one of the base vane coordinates (e.g. 'end_point_a') for a vane instance"""
+        x_offset, y_offset, z_offset = self.offsets[index]
+        return deepcopy(getattr(self.base_vane, attribute)).offset_by_xyz(x=x_offset, y=y_offset, z=z_offset)
+
+
+    @profiled
+    def materialise_vane(self, index:int):
+        """Returns a full, independent copy of the LogarithmicVane at the position of a vane instance"""
+        x_offset, y_offset, z_offset = self.offsets[index]
+        vane = deepcopy(self.base_vane)
+        vane.offset_by_xyz(x=x_offset, y=y_offset, z=z_offset)
+        return vane
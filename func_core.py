@@ -6,10 +6,21 @@ from class_poly_line import PolyLine
 from class_logarithmic_vane import LogarithmicVane
 from copy import deepcopy
 import numpy as np
+from func_logging import get_logger
 
+logger = get_logger(__name__)
 
-def generate_log_spiral_from_points(a_xy:tuple[float, float], b_xy:tuple[float, float], ac_deg:float, bc_deg:float):
-    """Fits a logarithmic spiral to a start and end point at a given start and end angle"""
+
+def generate_log_spiral_from_points(
+        a_xy:tuple[float, float],
+        b_xy:tuple[float, float],
+        ac_deg:float,
+        bc_deg:float,
+        file_directory=None) -> LogarithmicSpiral:
+    """
+    Fits a logarithmic spiral to a start and end point at a given start and end angle.
+    If a file directory is given, the plot and the spiral equations are saved to it.
+    """
 
 
     chord_line_spiral = Line
@@ -30,18 +41,36 @@ def generate_log_spiral_from_points(a_xy:tuple[float, float], b_xy:tuple[float,
     plot_xy_coordinates(origin_triangle, style='-o', label='origin')
 
     # Plot the general graph elements (title, axis, etc.) and print spiral equations
-    plot_graph_elements()
-    print(s)
+    plot_graph_elements(file_name='spiral' if file_directory else None, file_directory=file_directory)
+    logger.info('%s', s)
+    if file_directory:
+        LogarithmicSpiral.save_spiral_equations([s], f"{file_directory}/equations.csv")
+    return s
 
 
-def generate_log_spiral_from_chord(chord:float, stretch:float, ac_deg:float, bc_deg:float):
+def generate_log_spiral_from_chord(
+        chord:float,
+        stretch:float,
+        ac_deg:float,
+        bc_deg:float,
+        file_directory=None) -> LogarithmicSpiral:
     """Fits a logarithmic spiral to a specific chord and stretch at a given start and end angle"""
     a_xy, b_xy = calculate_points_from_chord(chord, stretch)
-    generate_log_spiral_from_points(a_xy, b_xy, ac_deg, bc_deg)
+    return generate_log_spiral_from_points(a_xy, b_xy, ac_deg, bc_deg, file_directory=file_directory)
 
 
-def generate_diffuser(inlet_width:float, outlet_width:float, chord:float, stretch:float, ac_deg:float, bc_deg:float):
-    """Creates the geometry of a curved diffuser from logarithmic spirals"""
+def generate_diffuser(
+        inlet_width:float,
+        outlet_width:float,
+        chord:float,
+        stretch:float,
+        ac_deg:float,
+        bc_deg:float,
+        file_directory=None) -> list[LogarithmicSpiral]:
+    """
+    Creates the geometry of a curved diffuser from logarithmic spirals.
+    The spiral equations are saved to the file directory (or the working directory) and the plot is saved with them.
+    """
     coordinate_lines = diffuser_coordinates(inlet_width, outlet_width, stretch, chord)
     spirals = list()
     for line in coordinate_lines:
@@ -52,12 +81,13 @@ def generate_diffuser(inlet_width:float, outlet_width:float, chord:float, stretc
         spirals.append(s)
     LogarithmicSpiral.tabulate_spirals(spirals)
     for s in spirals:
-        print(s)
+        logger.info('%s', s)
     for s in spirals:
         s_xx, s_yy = s.generate_spiral_coordinates()
         plot_xy_coordinates(s_xx, s_yy, s.style, s.name)
-    plot_graph_elements()
-    LogarithmicSpiral.save_spiral_equations(spirals, "./equations.csv")
+    plot_graph_elements(file_name='diffuser' if file_directory else None, file_directory=file_directory)
+    LogarithmicSpiral.save_spiral_equations(spirals, f"{file_directory or '.'}/equations.csv")
+    return spirals
 
 
 def generate_vane(
@@ -69,9 +99,14 @@ def generate_vane(
         ac_deg:float,
         bc_deg:float,
         show_plot=False,
-        file_directory=None) -> LogarithmicVane:
-    """Creates the geometry of a curved diffuser from logarithmic spirals"""
-    print('\nGenerating an expansion vane from logarithmic spirals')
+        file_directory=None,
+        num_points=90,
+        max_sagitta=None) -> LogarithmicVane:
+    """
+    Creates the geometry of an expansion vane from logarithmic spirals.
+    If a file directory is given, the spiral equations and the vane outline are saved to it (with or without plots).
+    """
+    logger.info('Generating an expansion vane from logarithmic spirals')
 
     # Instantiate a vane instance from the input parameters
     vane = LogarithmicVane(
@@ -81,10 +116,14 @@ def generate_vane(
         stretch_lower=stretch,
         thickness=thickness,
         ac_deg=ac_deg,
-        bc_deg=bc_deg)
+        bc_deg=bc_deg,
+        num_points=num_points,
+        max_sagitta=max_sagitta)
 
 
-    # Plot the generated vane
+    # Save and plot the generated vane
+    if file_directory:
+        vane.save_geometry(file_directory)
     if show_plot:
         vane.plot_components(file_directory=file_directory)
         vane.plot_with_gradient()
@@ -109,14 +148,20 @@ def  generate_vane_cascade(
         stl_height = 1,
         stl_scale=1,
         show_plot=False,
-        show_channel=False):
+        show_channel=False,
+        stl_binary=False,
+        num_points=90,
+        max_sagitta=None,
+        preview_tolerance=None,
+        stl_tolerance=None):
 
     """Generates a cascade of expansion vanes from a single logarithmic expansion vane"""
-    print('\nGenerating a expansion vane cascade from a singe logarithmic vane')
+    logger.info('Generating a expansion vane cascade from a singe logarithmic vane')
 
-    vane = generate_vane(horizontal_pitch, vertical_pitch, chord, stretch, thickness, ac_deg, bc_deg, show_plot)
+    vane = generate_vane(horizontal_pitch, vertical_pitch, chord, stretch, thickness, ac_deg, bc_deg, show_plot,
+                         num_points=num_points, max_sagitta=max_sagitta)
 
-    vane.generate_cascade(
+    return vane.generate_cascade(
         inlet_angle_offset_deg=inlet_angle_offset_deg,
         outlet_angle_offset_deg=outlet_angle_offset_deg,
         upstream_channel_len=upstream_channel_length,
@@ -126,7 +171,10 @@ def  generate_vane_cascade(
         stl_height=stl_height,
         stl_scale=stl_scale,
         show_plot=show_plot,
-        show_channel=show_channel)
+        show_channel=show_channel,
+        stl_binary=stl_binary,
+        preview_tolerance=preview_tolerance,
+        stl_tolerance=stl_tolerance)
 
 
 
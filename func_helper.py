@@ -3,11 +3,15 @@ from copy import deepcopy
 
 # section to import various standard libraries
 
-import matplotlib.pyplot as plt     # import graphing library
 import numpy as np                  # importing commonly used mathematical functions
-import pandas as pd
 from numpy import sqrt              # import various functions from numpy library
 from class_line import *            # Import the line class
+from func_logging import get_logger # import the logger factory of the package
+from func_plotting import get_pyplot, show_figure  # import matplotlib only when plotting
+
+logger = get_logger(__name__)
+
+VERTICALITY_THRESHOLD = 10e15  # lines steeper than this in either direction are vertical, e.g. tan(+-pi/2)
 
 
 # ----- Additional Plotting Functions -------------------------------------------------------------------------------- #
@@ -34,7 +38,7 @@ def plot_xy_coordinates(x:list, y=None, style='-', label=None):
         x = x
         if len(x) != len(y):
             raise ValueError("x and y must have the same length.")
-    plt.plot(x, y, style, label=label)
+    get_pyplot().plot(x, y, style, label=label)
 
 
 def plot_graph_elements(
@@ -50,6 +54,7 @@ def plot_graph_elements(
 
 
     # Use the current figure and axes
+    plt = get_pyplot()
     fig = plt.gcf()
     ax = plt.gca()
 
@@ -101,10 +106,10 @@ def plot_graph_elements(
 
     if file_name and file_directory:
         file_location = f'{file_directory}/{file_name}'.replace('//', '/')
-        print(f'saving file to {file_location}')
+        logger.info('saving file to %s', file_location)
         fig.savefig(file_location, bbox_inches='tight', dpi=300)
 
-    plt.show()
+    show_figure(fig)
 
 
 
@@ -118,6 +123,11 @@ def calculate_points_from_chord(chord: float, stretch:float) -> tuple[tuple[floa
     return a, b
 
 
+def is_vertical(slopes):
+    """Returns True where a slope is steep enough (in either direction) to be treated as a vertical line"""
+    return abs(slopes) > VERTICALITY_THRESHOLD
+
+
 def find_intercept(
         coordinate_1:Coordinate,
         slope_1:float,
@@ -129,19 +139,16 @@ def find_intercept(
         x_1, y_1, a_1 = coordinate_1.x, coordinate_1.y, slope_1
         x_2, y_2, a_2 = coordinate_2.x, coordinate_2.y, slope_2
 
-        # Set a verticality threshold
-        verticality_threshold = 10e15
-
         if slope_1 == slope_2:  # Lines are parallel
             raise ValueError('Slopes are equal. The lines are parallel or coincident. No intercept can be found.')
-        elif slope_1 > verticality_threshold and slope_2 > verticality_threshold:  # Both lines are vertical
+        elif is_vertical(slope_1) and is_vertical(slope_2):  # Both lines are vertical
             raise ValueError('Both slopes are vertical. No intercept can be found.')
-        elif slope_1 > verticality_threshold:  # Line 1 is vertical
+        elif is_vertical(slope_1):  # Line 1 is vertical
             x_3 = x_1
             b_2 = y_2 - slope_2 * x_2
             y_3 = slope_2 * x_3 + b_2
             return Coordinate(x=x_3, y=y_3)
-        elif slope_2 > verticality_threshold:  # Line 2 is vertical
+        elif is_vertical(slope_2):  # Line 2 is vertical
             x_3 = x_2
             b_1 = y_1 - slope_1 * x_1
             y_3 = slope_1 * x_3 + b_1
@@ -154,6 +161,30 @@ def find_intercept(
             return Coordinate(x=x_3, y=y_3)
 
 
+def find_intercepts(xy_1, slopes_1, xy_2, slopes_2) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Finds the intercepts of many pairs of lines given their slopes and a point (n x 2) on each line.
+    Returns the intercepts (n x 2) and a mask of the pairs that intercept. Parallel lines give NaN instead of raising.
+    """
+    xy_1, xy_2 = np.atleast_2d(np.asarray(xy_1, dtype=float)), np.atleast_2d(np.asarray(xy_2, dtype=float))
+    x_1, y_1, a_1 = xy_1[:, 0], xy_1[:, 1], np.asarray(slopes_1, dtype=float)
+    x_2, y_2, a_2 = xy_2[:, 0], xy_2[:, 1], np.asarray(slopes_2, dtype=float)
+
+    # Classify the pairs of lines (with the same rules as find_intercept)
+    vertical_1, vertical_2 = is_vertical(a_1), is_vertical(a_2)
+    valid = (a_1 != a_2) & ~(vertical_1 & vertical_2)
+
+    # Intercept of two sloped lines, or of a vertical line with a sloped line
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        b_1 = y_1 - a_1 * x_1
+        b_2 = y_2 - a_2 * x_2
+        x_3 = np.where(vertical_1, x_1, np.where(vertical_2, x_2, (b_2 - b_1) / (a_1 - a_2)))
+        y_3 = np.where(vertical_1, a_2 * x_3 + b_2, a_1 * x_3 + b_1)
+    intercepts = np.column_stack((x_3, y_3))
+    intercepts[~valid] = np.nan
+    return intercepts, valid
+
+
 # ----- Diffuser Related Functions ----------------------------------------------------------------------------------- #
 
 def diffuser_coordinates(
@@ -191,11 +222,11 @@ def diffuser_coordinates(
     b_outer = Coordinate(x=0, y=b_y_outer)
     ab_outer = Line(start=a_outer, end=b_outer, label='outer')
 
-    # Calculate and print the stretch of the spirals to the console
+    # Calculate and log the stretch of the spirals
     stretch_inner = b_y_inner / a_x_inner
     stretch_outer = b_y_outer / a_x_outer
-    print("\nstretch of inner, centre, and outer curves respectively:")
-    print(stretch_inner, stretch_centre, stretch_outer)
+    logger.info("stretch of inner, centre, and outer curves respectively: %s %s %s",
+                stretch_inner, stretch_centre, stretch_outer)
 
     return [ab_inner, ab_centre, ab_outer]
 
@@ -0,0 +1,155 @@
+# Functions to validate and run many spiral, diffuser, vane and cascade jobs listed in a job file
+import inspect
+import json
+import os
+import re
+import time
+import tomllib
+from concurrent.futures import ProcessPoolExecutor
+
+from func_core import generate_log_spiral_from_points, generate_log_spiral_from_chord
+from func_core import generate_diffuser, generate_vane, generate_vane_cascade
+from func_logging import quiet, set_quiet
+from func_plotting import set_headless
+
+# Functions run by each job type. Their keyword arguments are the parameters of a job
+JOB_FUNCTIONS = {
+    'spiral': generate_log_spiral_from_points,
+    'spiral_from_chord': generate_log_spiral_from_chord,
+    'diffuser': generate_diffuser,
+    'vane': generate_vane,
+    'cascade': generate_vane_cascade}
+
+RESERVED_PARAMETERS = ('file_directory',)       # parameters set by the job runner
+JOB_NAME_PATTERN = re.compile(r'[A-Za-z0-9_.-]+')  # job names are used as directory names
+
+
+# ----- Job Files ---------------------------------------------------------------------------------------------------- #
+
+def load_job_file(file_name:str) -> list[dict]:
+    """
+    Reads the jobs of a JSON or TOML job file. Every job is a table with a 'type', an optional 'name', and the
+    parameters of its job function. Parameters listed under 'defaults.<type>' apply to every job of that type.
+    """
+    if file_name.endswith('.toml'):
+        with open(file_name, 'rb') as file:
+            content = tomllib.load(file)
+    elif file_name.endswith('.json'):
+        with open(file_name, encoding='utf-8') as file:
+            content = json.load(file)
+    else:
+        raise ValueError(f"Job files must be .json or .toml files, got {file_name}")
+
+    defaults = content.get('defaults', {})
+    unknown_types = set(defaults) - set(JOB_FUNCTIONS)
+    if unknown_types:
+        raise ValueError(f"Defaults are given for unknown job types: {sorted(unknown_types)}")
+    return [dict(defaults.get(job.get('type'), {}), **job) for job in content.get('jobs', [])]
+
+
+def validate_jobs(jobs:list[dict]) -> list[dict]:
+    """
+    Checks every job before any job is run and returns them as dictionaries with an index, name, type and parameters.
+    All problems are collected and raised together in a single ValueError.
+    """
+    errors, validated_jobs, names = list(), list(), set()
+    for index, job in enumerate(jobs):
+        job = dict(job)
+        job_type = job.pop('type', None)
+        name = str(job.pop('name', f"{index:03d}_{job_type}"))
+        if job_type not in JOB_FUNCTIONS:
+            errors.append(f"Job {index} ({name}) has an unknown type '{job_type}'. Valid: {sorted(JOB_FUNCTIONS)}")
+            continue
+        if not JOB_NAME_PATTERN.fullmatch(name):
+            errors.append(f"Job {index} has an invalid name '{name}' (use letters, digits, '_', '.' and '-')")
+        elif name in names:
+            errors.append(f"Job {index} has the same name as a previous job: '{name}'")
+        names.add(name)
+
+        # Check the parameters against the signature of the job function
+        signature = inspect.signature(JOB_FUNCTIONS[job_type])
+        reserved = set(job) & set(RESERVED_PARAMETERS)
+        if reserved:
+            errors.append(f"Job {index} ({name}) sets parameters reserved for the job runner: {sorted(reserved)}")
+            continue
+        try:
+            signature.bind(**job)
+        except TypeError as error:
+            errors.append(f"Job {index} ({name}): {error}")
+            continue
+        for parameter, value in job.items():
+            if signature.parameters[parameter].annotation is float and \
+                    (isinstance(value, bool) or not isinstance(value, (int, float))):
+                errors.append(f"Job {index} ({name}): parameter '{parameter}' must be a number, got {value!r}")
+        validated_jobs.append({'index': index, 'name': name, 'type': job_type, 'parameters': job})
+
+    if errors:
+        raise ValueError(f"{len(errors)} invalid job(s):\n" + "\n".join(errors))
+    return validated_jobs
+
+
+# ----- Job Execution ------------------------------------------------------------------------------------------------ #
+
+def run_job(job_and_directory:tuple[dict, str]) -> dict:
+    """Runs a single job in its own output directory and returns its timing and failure reason (if any)"""
+    job, output_directory = job_and_directory
+    file_directory = os.path.join(output_directory, job['name'])
+    os.makedirs(file_directory, exist_ok=True)
+    result = {'index': job['index'], 'name': job['name'], 'type': job['type'], 'directory': file_directory,
+              'time_s': 0.0, 'failure': ''}
+    start = time.perf_counter()
+    try:
+        JOB_FUNCTIONS[job['type']](**job['parameters'], file_directory=file_directory)
+    except Exception as error:  # a failing job must not stop the remaining jobs
+        result['failure'] = f"{type(error).__name__}: {error}"
+    result['time_s'] = time.perf_counter() - start
+    return result
+
+
+def initialise_job_worker() -> None:
+    """Silences the geometry pipeline of a worker process and plots without a display"""
+    set_quiet(True)
+    set_headless(True)
+
+
+def run_jobs(jobs:list[dict], output_directory:str, num_workers:int = None) -> list[dict]:
+    """Runs validated jobs across a pool of worker processes. Results are returned in the order of the jobs"""
+    num_workers = (os.cpu_count() or 1) if num_workers is None else num_workers
+    jobs_and_directories = [(job, output_directory) for job in jobs]
+
+    # Run single worker batches in the current process
+    if num_workers == 1:
+        with quiet():
+            set_headless(True)
+            return [run_job(job_and_directory) for job_and_directory in jobs_and_directories]
+
+    with ProcessPoolExecutor(max_workers=num_workers, initializer=initialise_job_worker) as executor:
+        return list(executor.map(run_job, jobs_and_directories))
+
+
+# ----- Summary Report ----------------------------------------------------------------------------------------------- #
+
+def format_summary(results:list[dict]) -> str:
+    """Returns a table of the timing and status of every job followed by the totals"""
+    name_width = max([len(result['name']) for result in results] + [4])
+    lines = [f"{'name':<{name_width}} | {'type':<17} | {'time (s)':>9} | status",
+             "-" * (name_width + 42)]
+    for result in results:
+        status = result['failure'] or 'ok'
+        lines.append(f"{result['name']:<{name_width}} | {result['type']:<17} | {result['time_s']:>9.3f} | {status}")
+    num_failed = sum(1 for result in results if result['failure'])
+    total_time = sum(result['time_s'] for result in results)
+    lines.append(f"\n{len(results)} job(s), {num_failed} failed, {total_time:.3f} s of job time")
+    return "\n".join(lines)
+
+
+def save_summary(results:list[dict], file_name:str, wall_time_s:float = None) -> None:
+    """Saves the per-job results and the totals to a JSON file"""
+    summary = {
+        'num_jobs': len(results),
+        'num_failed': sum(1 for result in results if result['failure']),
+        'job_time_s': sum(result['time_s'] for result in results),
+        'wall_time_s': wall_time_s,
+        'jobs': results}
+    with open(file_name, 'w', encoding='utf-8') as file:
+        json.dump(summary, file, indent=2)
@@ -0,0 +1,58 @@
+import logging
+import sys
+from contextlib import contextmanager
+
+
+# ----- Logger Configuration ---------------------------------------------------------------------------------------- #
+
+LOGGER_NAME = 'logarithmic_spiral_fit'      # parent of all module loggers
+QUIET_LEVEL = logging.CRITICAL + 1          # level above every message emitted by the geometry pipeline
+DEFAULT_LEVEL = logging.INFO                # level used for console output of the scripts
+
+
+class ConsoleFormatter(logging.Formatter):
+    """Formats messages like the former console output, prefixing warnings and errors with their level"""
+
+    def format(self, record):
+        message = super().format(record)
+        return f'{record.levelname}: {message}' if record.levelno >= logging.WARNING else message
+
+
+package_logger = logging.getLogger(LOGGER_NAME)
+package_logger.setLevel(DEFAULT_LEVEL)
+if not package_logger.handlers:
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(ConsoleFormatter('%(message)s'))
+    package_logger.addHandler(console_handler)
+    package_logger.propagate = False        # avoid printing every message twice if the root logger is configured
+
+
+def get_logger(module_name:str) -> logging.Logger:
+    """Returns the logger of a module as a child of the package logger, e.g. 'logarithmic_spiral_fit.func_core'"""
+    return logging.getLogger(f'{LOGGER_NAME}.{module_name}')
+
+
+def set_log_level(level) -> None:
+    """Sets the level of all module loggers (e.g. logging.DEBUG to show every calculation step)"""
+    package_logger.setLevel(level)
+
+
+def set_quiet(quiet=True) -> None:
+    """Silences all messages of the geometry pipeline, or restores the default level if `quiet` is False"""
+    package_logger.setLevel(QUIET_LEVEL if quiet else DEFAULT_LEVEL)
+
+
+def is_quiet() -> bool:
+    """Returns True if all messages of the geometry pipeline are currently silenced"""
+    return package_logger.level >= QUIET_LEVEL
+
+
+@contextmanager
+def quiet():
+    """Context manager silencing all messages of the geometry pipeline and restoring the previous level afterwards"""
+    previous_level = package_logger.level
+    package_logger.setLevel(QUIET_LEVEL)
+    try:
+        yield
+    finally:
+        package_logger.setLevel(previous_level)
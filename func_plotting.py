@@ -0,0 +1,38 @@
+import os
+
+
+# ----- Plotting Backend --------------------------------------------------------------------------------------------- #
+
+HEADLESS_ENV_VARIABLE = 'SPIRAL_FIT_HEADLESS'   # set to 1 to plot without a display and without blocking
+
+headless = os.environ.get(HEADLESS_ENV_VARIABLE, '0') not in ('', '0')
+pyplot = None                                   # matplotlib.pyplot once it has been imported by get_pyplot
+
+
+def get_pyplot():
+    """Imports matplotlib.pyplot on first use, so scripts that never plot do not pay for the import"""
+    global pyplot
+    if pyplot is None:
+        import matplotlib
+        if headless:
+            matplotlib.use('Agg')
+        import matplotlib.pyplot
+        pyplot = matplotlib.pyplot
+    return pyplot
+
+
+def set_headless(enabled=True) -> None:
+    """Plots with the non-interactive Agg backend and closes figures instead of showing them (never blocks)"""
+    global headless
+    headless = enabled
+    if enabled and pyplot is not None:
+        pyplot.switch_backend('Agg')
+
+
+def show_figure(fig=None) -> None:
+    """Shows the current figure, or closes it (or `fig`) without blocking in headless mode"""
+    plt = get_pyplot()
+    if headless:
+        plt.close(fig if fig is not None else plt.gcf())
+    else:
+        plt.show()
@@ -0,0 +1,80 @@
+import atexit
+import functools
+import os
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+
+from class_profiler import Profiler
+
+
+# ----- Profiling Configuration -------------------------------------------------------------------------------------- #
+
+PROFILE_ENV_VARIABLE = 'SPIRAL_FIT_PROFILE'     # file prefix of the profile written when the program exits
+NULL_STAGE = nullcontext()                      # stage returned while profiling is disabled
+
+
+def profiled(function):
+    """Decorator recording the wall time of every call of a function while a Profiler is active"""
+    name = function.__qualname__
+    category = function.__module__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        profiler = Profiler.active
+        if profiler is None:
+            return function(*args, **kwargs)
+        start = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            profiler.record_stage(name, start, perf_counter(), category)
+    return wrapper
+
+
+def profile_stage(name:str, category='stage'):
+    """Returns a context manager recording the wall time of a block of code while a Profiler is active"""
+    profiler = Profiler.active
+    return NULL_STAGE if profiler is None else profiler.stage(name, category)
+
+
+def add_count(name:str, value=1) -> None:
+    """Adds a value to a counter of the active Profiler (if any)"""
+    profiler = Profiler.active
+    if profiler is not None:
+        profiler.add_count(name, value)
+
+
+@contextmanager
+def profiling(json_file:str = None, trace_file:str = None):
+    """
+    Context manager profiling a block of code and yielding the Profiler.
+    The results are saved to a JSON file and/or a Chrome trace file when the block ends (also if it raises), if file
+    names are given.
+    """
+    profiler = Profiler()
+    try:
+        with profiler:
+            yield profiler
+    finally:
+        if json_file:
+            profiler.save_json(json_file)
+        if trace_file:
+            profiler.save_chrome_trace(trace_file)
+
+
+def enable_profiling_from_environment() -> Profiler | None:
+    """
+    Profiles the whole program if the environment variable SPIRAL_FIT_PROFILE holds a file prefix.
+    The results are saved to '<prefix>.json' and '<prefix>.trace.json' when the program exits.
+    """
+    file_prefix = os.environ.get(PROFILE_ENV_VARIABLE)
+    if not file_prefix or Profiler.active is not None:
+        return None
+    profiler = Profiler()
+    profiler.start()
+    atexit.register(profiler.save_chrome_trace, f'{file_prefix}.trace.json')
+    atexit.register(profiler.save_json, f'{file_prefix}.json')
+    return profiler
+
+
+enable_profiling_from_environment()
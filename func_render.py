@@ -0,0 +1,119 @@
+# Functions to render design-review figures of many logarithmic vanes in parallel
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from class_logarithmic_vane import LogarithmicVane
+from class_vane_cascade import VaneCascade
+from func_logging import quiet, set_quiet
+from func_sweep import validate_designs
+
+FIGURE_SIZE_MM = 130    # width and height of the figures (as in plot_graph_elements)
+FIGURE_DPI = 300        # resolution of the saved figures
+PAD_RATIO = 0.05        # margin around the vanes relative to their extent
+
+figure_template = None  # figure and axes reused by every figure rendered in the current process
+
+
+# ----- Figure Template ---------------------------------------------------------------------------------------------- #
+
+def create_figure_template(size_mm=FIGURE_SIZE_MM):
+    """Creates a figure and axes styled like plot_graph_elements. The figure is not registered with pyplot"""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(size_mm / 25.4, size_mm / 25.4))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.axhline(0, color='black', linewidth=0.8)
+    ax.axvline(0, color='black', linewidth=0.8)
+    ax.grid(True)
+    ax.set_aspect('equal', adjustable='box')
+    return fig, ax
+
+
+def get_figure_template():
+    """Returns the figure template of the current process, creating it on first use"""
+    global figure_template
+    if figure_template is None:
+        figure_template = create_figure_template()
+    return figure_template
+
+
+# ----- Figure Rendering --------------------------------------------------------------------------------------------- #
+
+def calculate_cascade_segments(vane:LogarithmicVane, num_vanes=1) -> np.ndarray:
+    """Returns the line segments of the outlines of all vanes in a cascade as a single (m x 2 x 2) array"""
+    outline = vane.pl_outline.xyz[:, :2]
+    offsets = VaneCascade(vane, num_vanes).offsets[:, :2]
+    outlines = outline[np.newaxis] + offsets[:, np.newaxis]  # (num_vanes x n x 2)
+    return np.stack((outlines[:, :-1], outlines[:, 1:]), axis=2).reshape(-1, 2, 2)
+
+
+def render_vane_figure(vane:LogarithmicVane, file_name:str, num_vanes=1, dpi=FIGURE_DPI) -> None:
+    """Draws the outlines of a vane (or cascade) as one LineCollection on the figure template and saves it"""
+    from matplotlib.collections import LineCollection
+
+    # Replace the vanes of the previous figure
+    fig, ax = get_figure_template()
+    for collection in list(ax.collections):
+        collection.remove()
+    segments = calculate_cascade_segments(vane, num_vanes)
+    ax.add_collection(LineCollection(segments, colors='tab:blue', linewidths=1))
+    ax.set_title(vane.get_plot_title(), fontsize=10, linespacing=1)
+
+    # Fit the limits to the vanes
+    xy_min, xy_max = segments.reshape(-1, 2).min(axis=0), segments.reshape(-1, 2).max(axis=0)
+    padding = (xy_max - xy_min) * PAD_RATIO
+    ax.set_xlim(xy_min[0] - padding[0], xy_max[0] + padding[0])
+    ax.set_ylim(xy_min[1] - padding[1], xy_max[1] + padding[1])
+    fig.savefig(file_name, bbox_inches='tight', dpi=dpi)
+
+
+def render_vane_design(job:tuple[int, dict, str, int, int]) -> dict:
+    """Builds a single vane and saves its figure. Returns the file name or the failure reason (if any)"""
+    index, design, file_directory, num_vanes, dpi = job
+    result = {'index': index, 'file': '', 'failure': ''}
+    try:
+        with np.errstate(all='ignore'):
+            vane = LogarithmicVane(**design)
+    except (ValueError, RuntimeError, ArithmeticError) as error:
+        result['failure'] = f"{type(error).__name__}: {error}"
+        return result
+    result['file'] = os.path.join(file_directory, f"{index:05d}_{vane.get_file_name()}.png")
+    render_vane_figure(vane, result['file'], num_vanes, dpi)
+    return result
+
+
+def initialise_render_worker() -> None:
+    """Silences the geometry pipeline of a worker process"""
+    set_quiet(True)
+
+
+# ----- Batch Rendering ---------------------------------------------------------------------------------------------- #
+
+def render_vane_designs(
+        designs:list[dict],
+        file_directory:str,
+        num_vanes=1,
+        num_workers:int = None,
+        chunk_size:int = None,
+        dpi=FIGURE_DPI) -> list[dict]:
+    """
+    Builds a LogarithmicVane for every design and saves a figure of it (or of a cascade of `num_vanes` vanes)
+    to `file_directory`, using a pool of worker processes. Results are returned in the order of the designs.
+    """
+    validate_designs(designs)
+    os.makedirs(file_directory, exist_ok=True)
+    num_workers = (os.cpu_count() or 1) if num_workers is None else num_workers
+    chunk_size = max(1, len(designs) // (num_workers * 4)) if chunk_size is None else chunk_size
+    jobs = [(index, design, file_directory, num_vanes, dpi) for index, design in enumerate(designs)]
+
+    # Render single worker batches in the current process
+    if num_workers == 1:
+        with quiet():
+            return [render_vane_design(job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=num_workers, initializer=initialise_render_worker) as executor:
+        return list(executor.map(render_vane_design, jobs, chunksize=chunk_size))
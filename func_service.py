@@ -0,0 +1,395 @@
+# Functions of a local asyncio service fitting spirals, diffusers and vanes in micro-batches
+import asyncio
+import json
+import math
+from functools import partial
+
+import numpy as np
+
+from class_logarithmic_spiral import LogarithmicSpiral
+from class_logarithmic_spiral_batch import LogarithmicSpiralBatch
+from class_logarithmic_vane import LogarithmicVane
+from class_micro_batcher import MicroBatcher
+from class_spiral_cache import SpiralCache
+from func_helper import diffuser_coordinates
+from func_logging import get_logger, set_quiet
+from func_sweep import REQUIRED_PARAMETERS, find_infeasible_designs
+
+logger = get_logger(__name__)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+BATCH_WINDOW_S = 0.0        # time a batch waits for further requests if no batch is being solved
+MAX_BATCH_SIZE = 1024       # batches are solved immediately once they reach this size
+MAX_BODY_SIZE = 1_000_000   # largest accepted request body in bytes
+MAX_NUM_POINTS = 10_000     # largest number of points of a returned PolyLine
+MIN_BATCH_SIZE = 10         # fewer spirals are solved one by one, which is faster than LogarithmicSpiralBatch
+COORDINATE_FORMAT = '%.12g' # returned coordinates keep 12 significant digits (faster to write than full precision)
+
+# Required fields of every kind of request ('point' fields are [x, y] pairs, all other fields are numbers)
+REQUEST_FIELDS = {
+    'spiral': {'a_xy': 'point', 'b_xy': 'point', 'ac_deg': 'number', 'bc_deg': 'number'},
+    'diffuser': {'inlet_width': 'number', 'outlet_width': 'number', 'chord': 'number', 'stretch': 'number',
+                 'ac_deg': 'number', 'bc_deg': 'number'},
+    'vane': {'horizontal_pitch': 'number', 'vertical_pitch': 'number', 'thickness': 'number',
+             'chord_lower': 'number', 'stretch_lower': 'number', 'ac_deg': 'number', 'bc_deg': 'number'}}
+
+# Optional fields of every kind of request and their default values
+OPTIONAL_FIELDS = {
+    'spiral': {'num_points': 100},
+    'diffuser': {'num_points': 100},
+    'vane': {'num_points': 90, 'max_sagitta': None}}
+
+HTTP_STATUS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               413: 'Payload Too Large', 422: 'Unprocessable Entity', 500: 'Internal Server Error'}
+
+
+# ----- Request Validation ------------------------------------------------------------------------------------------- #
+
+def is_number(value) -> bool:
+    """Returns True for ints and floats (but not booleans) that convert to finite floats"""
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        return False
+    try:
+        return math.isfinite(float(value))
+    except OverflowError:  # ints beyond the range of floats
+        return False
+
+
+def validate_request(kind:str, request) -> dict:
+    """Checks the fields of a request and returns it with the defaults of its optional fields. Raises a ValueError"""
+    if not isinstance(request, dict):
+        raise ValueError(f"A {kind} request must be a JSON object")
+    required, optional = REQUEST_FIELDS[kind], OPTIONAL_FIELDS[kind]
+    unknown = set(request) - set(required) - set(optional)
+    missing = set(required) - set(request)
+    if unknown or missing:
+        raise ValueError(f"Unknown fields: {sorted(unknown)}, missing fields: {sorted(missing)}")
+    for name, field_type in required.items():
+        value = request[name]
+        if field_type == 'point' and not (isinstance(value, list) and len(value) == 2 and all(map(is_number, value))):
+            raise ValueError(f"'{name}' must be a list of two numbers, got {value!r}")
+        if field_type == 'number' and not is_number(value):
+            raise ValueError(f"'{name}' must be a number, got {value!r}")
+    request = dict(optional, **request)
+    num_points = request['num_points']
+    if not isinstance(num_points, int) or isinstance(num_points, bool) or not 2 <= num_points <= MAX_NUM_POINTS:
+        raise ValueError(f"'num_points' must be an integer between 2 and {MAX_NUM_POINTS}, got {num_points!r}")
+    if request.get('max_sagitta') is not None and not (is_number(request['max_sagitta'])
+                                                       and request['max_sagitta'] > 0):
+        raise ValueError(f"'max_sagitta' must be a positive number, got {request['max_sagitta']!r}")
+    return request
+
+
+# ----- Batch Solvers ------------------------------------------------------------------------------------------------ #
+
+def get_spiral_equation(spiral) -> dict:
+    """Returns the equation of a solved spiral: x = a * exp(b * t) * cos(t) + x0, y = a * exp(b * t) * sin(t) + y0"""
+    return {
+        'scale_factor_a': float(spiral.scale_factor_a),
+        'polar_slope_b': float(spiral.polar_slope_b),
+        'origin_xy': [float(value) for value in spiral.origin_xy],
+        't_a_rad': float(spiral.t_a_rad),
+        't_b_rad': float(spiral.t_b_rad)}
+
+
+def solve_spirals_one_by_one(a_xy, b_xy, ac_deg, bc_deg, num_points:list[int], names:list[str]) -> list[dict]:
+    """Solves every spiral on its own with LogarithmicSpiral. Returns their equations and PolyLines, or their errors"""
+    results = list()
+    for spiral_a_xy, spiral_b_xy, spiral_ac_deg, spiral_bc_deg, count, name in zip(a_xy, b_xy, ac_deg, bc_deg,
+                                                                                    num_points, names):
+        try:
+            with np.errstate(all='ignore'):
+                spiral = LogarithmicSpiral(tuple(spiral_a_xy), tuple(spiral_b_xy), spiral_ac_deg, spiral_bc_deg,
+                                           name=name, cache=None)
+                xx, yy = spiral.generate_spiral_coordinates(count)
+        except (ValueError, RuntimeError, ArithmeticError) as error:
+            results.append({'error': f"{type(error).__name__}: {error}"})
+            continue
+        results.append({'equation': get_spiral_equation(spiral), 'poly_line': {'xx': xx, 'yy': yy}})
+    return results
+
+
+def solve_spirals(a_xy, b_xy, ac_deg, bc_deg, num_points:list[int], names:list[str]) -> list[dict]:
+    """
+    Solves all spirals in one LogarithmicSpiralBatch (or one by one if there are fewer than MIN_BATCH_SIZE).
+    Returns their equations and PolyLines, or their errors.
+    """
+    if len(names) < MIN_BATCH_SIZE:
+        return solve_spirals_one_by_one(a_xy, b_xy, ac_deg, bc_deg, num_points, names)
+    batch = LogarithmicSpiralBatch(a_xy, b_xy, ac_deg, bc_deg)
+    num_points = np.asarray(num_points)
+    results = [dict() for _ in range(len(batch))]
+
+    # Sample the spirals with the same number of points together
+    for count in np.unique(num_points):
+        rows = np.flatnonzero((num_points == count) & batch.converged)
+        xx, yy = batch.generate_spiral_coordinates(int(count), rows)
+        for row, row_xx, row_yy in zip(rows, xx, yy):
+            equation = {
+                'scale_factor_a': float(batch.scale_factor_a[row]),
+                'polar_slope_b': float(batch.polar_slope_b[row]),
+                'origin_xy': batch.origin_xy[row].tolist(),
+                't_a_rad': float(batch.t_a_rad[row]),
+                't_b_rad': float(batch.t_b_rad[row])}
+            results[row] = {'equation': equation, 'poly_line': {'xx': row_xx, 'yy': row_yy}}
+
+    # Report the error LogarithmicSpiral would raise for every spiral that was not solved
+    for row in np.flatnonzero(~batch.converged):
+        if batch.valid[row]:
+            error = RuntimeError("Reached iteration limit. Geometry likely invalid")
+        else:
+            error = LogarithmicSpiralBatch.create_error(batch.reason[row], names[row])
+        results[row] = {'error': f"{type(error).__name__}: {error}"}
+    return results
+
+
+def solve_spiral_requests(requests:list[dict], one_by_one=False) -> list[dict]:
+    """Solves a batch of spiral requests at once (or every request on its own to compare both)"""
+    solver = solve_spirals_one_by_one if one_by_one else solve_spirals
+    return solver(
+        a_xy=[request['a_xy'] for request in requests],
+        b_xy=[request['b_xy'] for request in requests],
+        ac_deg=[request['ac_deg'] for request in requests],
+        bc_deg=[request['bc_deg'] for request in requests],
+        num_points=[request['num_points'] for request in requests],
+        names=['spiral'] * len(requests))
+
+
+def solve_diffuser_requests(requests:list[dict]) -> list[dict]:
+    """Solves the inner, centre and outer spirals of a batch of diffuser requests at once"""
+    a_xy, b_xy, ac_deg, bc_deg, num_points, names, owners = [], [], [], [], [], [], []
+    results = [dict() for _ in requests]
+    for index, request in enumerate(requests):
+        try:
+            lines = diffuser_coordinates(request['inlet_width'], request['outlet_width'], request['stretch'],
+                                         request['chord'])
+        except (ValueError, ArithmeticError) as error:  # e.g. a chord too short for the widths
+            results[index] = {'error': f"{type(error).__name__}: {error}"}
+            continue
+        for line in lines:
+            a_xy.append((line.start.x, line.start.y))
+            b_xy.append((line.end.x, line.end.y))
+            ac_deg.append(request['ac_deg'])
+            bc_deg.append(request['bc_deg'])
+            num_points.append(request['num_points'])
+            names.append(line.label)
+            owners.append(index)
+    if not owners:
+        return results
+    with np.errstate(all='ignore'):
+        spirals = solve_spirals(a_xy, b_xy, ac_deg, bc_deg, num_points, names)
+
+    # Group the spirals of every diffuser (a diffuser fails with the first of its spirals that fails)
+    for index, name, spiral in zip(owners, names, spirals):
+        result = results[index]
+        if 'error' in result:
+            continue
+        if 'error' in spiral:
+            results[index] = {'error': spiral['error']}
+        else:
+            result.setdefault('spirals', dict())[name] = spiral
+    return results
+
+
+def solve_vane_spirals(requests:list[dict]) -> SpiralCache:
+    """
+    Solves the upper and lower spirals of a batch of vanes in one LogarithmicSpiralBatch. Returns a cache of their
+    incident angles, so the vanes built from the requests afterwards do not solve any spiral again.
+    """
+    cache = SpiralCache(max_size=max(1, 2 * len(requests)))
+    if not requests:
+        return cache
+    values = {name: np.array([request[name] for request in requests], dtype=float) for name in REQUIRED_PARAMETERS}
+    with np.errstate(all='ignore'):
+        points = LogarithmicVane.calculate_spiral_points_for_designs(**values)
+        batch = LogarithmicSpiralBatch(
+            np.concatenate((points['upper_spiral_a'].xyz[:, :2], points['lower_spiral_a'].xyz[:, :2])),
+            np.concatenate((points['upper_spiral_b'].xyz[:, :2], points['lower_spiral_b'].xyz[:, :2])),
+            np.tile(values['ac_deg'], 2), np.tile(values['bc_deg'], 2))
+    for row in np.flatnonzero(batch.converged):
+        cache.put(cache.make_key(batch.theta[row], batch.ab_rad[row] - batch.ac_rad[row]), float(batch.beta[row]))
+    return cache
+
+
+def solve_vane_requests(requests:list[dict]) -> list[dict]:
+    """
+    Builds a batch of vanes. Vanes whose spirals cannot be fitted are found in bulk, and the spirals of all other
+    vanes are solved together (see solve_vane_spirals), before the vanes are built one by one.
+    """
+    failures = find_infeasible_designs(requests)
+    feasible = [request for request, failure in zip(requests, failures) if not failure]
+    spiral_cache = solve_vane_spirals(feasible)
+    results = list()
+    for request, failure in zip(requests, failures):
+        if failure:
+            results.append({'error': failure})
+            continue
+        try:
+            with np.errstate(all='ignore'):
+                vane = LogarithmicVane(**request, spiral_cache=spiral_cache)
+        except (ValueError, RuntimeError, ArithmeticError) as error:
+            results.append({'error': f"{type(error).__name__}: {error}"})
+            continue
+        results.append({
+            'outline': {'xx': vane.pl_outline.xx, 'yy': vane.pl_outline.yy},
+            'spirals': {'upper_spiral': get_spiral_equation(vane.ls_upper_spiral),
+                        'lower_spiral': get_spiral_equation(vane.ls_lower_spiral)},
+            'gap': float(vane.calculate_gap()),
+            'pitch_angle_deg': float(np.degrees(vane.calculate_pitch_angle()))})
+    return results
+
+
+BATCH_SOLVERS = {'spiral': solve_spiral_requests, 'diffuser': solve_diffuser_requests, 'vane': solve_vane_requests}
+UNBATCHED_SOLVERS = dict(BATCH_SOLVERS, spiral=partial(solve_spiral_requests, one_by_one=True))
+
+
+# ----- Encoding ----------------------------------------------------------------------------------------------------- #
+
+def encode_json(value) -> str:
+    """
+    Returns the JSON text of a payload. Arrays are written with COORDINATE_FORMAT in one formatting operation,
+    which is several times faster than json.dumps for the thousands of coordinates of a batch. Non-finite numbers
+    are written as null, because NaN and Infinity are not valid JSON.
+    """
+    if isinstance(value, np.ndarray):
+        if not np.isfinite(value).all():
+            return encode_json(value.tolist())
+        values = value.tolist()
+        return '[' + ((COORDINATE_FORMAT + ',') * len(values) % tuple(values))[:-1] + ']' if values else '[]'
+    if isinstance(value, dict):
+        return '{' + ', '.join(f"{json.dumps(key)}: {encode_json(item)}" for key, item in value.items()) + '}'
+    if isinstance(value, (list, tuple)):
+        return '[' + ', '.join(encode_json(item) for item in value) + ']'
+    if isinstance(value, float) and not math.isfinite(value):
+        return 'null'
+    return json.dumps(value)
+
+
+def solve_and_encode(solve_batch, requests:list[dict]) -> list[tuple[int, bytes]]:
+    """Solves a batch and encodes its results on the worker thread, so the event loop only sends them"""
+    return [(422 if 'error' in result else 200, encode_json(result).encode()) for result in solve_batch(requests)]
+
+
+# ----- HTTP Interface ----------------------------------------------------------------------------------------------- #
+
+def create_batchers(window_s=BATCH_WINDOW_S, max_batch_size=MAX_BATCH_SIZE, batched=True) -> dict[str, MicroBatcher]:
+    """
+    Creates one MicroBatcher for every kind of request. If `batched` is False, every request is solved on its own
+    instead (spirals with LogarithmicSpiral), as a baseline for the gain of batching.
+    """
+    if not batched:
+        return {kind: MicroBatcher(partial(solve_and_encode, solver), 0.0, 1, name=kind)
+                for kind, solver in UNBATCHED_SOLVERS.items()}
+    return {kind: MicroBatcher(partial(solve_and_encode, solver), window_s, max_batch_size, name=kind)
+            for kind, solver in BATCH_SOLVERS.items()}
+
+
+async def handle_request(method:str, path:str, body:bytes,
+                         batchers:dict[str, MicroBatcher]) -> tuple[int, dict | bytes]:
+    """Returns the HTTP status and JSON payload (or its encoded text) of a request"""
+    kind = path.strip('/')
+    if path == '/health':
+        return 200, {'status': 'ok', 'batchers': {name: batcher.stats() for name, batcher in batchers.items()}}
+    if kind not in batchers:
+        return 404, {'error': f"Unknown path {path}. Valid: {['/' + name for name in batchers] + ['/health']}"}
+    if method != 'POST':
+        return 405, {'error': f"Use POST to request a {kind}"}
+    try:
+        request = validate_request(kind, json.loads(body))
+    except Exception as error:  # invalid JSON or fields, e.g. a RecursionError for deeply nested JSON
+        return 400, {'error': f"{type(error).__name__}: {error}"}
+    try:
+        return await batchers[kind].submit(request)
+    except Exception as error:  # the whole batch failed
+        logger.error("A %s batch failed: %s", kind, error)
+        return 500, {'error': f"{type(error).__name__}: {error}"}
+
+
+def format_response(status:int, payload:dict | bytes, keep_alive=True) -> bytes:
+    """Returns an HTTP/1.1 response with a JSON body (`payload` may already be encoded)"""
+    body = payload if isinstance(payload, bytes) else encode_json(payload).encode()
+    head = (f"HTTP/1.1 {status} {HTTP_STATUS[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode('latin-1') + body
+
+
+async def read_request_head(reader:asyncio.StreamReader) -> tuple[str, str, bool, int] | None:
+    """
+    Returns the method, path, keep-alive flag and body size of the next request, or None once the client is done.
+    Raises a ValueError for a malformed request line or header.
+    """
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    method, path, version = request_line.decode('latin-1').split()
+    headers = dict()
+    while (line := await reader.readline()).strip():
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+    content_length = int(headers.get('content-length', 0))
+    if content_length < 0:
+        raise ValueError(f"Invalid Content-Length {content_length}")
+    return method, path, keep_alive, content_length
+
+
+async def handle_connection(reader:asyncio.StreamReader, writer:asyncio.StreamWriter, batchers) -> None:
+    """Answers the requests of one (keep-alive) connection"""
+    try:
+        while True:
+            try:
+                head = await read_request_head(reader)
+            except ValueError:  # malformed request line or header
+                writer.write(format_response(400, {'error': 'Malformed HTTP request'}, False))
+                break
+            if head is None:
+                break
+            method, path, keep_alive, content_length = head
+
+            # Read the body and answer the request
+            if content_length > MAX_BODY_SIZE:
+                writer.write(format_response(413, {'error': f"Bodies are limited to {MAX_BODY_SIZE} bytes"}, False))
+                break
+            body = await reader.readexactly(content_length)
+            status, payload = await handle_request(method, path, body, batchers)
+            writer.write(format_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path:str = None, window_s=BATCH_WINDOW_S,
+                max_batch_size=MAX_BATCH_SIZE, on_ready=None, batched=True) -> None:
+    """
+    Runs the service on a TCP port (or a Unix socket if `unix_path` is given) until it is cancelled.
+    `on_ready` is called with the address of the service once it accepts connections (e.g. to report a free port).
+    If `batched` is False, every request is solved on its own (see create_batchers).
+    """
+    set_quiet(True)  # the log messages of every spiral would slow the service down
+    batchers = create_batchers(window_s, max_batch_size, batched)
+
+    async def handle(reader, writer):
+        await handle_connection(reader, writer, batchers)
+
+    if unix_path:
+        server = await asyncio.start_unix_server(handle, path=unix_path)
+    else:
+        server = await asyncio.start_server(handle, host=host, port=port)
+    address = unix_path or f"http://{host}:{server.sockets[0].getsockname()[1]}"
+    mode = f"batch window {window_s * 1000:g} ms" if batched else "unbatched"
+    logger.info("Serving spirals, diffusers and vanes on %s (%s)", address, mode)
+    if on_ready is not None:
+        on_ready(address)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        for batcher in batchers.values():
+            batcher.close()
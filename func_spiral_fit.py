@@ -0,0 +1,276 @@
+# Functions to fit logarithmic spirals to large measured point clouds (e.g. laser scans of manufactured vanes)
+import numpy as np
+
+from class_logarithmic_spiral import LogarithmicSpiral
+from func_logging import get_logger
+
+logger = get_logger(__name__)
+
+FIT_CHUNK_SIZE = 1_000_000  # number of points processed at once (bounds the memory used by a fit)
+FIT_ITER_LIMIT = 100        # maximum number of passes over the points by the Levenberg-Marquardt solver
+FIT_TOLERANCE = 1e-10       # relative change of the sum of squared residuals at which a fit has converged
+FIT_STALL_STEPS = 5         # number of accepted steps per window whose decreases are compared to detect a stall
+FIT_STALL_TOLERANCE = 1e-2  # relative decrease of the squared residuals per window below which a fit can stall
+FIT_NUM_BINS = 4            # number of stretches of the points whose centres of curvature locate the initial origin
+
+
+# ----- Point Streams ------------------------------------------------------------------------------------------------ #
+
+def iterate_point_chunks(points, chunk_size=FIT_CHUNK_SIZE):
+    """
+    Yields (m x 2) float64 chunks of X and Y coordinates. `points` is an (n x 2+) array (a memory-mapped array is
+    read one chunk at a time), the name of a .npy file (which is memory-mapped) or a function returning an iterable
+    of (m x 2+) chunks (e.g. a reader of a scan file), since a fit passes over the points several times.
+    """
+    if callable(points):
+        for chunk in points():
+            yield np.asarray(chunk, dtype=float)[:, :2]
+        return
+    if isinstance(points, str):
+        points = np.load(points, mmap_mode='r')
+    points = points if isinstance(points, np.ndarray) else np.asarray(points, dtype=float)
+    if points.ndim != 2 or points.shape[1] < 2:
+        raise ValueError(f"Points must be an (n x 2) or (n x 3) array, got shape {points.shape}")
+    for start in range(0, len(points), chunk_size):
+        yield np.asarray(points[start:start + chunk_size, :2], dtype=float)
+
+
+def calculate_polar_angles(xy:np.ndarray, origin_xy, reference_rad:float) -> np.ndarray:
+    """Returns the polar angles of points around an origin on the branch within pi of the reference angle"""
+    t_values = np.arctan2(xy[:, 1] - origin_xy[1], xy[:, 0] - origin_xy[0])
+    return reference_rad + (t_values - reference_rad + np.pi) % (2 * np.pi) - np.pi
+
+
+# ----- Initial Guess ------------------------------------------------------------------------------------------------ #
+
+def accumulate_circle_sums(xy:np.ndarray, bins:np.ndarray, num_bins:int) -> np.ndarray:
+    """Returns the sums of the algebraic circle fits of every bin of points (num_bins x 9)"""
+    x, y = xy[:, 0], xy[:, 1]
+    r_sq = x ** 2 + y ** 2
+    products = (x * x, x * y, x, y * y, y, np.ones(len(x)), x * r_sq, y * r_sq, r_sq)
+    return np.column_stack([np.bincount(bins, weights=values, minlength=num_bins) for values in products])
+
+
+def solve_circle(sums:np.ndarray) -> tuple[np.ndarray, float]:
+    """Returns the centre and radius of the circle x^2 + y^2 + D x + E y + F = 0 fitted to the sums of a bin"""
+    sxx, sxy, sx, syy, sy, n, sxr, syr, sr = sums
+    normal = np.array([[sxx, sxy, sx], [sxy, syy, sy], [sx, sy, n]])
+    d, e, f = np.linalg.solve(normal, -np.array([sxr, syr, sr]))
+    centre = np.array([-d / 2, -e / 2])
+    return centre, float(np.sqrt(centre @ centre - f))
+
+
+def estimate_initial_parameters(points, chunk_size=FIT_CHUNK_SIZE, origin_xy=None,
+                                num_bins=FIT_NUM_BINS) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Estimates the origin from the centres of curvature of several stretches of the points (unless `origin_xy` is
+    given), then the log radius at the polar angle of the centroid and the polar slope from a linear regression of
+    log(r) against t. Returns (x0, y0, ln_r0, b) and the centroid of the points.
+    """
+    # Fit a circle to all points to order them by their polar angle around its centre
+    sums = np.zeros(9)
+    for xy in iterate_point_chunks(points, chunk_size):
+        sums += accumulate_circle_sums(xy, np.zeros(len(xy), dtype=int), 1)[0]
+    count = int(sums[5])
+    if count < 4 * num_bins:
+        raise ValueError(f"At least {4 * num_bins} points are needed to fit a spiral, got {count}")
+    centroid = sums[[2, 4]] / count
+    circle_centre, _ = solve_circle(sums)
+    reference_rad = float(np.arctan2(*(centroid - circle_centre)[::-1]))
+
+    if origin_xy is None:
+        # Fit circles to equal stretches of polar angle, which approximate the osculating circles at their middles
+        t_min, t_max = np.inf, -np.inf
+        for xy in iterate_point_chunks(points, chunk_size):
+            t_values = calculate_polar_angles(xy, circle_centre, reference_rad)
+            t_min, t_max = min(t_min, t_values.min()), max(t_max, t_values.max())
+        bin_sums = np.zeros((num_bins, 9))
+        for xy in iterate_point_chunks(points, chunk_size):
+            t_values = calculate_polar_angles(xy, circle_centre, reference_rad)
+            bins = np.minimum(((t_values - t_min) / (t_max - t_min) * num_bins).astype(int), num_bins - 1)
+            bin_sums += accumulate_circle_sums(xy, bins, num_bins)
+
+        # The centres of curvature C of a log spiral satisfy C - O = b J (P - O), with J a rotation by 90 degrees,
+        # which is linear in u = (I - b J) O and b
+        rotation = np.array([[0.0, -1.0], [1.0, 0.0]])
+        rows, rhs = list(), list()
+        try:
+            for sums in bin_sums:
+                centre, radius = solve_circle(sums)
+                bin_centroid = sums[[2, 4]] / sums[5]
+                point = centre + radius * (bin_centroid - centre) / np.linalg.norm(bin_centroid - centre)
+                rows.extend(np.column_stack((np.eye(2), rotation @ point)))
+                rhs.extend(centre)
+            u_x, u_y, polar_slope_b = np.linalg.lstsq(np.array(rows), np.array(rhs), rcond=None)[0]
+            origin_xy = np.linalg.solve(np.eye(2) - polar_slope_b * rotation, (u_x, u_y))
+        except np.linalg.LinAlgError:  # a stretch holds too few points, e.g. because of a gap in the scan
+            logger.warning("Could not locate the centres of curvature. Starting from the centre of the points")
+            origin_xy = circle_centre
+    origin_xy = np.asarray(origin_xy, dtype=float)
+
+    # Regress log(r) against t around the origin
+    reference_rad = float(np.arctan2(*(centroid - origin_xy)[::-1]))
+    sums = np.zeros(5)  # sums of t, t^2, log(r), t log(r) and the number of points
+    for xy in iterate_point_chunks(points, chunk_size):
+        t_values = calculate_polar_angles(xy, origin_xy, reference_rad) - reference_rad
+        log_r = np.log(np.hypot(xy[:, 0] - origin_xy[0], xy[:, 1] - origin_xy[1]))
+        sums += (t_values.sum(), (t_values ** 2).sum(), log_r.sum(), (t_values * log_r).sum(), len(xy))
+    sum_t, sum_tt, sum_log_r, sum_t_log_r, n = sums
+    polar_slope_b = (n * sum_t_log_r - sum_t * sum_log_r) / (n * sum_tt - sum_t ** 2)
+    log_r0 = (sum_log_r - polar_slope_b * sum_t) / n
+    return np.array([origin_xy[0], origin_xy[1], log_r0, polar_slope_b]), centroid
+
+
+# ----- Least-Squares Fit -------------------------------------------------------------------------------------------- #
+
+def accumulate_normal_equations(points, parameters:np.ndarray, reference_rad:float, t_0:float,
+                                chunk_size=FIT_CHUNK_SIZE):
+    """
+    Passes over the points once and returns the Gauss-Newton normal equations (J^T J, J^T e) and the sum of
+    squared radial residuals e = r - r0 exp(b (t - t_0)) for the parameters (x0, y0, ln_r0, b). Expanding around
+    the polar angle t_0 of the points rather than t = 0 decorrelates the scale from the polar slope.
+    """
+    x0, y0, log_r0, polar_slope_b = parameters
+    jtj, jte, sse = np.zeros((4, 4)), np.zeros(4), 0.0
+    for xy in iterate_point_chunks(points, chunk_size):
+        dx, dy = xy[:, 0] - x0, xy[:, 1] - y0
+        r_sq = dx ** 2 + dy ** 2
+        radius = np.sqrt(r_sq)
+        t_values = calculate_polar_angles(xy, (x0, y0), reference_rad)
+        fitted = np.exp(log_r0 + polar_slope_b * (t_values - t_0))
+        residual = radius - fitted
+        jacobian = np.column_stack((
+            -dx / radius - fitted * polar_slope_b * dy / r_sq,    # de/dx0
+            -dy / radius + fitted * polar_slope_b * dx / r_sq,    # de/dy0
+            -fitted,                                              # de/d(ln_r0)
+            -fitted * (t_values - t_0)))                          # de/db
+        jtj += jacobian.T @ jacobian
+        jte += jacobian.T @ residual
+        sse += residual @ residual
+    return jtj, jte, sse
+
+
+def calculate_residual_statistics(points, parameters:np.ndarray, reference_rad:float, t_0:float,
+                                  chunk_size=FIT_CHUNK_SIZE) -> dict:
+    """
+    Returns the statistics of the normal distances of the points to a spiral (positive outside) and the range of
+    their polar angles
+    """
+    x0, y0, log_r0, polar_slope_b = parameters
+    normal_scale = 1 / np.sqrt(1 + polar_slope_b ** 2)  # the normal and radial directions differ by arctan(b)
+    count, total, total_sq, lowest, highest = 0, 0.0, 0.0, np.inf, -np.inf
+    t_min, t_max = np.inf, -np.inf
+    for xy in iterate_point_chunks(points, chunk_size):
+        t_values = calculate_polar_angles(xy, (x0, y0), reference_rad)
+        radii = np.exp(log_r0 + polar_slope_b * (t_values - t_0))
+        distances = (np.hypot(xy[:, 0] - x0, xy[:, 1] - y0) - radii) * normal_scale
+        count += len(distances)
+        total += distances.sum()
+        total_sq += distances @ distances
+        lowest, highest = min(lowest, distances.min()), max(highest, distances.max())
+        t_min, t_max = min(t_min, t_values.min()), max(t_max, t_values.max())
+    mean = total / count
+    return {
+        'num_points': count,
+        'rms': float(np.sqrt(total_sq / count)),
+        'mean': float(mean),
+        'std': float(np.sqrt(max(total_sq / count - mean ** 2, 0.0))),
+        'min': float(lowest),
+        'max': float(highest),
+        'max_abs': float(max(-lowest, highest)),
+        't_min_rad': float(t_min),
+        't_max_rad': float(t_max)}
+
+
+def is_fit_stalled(sse_history:list[float], passes_left:int, tolerance=FIT_TOLERANCE, stall_steps=FIT_STALL_STEPS,
+                   stall_tolerance=FIT_STALL_TOLERANCE) -> bool:
+    """
+    Returns True if the squared residuals (after every accepted step) decreased by less than `stall_tolerance` over
+    the last `stall_steps` steps, and if the rate at which the decrease shrinks between the last two windows of
+    `stall_steps` steps (extrapolated linearly) would not reach the relative change `tolerance` within the passes left.
+    """
+    if len(sse_history) <= 2 * stall_steps:
+        return False
+    sse_before, sse_middle, sse = sse_history[-1 - 2 * stall_steps], sse_history[-1 - stall_steps], sse_history[-1]
+    decrease, previous_decrease = sse_middle - sse, sse_before - sse_middle
+    if decrease > stall_tolerance * sse:
+        return False
+    rate = (decrease / previous_decrease) ** (1 / stall_steps)  # ratio of the decreases of consecutive steps
+    return rate >= 1 or np.log(tolerance * sse * stall_steps / decrease) / np.log(rate) > passes_left
+
+
+def fit_log_spiral(points, origin_xy=None, chunk_size=FIT_CHUNK_SIZE, iter_limit=FIT_ITER_LIMIT,
+                   tolerance=FIT_TOLERANCE) -> dict:
+    """
+    Fits r = a exp(b t) around an unknown origin to a point cloud by minimising the squared radial residuals with
+    Levenberg-Marquardt. The points are streamed in chunks (see iterate_point_chunks), so the memory used does not
+    depend on their number. `origin_xy` (e.g. the origin of the design spiral) replaces the estimated initial origin.
+    Returns the spiral parameters, the range of polar angles of the points, and the statistics of their normal
+    distances to the fitted spiral. The points must turn by less than one revolution around the origin.
+    Poorly conditioned fits (e.g. noisy points on a short arc) creep along a valley of almost equal residuals, so a
+    fit stops early as stalled (and not converged) once it could not converge within `iter_limit` at its current
+    rate (see is_fit_stalled).
+    """
+    parameters, centroid = estimate_initial_parameters(points, chunk_size, origin_xy)
+    reference_rad = t_0 = float(np.arctan2(centroid[1] - parameters[1], centroid[0] - parameters[0]))
+    jtj, jte, sse = accumulate_normal_equations(points, parameters, reference_rad, t_0, chunk_size)
+    damping, converged, stalled, iteration = 1e-3, False, False, 0
+    sse_history = [sse]  # squared residuals after every accepted step, to detect a stalled fit
+    for iteration in range(1, iter_limit + 1):
+        # Take a damped Gauss-Newton step and keep it if it reduces the squared residuals
+        step = np.linalg.lstsq(jtj + damping * np.diag(np.diag(jtj)), -jte, rcond=None)[0]
+        trial = parameters + step
+        trial_reference_rad = float(np.arctan2(centroid[1] - trial[1], centroid[0] - trial[0]))
+        trial_jtj, trial_jte, trial_sse = accumulate_normal_equations(points, trial, trial_reference_rad, t_0,
+                                                                      chunk_size)
+        if trial_sse <= sse:
+            converged = sse - trial_sse <= tolerance * sse
+            parameters, reference_rad, jtj, jte, sse = trial, trial_reference_rad, trial_jtj, trial_jte, trial_sse
+            damping = max(damping / 10, 1e-12)
+            if converged:
+                break
+            sse_history.append(sse)
+            if is_fit_stalled(sse_history, iter_limit - iteration, tolerance):
+                stalled = True
+                break
+        else:
+            damping *= 10
+            if damping > 1e12:  # no step reduces the residuals any further, without meeting the tolerance
+                stalled = True
+                break
+
+    residuals = calculate_residual_statistics(points, parameters, reference_rad, t_0, chunk_size)
+    if stalled:
+        logger.warning("The spiral fit stalled after %d iterations without converging (rms residual %.3g)",
+                       iteration, residuals['rms'])
+    elif not converged:
+        logger.warning("The spiral fit did not converge within %d iterations (rms residual %.3g)",
+                       iter_limit, residuals['rms'])
+    x0, y0, log_r0, polar_slope_b = parameters
+    return {
+        'origin_xy': (float(x0), float(y0)),
+        'scale_factor_a': float(np.exp(log_r0 - polar_slope_b * t_0)),
+        'polar_slope_b': float(polar_slope_b),
+        't_a_rad': residuals.pop('t_min_rad'),
+        't_b_rad': residuals.pop('t_max_rad'),
+        'iterations': iteration,
+        'converged': bool(converged),
+        'stalled': stalled,
+        'residuals': residuals}
+
+
+def create_spiral_from_fit(fit:dict, name='fitted spiral', **kwargs) -> LogarithmicSpiral:
+    """
+    Returns the LogarithmicSpiral through the end points and tangent angles of a fitted spiral, i.e. the same spiral
+    in the form of the design spirals. Keyword arguments are passed to LogarithmicSpiral.
+    """
+    x0, y0 = fit['origin_xy']
+    a, b = fit['scale_factor_a'], fit['polar_slope_b']
+    t_a, t_b = fit['t_a_rad'], fit['t_b_rad']
+    a_xy, b_xy = [(float(x0 + a * np.exp(b * t) * np.cos(t)), float(y0 + a * np.exp(b * t) * np.sin(t)))
+                  for t in (t_a, t_b)]
+    # Direction of travel along the spiral (towards increasing t) at t_a; the tangent turns with the polar angle, so
+    # the angle at t_b follows without wrapping at +-180 degrees
+    ac_deg = float(np.degrees(np.arctan2(b * np.sin(t_a) + np.cos(t_a), b * np.cos(t_a) - np.sin(t_a))))
+    bc_deg = ac_deg + float(np.degrees(t_b - t_a))
+    return LogarithmicSpiral(a_xy, b_xy, ac_deg, bc_deg, name=name, **kwargs)
@@ -0,0 +1,172 @@
+# Functions to evaluate logarithmic vanes over a design space in parallel
+import inspect
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from class_logarithmic_spiral import LogarithmicSpiral
+from class_logarithmic_spiral_batch import LogarithmicSpiralBatch
+from class_logarithmic_vane import LogarithmicVane
+from func_logging import quiet, set_quiet
+
+# Parameters accepted by LogarithmicVane that can be varied in a sweep
+VANE_PARAMETERS = ('horizontal_pitch', 'vertical_pitch', 'thickness', 'chord_lower', 'stretch_lower',
+                   'ac_deg', 'bc_deg', 'num_points', 'max_sagitta', 'warm_start')
+
+# Default values of the optional vane parameters, and the parameters every design must set
+VANE_DEFAULTS = {name: parameter.default for name, parameter in inspect.signature(LogarithmicVane).parameters.items()
+                 if name in VANE_PARAMETERS and parameter.default is not inspect.Parameter.empty}
+REQUIRED_PARAMETERS = set(VANE_PARAMETERS) - set(VANE_DEFAULTS)
+
+# Columns of the sweep results in addition to the design parameters
+RESULT_COLUMNS = ('index', 'gap', 'pitch_angle_deg', 'iterations_upper', 'iterations_lower', 'failure')
+
+previous_vane = None  # last vane built by the current process (its unchanged stages are reused by the next design)
+
+
+# ----- Design Space Definition -------------------------------------------------------------------------------------- #
+
+def generate_parameter_grid(parameters:dict[str, list]) -> list[dict]:
+    """Returns every combination of the parameter values in a fixed order (the last parameter varies fastest)"""
+    names = list(parameters)
+    return [dict(zip(names, values)) for values in itertools.product(*[parameters[name] for name in names])]
+
+
+def validate_designs(designs:list[dict]) -> None:
+    """Checks that every design has all parameters LogarithmicVane requires, and no others, before any vane is built"""
+    for index, design in enumerate(designs):
+        unknown = set(design) - set(VANE_PARAMETERS)
+        if unknown:
+            raise ValueError(f"Design {index} has unknown parameters: {sorted(unknown)}")
+        missing = REQUIRED_PARAMETERS - set(design)
+        if missing:
+            raise ValueError(f"Design {index} is missing parameters: {sorted(missing)}")
+
+
+def find_infeasible_designs(designs:list[dict]) -> list[str]:
+    """
+    Checks the spirals of all designs at once, before any vane is built. Returns the failure LogarithmicVane would
+    raise for every design whose spirals cannot be fitted, or '' for the designs that still need to be built.
+    """
+    failures = [''] * len(designs)
+    rows = [index for index, design in enumerate(designs) if REQUIRED_PARAMETERS.issubset(design)]
+    try:
+        values = {name: np.array([designs[row][name] for row in rows], dtype=float) for name in REQUIRED_PARAMETERS}
+    except (TypeError, ValueError):  # designs with invalid values are left to LogarithmicVane
+        return failures
+    if not rows:
+        return failures
+
+    # Classify the spirals in the order the vane solves them, so the first failure is reported
+    with np.errstate(all='ignore'):
+        points = LogarithmicVane.calculate_spiral_points_for_designs(**values)
+    for name in ('upper_spiral', 'lower_spiral'):
+        _, reasons = LogarithmicSpiralBatch.classify_feasibility(
+            points[f'{name}_a'].xyz[:, :2], points[f'{name}_b'].xyz[:, :2], values['ac_deg'], values['bc_deg'])
+        for row, reason in zip(rows, reasons):
+            if reason not in (LogarithmicSpiralBatch.FEASIBLE, LogarithmicSpiralBatch.NON_FINITE_INPUT) \
+                    and not failures[row]:
+                error = LogarithmicSpiralBatch.create_error(reason, name)
+                failures[row] = f"{type(error).__name__}: {error}"
+    return failures
+
+
+# ----- Design Evaluation -------------------------------------------------------------------------------------------- #
+
+def build_vane(design:dict) -> LogarithmicVane:
+    """
+    Builds the vane of a design by changing the parameters of the previous vane of the process, so only the stages
+    that depend on the changed parameters are recalculated (e.g. the lower spiral is kept in a pitch sweep).
+    Designs with 'warm_start' seed their spirals with the previous design, so their results depend on the order in
+    which a worker receives the designs (within the solver accuracy).
+    """
+    global previous_vane
+    vane, previous_vane = previous_vane, None  # a vane that fails to update is not reused
+    if vane is None or not REQUIRED_PARAMETERS.issubset(design):
+        vane = LogarithmicVane(**design)
+    else:
+        vane.set_parameters(**dict(VANE_DEFAULTS, **design))
+    previous_vane = vane
+    return vane
+
+
+def create_result(index:int, design:dict, failure='') -> dict:
+    """Returns the result of a design before it is evaluated"""
+    return dict(design, index=index, gap=np.nan, pitch_angle_deg=np.nan,
+                iterations_upper=0, iterations_lower=0, failure=failure)
+
+
+def evaluate_vane_design(indexed_design:tuple[int, dict]) -> dict:
+    """Builds a single vane and returns its design parameters, characteristics, and failure reason (if any)"""
+    index, design = indexed_design
+    result = create_result(index, design)
+    try:
+        with np.errstate(all='ignore'):
+            vane = build_vane(design)
+    except (ValueError, RuntimeError, ArithmeticError) as error:
+        result['failure'] = f"{type(error).__name__}: {error}"
+        return result
+    result['gap'] = vane.calculate_gap()
+    result['pitch_angle_deg'] = float(np.degrees(vane.calculate_pitch_angle()))
+    result['iterations_upper'] = vane.ls_upper_spiral.iterations
+    result['iterations_lower'] = vane.ls_lower_spiral.iterations
+    return result
+
+
+def initialise_sweep_worker() -> None:
+    """Disables the shared spiral cache so that every design is solved from scratch, whichever worker builds it"""
+    global previous_vane
+    previous_vane = None
+    LogarithmicSpiral.shared_cache = None
+    set_quiet(True)
+
+
+# ----- Sweep Execution ---------------------------------------------------------------------------------------------- #
+
+def sweep_vane_designs(designs:list[dict], num_workers:int = None, chunk_size:int = None) -> list[dict]:
+    """
+    Builds a LogarithmicVane for every design across a pool of worker processes. Designs whose spirals cannot be
+    fitted are found in bulk beforehand and are not built (see find_infeasible_designs).
+    Results are returned in the order of the designs and do not depend on the number of workers or the chunk size.
+    """
+    validate_designs(designs)
+    failures = find_infeasible_designs(designs)
+    indexed_designs = [(index, design) for index, design in enumerate(designs) if not failures[index]]
+    results = [create_result(index, design, failure) for index, (design, failure) in enumerate(zip(designs, failures))]
+    for result in evaluate_vane_designs(indexed_designs, num_workers, chunk_size):
+        results[result['index']] = result
+    return results
+
+
+def evaluate_vane_designs(indexed_designs:list[tuple[int, dict]], num_workers:int = None,
+                          chunk_size:int = None) -> list[dict]:
+    """Evaluates indexed designs across a pool of worker processes. Results are returned in the order of the designs"""
+    num_workers = (os.cpu_count() or 1) if num_workers is None else num_workers
+    chunk_size = max(1, len(indexed_designs) // (num_workers * 4)) if chunk_size is None else chunk_size
+
+    # Evaluate single worker sweeps in the current process
+    if num_workers == 1:
+        shared_cache = LogarithmicSpiral.shared_cache
+        try:
+            with quiet():
+                initialise_sweep_worker()
+                return [evaluate_vane_design(indexed_design) for indexed_design in indexed_designs]
+        finally:
+            LogarithmicSpiral.shared_cache = shared_cache
+
+    with ProcessPoolExecutor(max_workers=num_workers, initializer=initialise_sweep_worker) as executor:
+        return list(executor.map(evaluate_vane_design, indexed_designs, chunksize=chunk_size))
+
+
+def save_sweep_results(results:list[dict], file_name:str) -> None:
+    """Saves the sweep results to a csv file with one row per design"""
+    parameters = [name for name in VANE_PARAMETERS if any(name in result for result in results)]
+    columns = ['index'] + parameters + [name for name in RESULT_COLUMNS if name != 'index']
+    with open(file_name, 'w', encoding='utf-8-sig') as file:
+        file.write(",".join(columns) + "\n")
+        for result in results:
+            row = [str(result.get(column, '')) for column in columns]
+            row[-1] = '"' + row[-1].replace('"', '""') + '"' if row[-1] else ''
+            file.write(",".join(row) + "\n")
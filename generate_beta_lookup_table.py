@@ -0,0 +1,15 @@
+from class_beta_lookup_table import BetaLookupTable
+
+# table parameters
+theta_deg_range = (-179.0, 179.0)  # range of turning angles (bc_deg - ac_deg) in degrees (negative is clockwise)
+chord_deg_range = (-179.0, 179.0)  # range of chord angles relative to vector AC in degrees
+step_deg = 0.5                     # grid spacing in degrees
+
+# file parameters
+file_name = './beta_lookup_table.npy'
+
+# Build, save and check the lookup table
+table = BetaLookupTable.build(theta_deg_range=theta_deg_range, chord_deg_range=chord_deg_range, step_deg=step_deg)
+table.save(file_name)
+print(table)
+print(table.estimate_error())
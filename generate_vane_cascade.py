@@ -23,6 +23,8 @@ stl_height = 100
 stl_scale = 1/1000   # To convert mm to m
 show_plot = True
 show_channel = True
+preview_tolerance = 0.01    # points closer than this to the simplified vane outline are not plotted (None plots all)
+stl_tolerance = None        # same for the STL files (None keeps the full resolution)
 
 generate_vane_cascade(
     horizontal_pitch=horizontal_pitch,
@@ -41,6 +43,8 @@ generate_vane_cascade(
     stl_height=stl_height,
     stl_scale=stl_scale,
     show_plot=show_plot,
-    show_channel=show_channel)
+    show_channel=show_channel,
+    preview_tolerance=preview_tolerance,
+    stl_tolerance=stl_tolerance)
 
 
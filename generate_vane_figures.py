@@ -0,0 +1,24 @@
+from func_render import render_vane_designs
+from func_sweep import generate_parameter_grid
+
+# design space (a figure is rendered for every combination of the values below)
+parameters = {
+    'horizontal_pitch': [25.0],
+    'vertical_pitch': [25.0 * 1.45, 25.0 * 1.55, 25.0 * 1.72],
+    'thickness': [2],
+    'chord_lower': [150, 200, 250],
+    'stretch_lower': [1.45, 3.26],
+    'ac_deg': [90],
+    'bc_deg': [122, 180]}
+
+# rendering parameters
+num_vanes = 3               # number of vanes shown in every figure
+num_workers = None          # number of worker processes (None uses all cores)
+file_directory = './vane_figures'
+
+# Render the figures
+if __name__ == '__main__':
+    designs = generate_parameter_grid(parameters)
+    results = render_vane_designs(designs, file_directory, num_vanes=num_vanes, num_workers=num_workers)
+    num_failed = sum(1 for result in results if result['failure'])
+    print(f"Rendered {len(results) - num_failed} figures ({num_failed} designs failed) to {file_directory}")
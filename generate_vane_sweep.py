@@ -0,0 +1,24 @@
+from func_sweep import generate_parameter_grid, sweep_vane_designs, save_sweep_results
+
+# design space (every combination of the values below is evaluated)
+parameters = {
+    'horizontal_pitch': [25.0],
+    'vertical_pitch': [25.0 * 1.45, 25.0 * 1.55, 25.0 * 1.72],
+    'thickness': [1, 2],
+    'chord_lower': [150, 200, 250],
+    'stretch_lower': [1.45, 3.26],
+    'ac_deg': [90],
+    'bc_deg': [120, 122, 180]}
+
+# sweep parameters
+num_workers = None          # number of worker processes (None uses all cores)
+chunk_size = None           # number of designs sent to a worker at once (None picks a chunk size automatically)
+file_name = './vane_sweep.csv'
+
+# Execute the sweep
+if __name__ == '__main__':
+    designs = generate_parameter_grid(parameters)
+    results = sweep_vane_designs(designs, num_workers=num_workers, chunk_size=chunk_size)
+    save_sweep_results(results, file_name)
+    num_failed = sum(1 for result in results if result['failure'])
+    print(f"Evaluated {len(results)} designs ({num_failed} failed) and saved the results to {file_name}")
@@ -0,0 +1,39 @@
+import argparse
+import os
+import sys
+import time
+
+from func_jobs import format_summary, load_job_file, run_jobs, save_summary, validate_jobs
+
+# default run parameters (can be overridden on the command line)
+output_directory = './job_output'   # every job writes to a directory named after the job inside this directory
+num_workers = None                  # number of worker processes (None uses all cores)
+
+# Run every job of a JSON or TOML job file, e.g. `python run_jobs.py example_jobs.toml --workers 4`
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Runs the spiral, diffuser, vane and cascade jobs of a job file')
+    parser.add_argument('job_file', help='JSON or TOML file listing the jobs')
+    parser.add_argument('--output', default=output_directory, help='directory of the job outputs and summary')
+    parser.add_argument('--workers', type=int, default=num_workers, help='number of worker processes')
+    parser.add_argument('--validate-only', action='store_true', help='check the job file without running any job')
+    args = parser.parse_args()
+
+    # Validate every job before running any of them
+    try:
+        jobs = validate_jobs(load_job_file(args.job_file))
+    except ValueError as error:
+        print(error)
+        sys.exit(1)
+    print(f"{len(jobs)} valid job(s) in {args.job_file}")
+    if args.validate_only:
+        sys.exit(0)
+
+    # Run the jobs and report their timings and failures
+    os.makedirs(args.output, exist_ok=True)
+    start = time.perf_counter()
+    results = run_jobs(jobs, args.output, num_workers=args.workers)
+    wall_time = time.perf_counter() - start
+    save_summary(results, f"{args.output}/summary.json", wall_time_s=wall_time)
+    print(format_summary(results))
+    print(f"Finished in {wall_time:.3f} s. Summary saved to {args.output}/summary.json")
+    sys.exit(1 if any(result['failure'] for result in results) else 0)
@@ -0,0 +1,28 @@
+import argparse
+import asyncio
+
+from func_service import BATCH_WINDOW_S, DEFAULT_HOST, DEFAULT_PORT, MAX_BATCH_SIZE, serve
+
+# Serve spirals, diffusers and vanes over HTTP, e.g. `python run_service.py --port 8765`, then
+# `curl -d '{"a_xy": [1, 0], "b_xy": [0, 3], "ac_deg": 90, "bc_deg": 122}' http://127.0.0.1:8765/spiral`
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Runs a local service solving spiral, diffuser and vane requests')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='address to listen on')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='TCP port to listen on (0 picks a free port)')
+    parser.add_argument('--unix', help='path of a Unix socket to listen on instead of a TCP port')
+    parser.add_argument('--window', type=float, default=BATCH_WINDOW_S * 1000,
+                        help='time in ms a batch waits for further requests if no batch is being solved')
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH_SIZE, help='largest number of requests per batch')
+    parser.add_argument('--unbatched', action='store_true', help='solve every request on its own (for comparison)')
+    args = parser.parse_args()
+
+    # Report the address once the service accepts connections (benchmark_service.py reads the port from this line)
+    mode = 'unbatched' if args.unbatched else f"batch window {args.window:g} ms"
+    def report_address(address):
+        print(f"Serving spirals, diffusers and vanes on {address} ({mode})", flush=True)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.window / 1000, args.max_batch,
+                          on_ready=report_address, batched=not args.unbatched))
+    except KeyboardInterrupt:
+        pass